@@ -0,0 +1,89 @@
+"""
+Cost of assembling a ChatCompletion from a long stream, in chunks/sec.
+
+- naive: str += per content delta and per tool-call argument fragment
+- model: ChatCompletionAccumulator on ChatCompletionChunk models
+- dict:  ChatCompletionAccumulator on StreamConfig(chunk_format="dict") chunks
+
+Half of the stream is content and half is the arguments of one tool call, so
+both the content and tool-call merge paths are exercised.
+
+    python -m benchmarks.bench_accumulate --chunks 10000
+"""
+
+import argparse
+import time
+from dialtone.stream import ChatCompletionAccumulator
+from dialtone.types import ChatCompletionChunk
+
+
+def make_chunks(count: int) -> list[dict]:
+    chunks = []
+    for i in range(count):
+        if i < count // 2:
+            delta = {"role": "assistant", "content": f" token{i}"}
+        else:
+            fragment = {"index": 0, "function": {"arguments": f'"arg{i}", '}}
+            if i == count // 2:
+                fragment.update(id="call_1", type="function")
+                fragment["function"]["name"] = "lookup"
+            delta = {"tool_calls": [fragment]}
+        chunks.append(
+            {
+                "model": "gpt-4o-mini-2024-07-18",
+                "provider": "openai",
+                "choices": [{"delta": delta}],
+                "usage": None,
+            }
+        )
+    return chunks
+
+
+def naive(chunks: list[dict]):
+    content = ""
+    arguments: dict[int, str] = {}
+    for chunk in chunks:
+        delta = chunk["choices"][0]["delta"]
+        if delta.get("content"):
+            content += delta["content"]
+        for tool_call in delta.get("tool_calls") or []:
+            index = tool_call["index"]
+            arguments[index] = arguments.get(index, "") + tool_call["function"].get(
+                "arguments", ""
+            )
+    return content, arguments
+
+
+def accumulate(chunks: list[ChatCompletionChunk | dict]):
+    accumulator = ChatCompletionAccumulator()
+    for chunk in chunks:
+        accumulator.add(chunk)
+    return accumulator.get_completion()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    dicts = make_chunks(args.chunks)
+    models = [ChatCompletionChunk(**chunk) for chunk in dicts]
+    runs = [
+        ("naive", naive, dicts),
+        ("model", accumulate, models),
+        ("dict", accumulate, dicts),
+    ]
+    for name, run, chunks in runs:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run(chunks)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(
+            f"{name:>8}: {args.chunks / elapsed:10.0f} chunks/s  "
+            f"{elapsed * 1000:7.2f} ms/stream"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Client-side cost of turning streamed events into chunks, in tokens/sec.
+
+- legacy: decode JSON to a dict, then ChatCompletionChunk(**item)
+- model:  ChatCompletionChunk.model_validate_json on the raw event bytes
+- dict:   decode JSON only (StreamConfig(chunk_format="dict"))
+
+    python -m benchmarks.bench_chunks --tokens 100000
+"""
+
+import argparse
+import time
+from dialtone.types import ChatCompletionChunk
+from dialtone.utils import json_backend
+from dialtone.utils.api import parse_chunk
+
+
+def make_events(tokens: int) -> list[bytes]:
+    events = []
+    for i in range(tokens):
+        events.append(
+            json_backend.dumps(
+                {
+                    "model": "gpt-4o-mini-2024-07-18",
+                    "provider": "openai",
+                    "choices": [{"delta": {"role": "assistant", "content": f" t{i}"}}],
+                    "usage": None,
+                }
+            )
+        )
+    return events
+
+
+def legacy(data: bytes) -> ChatCompletionChunk:
+    return ChatCompletionChunk(**json_backend.loads(data))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=100_000)
+    args = parser.parse_args()
+
+    events = make_events(args.tokens)
+    runs = [
+        ("legacy", legacy),
+        ("model", lambda data: parse_chunk(data, "model")),
+        ("dict", lambda data: parse_chunk(data, "dict")),
+    ]
+    print(f"json={json_backend.backend}")
+    for name, parse in runs:
+        start = time.perf_counter()
+        for data in events:
+            parse(data)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8}: {args.tokens / elapsed:10.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+End-to-end client benchmark against the local mock server.
+
+Runs chat.completions.create (optionally streaming) or chat.route with the
+sync client on a thread pool and the async client with asyncio tasks, and
+reports requests/sec, p50/p99 latency, streaming chunks/sec and client CPU
+per request.
+
+    python -m benchmarks.bench_client --requests 2000 --concurrency 32
+    python -m benchmarks.bench_client --stream --chunks 64 --chunk-interval 0.001
+    python -m benchmarks.bench_client --endpoint route --error-rate 0.05 --json
+    python -m benchmarks.bench_client --stream --cassette prod.jsonl --replay-speed 0
+
+With --cassette, responses recorded with dialtone.cassette.RecordingTransport
+are replayed in process instead of going through the mock server, which
+profiles the SDK against production-shaped payloads and stream timing.
+
+The mock server runs on a thread of this process, so CPU is measured with
+per-thread CPU time of the client threads only. Throughput still competes
+with the server for the GIL; compare numbers from the same machine and
+settings rather than reading them as absolute.
+
+Requires the bench dependency group (hypercorn, h2).
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import httpx
+from contextlib import nullcontext
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Optional
+from pydantic import BaseModel
+from dialtone import AsyncDialtone, Dialtone
+from dialtone.cassette import Cassette, ReplayTransport
+from dialtone.config import DEFAULT_BASE_URL
+from dialtone.types import ProviderConfig
+from benchmarks.mock_server import MockDialtoneApp, MockServer
+
+Endpoint = Literal["completions", "route"]
+
+MESSAGES = [{"role": "user", "content": "Hello, world!"}]
+PROVIDER_CONFIG = ProviderConfig(openai=ProviderConfig.OpenAI(api_key="bench"))
+
+
+class Sample(BaseModel):
+    latency: float
+    cpu: float
+    chunks: int = 0
+    # Time from the first to the last chunk of a stream
+    stream_seconds: float = 0.0
+    error: bool = False
+
+
+class BenchResult(BaseModel):
+    client: str
+    requests: int
+    errors: int
+    requests_per_second: float
+    p50_ms: float
+    p99_ms: float
+    cpu_per_request_us: float
+    # Chunks per second within each stream, median over streams
+    stream_chunks_per_second: float | None = None
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def summarize(client: str, samples: list[Sample], elapsed: float) -> BenchResult:
+    latencies = [sample.latency for sample in samples if not sample.error]
+    stream_rates = [
+        sample.chunks / sample.stream_seconds
+        for sample in samples
+        if sample.chunks > 1 and sample.stream_seconds > 0
+    ]
+    return BenchResult(
+        client=client,
+        requests=len(samples),
+        errors=sum(sample.error for sample in samples),
+        requests_per_second=len(samples) / elapsed,
+        p50_ms=percentile(latencies, 50) * 1000 if latencies else 0.0,
+        p99_ms=percentile(latencies, 99) * 1000 if latencies else 0.0,
+        cpu_per_request_us=sum(sample.cpu for sample in samples) / len(samples) * 1e6,
+        stream_chunks_per_second=(
+            percentile(stream_rates, 50) if stream_rates else None
+        ),
+    )
+
+
+def run_sync(
+    base_url: str,
+    endpoint: Endpoint,
+    stream: bool,
+    requests: int,
+    concurrency: int,
+    transport: Optional[httpx.BaseTransport] = None,
+) -> BenchResult:
+    dialtone = Dialtone(
+        api_key="bench",
+        provider_config=PROVIDER_CONFIG,
+        http_client=httpx.Client(transport=transport) if transport else None,
+        base_url=base_url,
+    )
+    samples: list[Sample] = []
+    lock = threading.Lock()
+
+    def one():
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        chunks = 0
+        first_chunk_at = last_chunk_at = start
+        error = False
+        try:
+            if endpoint == "route":
+                dialtone.chat.route(messages=MESSAGES)
+            elif stream:
+                for _ in dialtone.chat.completions.create(
+                    messages=MESSAGES, stream=True
+                ):
+                    last_chunk_at = time.perf_counter()
+                    if not chunks:
+                        first_chunk_at = last_chunk_at
+                    chunks += 1
+            else:
+                dialtone.chat.completions.create(messages=MESSAGES)
+        except Exception:
+            error = True
+        sample = Sample(
+            latency=time.perf_counter() - start,
+            cpu=time.thread_time() - cpu_start,
+            chunks=chunks,
+            stream_seconds=last_chunk_at - first_chunk_at,
+            error=error,
+        )
+        with lock:
+            samples.append(sample)
+
+    with dialtone, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        for future in [executor.submit(one) for _ in range(requests)]:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+    return summarize("sync", samples, elapsed)
+
+
+async def run_async(
+    base_url: str,
+    endpoint: Endpoint,
+    stream: bool,
+    requests: int,
+    concurrency: int,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> BenchResult:
+    dialtone = AsyncDialtone(
+        api_key="bench",
+        provider_config=PROVIDER_CONFIG,
+        http_client=httpx.AsyncClient(transport=transport) if transport else None,
+        base_url=base_url,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list[Sample] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            chunks = 0
+            first_chunk_at = last_chunk_at = start
+            error = False
+            try:
+                if endpoint == "route":
+                    await dialtone.chat.route(messages=MESSAGES)
+                elif stream:
+                    async for _ in await dialtone.chat.completions.create(
+                        messages=MESSAGES, stream=True
+                    ):
+                        last_chunk_at = time.perf_counter()
+                        if not chunks:
+                            first_chunk_at = last_chunk_at
+                        chunks += 1
+                else:
+                    await dialtone.chat.completions.create(messages=MESSAGES)
+            except Exception:
+                error = True
+            # CPU is shared by all tasks on the loop and is split evenly below
+            samples.append(
+                Sample(
+                    latency=time.perf_counter() - start,
+                    cpu=0.0,
+                    chunks=chunks,
+                    stream_seconds=last_chunk_at - first_chunk_at,
+                    error=error,
+                )
+            )
+
+    async with dialtone:
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        cpu = time.thread_time() - cpu_start
+
+    for sample in samples:
+        sample.cpu = cpu / len(samples)
+    return summarize("async", samples, elapsed)
+
+
+def print_result(result: BenchResult):
+    line = (
+        f"{result.client:>6}: {result.requests_per_second:8.0f} req/s  "
+        f"p50 {result.p50_ms:7.2f} ms  p99 {result.p99_ms:7.2f} ms  "
+        f"cpu {result.cpu_per_request_us:7.0f} us/req  errors {result.errors}"
+    )
+    if result.stream_chunks_per_second is not None:
+        line += f"  stream {result.stream_chunks_per_second:8.0f} chunks/s"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--client", choices=["sync", "async", "both"], default="both")
+    parser.add_argument(
+        "--endpoint", choices=["completions", "route"], default="completions"
+    )
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--chunks", type=int, default=16)
+    parser.add_argument("--chunk-interval", type=float, default=0.0)
+    parser.add_argument("--token-size", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--cassette", help="Replay a recorded cassette file")
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="Replay speed multiplier, 0 for no delays",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    app = MockDialtoneApp(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        chunks=args.chunks,
+        chunk_interval=args.chunk_interval,
+        token_size=args.token_size,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=0,
+    )
+    clients = ["sync", "async"] if args.client == "both" else [args.client]
+    results: list[BenchResult] = []
+
+    if args.cassette:
+        cassette = Cassette(args.cassette)
+        server = nullcontext(SimpleNamespace(base_url=DEFAULT_BASE_URL))
+    else:
+        server = MockServer(app)
+
+    with server as server:
+        for client in clients:
+            # Requests differ from the recording, so match on endpoint only
+            transport = (
+                ReplayTransport(cassette, speed=args.replay_speed, match="path")
+                if args.cassette
+                else None
+            )
+            # The first run warms up connections and is discarded
+            for requests in (
+                [args.warmup, args.requests] if args.warmup else [args.requests]
+            ):
+                if client == "sync":
+                    result = run_sync(
+                        server.base_url,
+                        args.endpoint,
+                        args.stream,
+                        requests,
+                        args.concurrency,
+                        transport,
+                    )
+                else:
+                    result = asyncio.run(
+                        run_async(
+                            server.base_url,
+                            args.endpoint,
+                            args.stream,
+                            requests,
+                            args.concurrency,
+                            transport,
+                        )
+                    )
+            results.append(result)
+
+    if args.json:
+        print(json.dumps([result.model_dump() for result in results], indent=2))
+        return
+
+    print(
+        f"{args.endpoint}{' (stream)' if args.stream else ''}: "
+        f"{args.requests} requests, concurrency {args.concurrency}"
+    )
+    for result in results:
+        print_result(result)
+
+
+if __name__ == "__main__":
+    main()
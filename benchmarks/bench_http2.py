@@ -0,0 +1,79 @@
+"""
+Compare HTTP/1.1 and HTTP/2 for concurrent AsyncDialtone completions.
+
+Runs against the local mock server and reports how many TCP connections the
+server saw plus p50/p99 client latency for each protocol.
+
+    python -m benchmarks.bench_http2 --requests 500 --concurrency 100
+
+Requires the bench dependency group (hypercorn, h2).
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from dialtone import AsyncDialtone
+from dialtone.types import HTTPConfig, ProviderConfig
+from benchmarks.mock_server import MockDialtoneApp, MockServer
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+async def run(base_url: str, http2: bool, requests: int, concurrency: int):
+    # The mock server is cleartext, so HTTP/2 must be used with prior
+    # knowledge instead of being negotiated through TLS ALPN.
+    dialtone = AsyncDialtone(
+        api_key="bench",
+        provider_config=ProviderConfig(openai=ProviderConfig.OpenAI(api_key="bench")),
+        http_config=HTTPConfig(http2=http2, http1=not http2),
+        base_url=base_url,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await dialtone.chat.completions.create(
+                messages=[{"role": "user", "content": "Hello, world!"}]
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await dialtone.aclose()
+
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    app = MockDialtoneApp(latency=args.latency)
+    with MockServer(app) as server:
+        for http2 in (False, True):
+            app.reset()
+            latencies, elapsed = asyncio.run(
+                run(server.base_url, http2, args.requests, args.concurrency)
+            )
+            print(
+                f"{'HTTP/2  ' if http2 else 'HTTP/1.1'} | "
+                f"connections: {len(app.connections):4d} | "
+                f"req/s: {args.requests / elapsed:8.1f} | "
+                f"p50: {statistics.median(latencies) * 1000:7.2f} ms | "
+                f"p99: {percentile(latencies, 99) * 1000:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare the available JSON backends on realistic Dialtone payloads.
+
+Measures encoding a /chat/completions request body, decoding a full
+ChatCompletion response and decoding a stream of ChatCompletionChunk lines.
+
+    python -m benchmarks.bench_json --iterations 2000
+"""
+
+import argparse
+import importlib.util
+import timeit
+from dialtone.utils import json_backend
+from benchmarks.bench_payload import make_client, make_conversation
+from dialtone.utils.prepare_payload import prepare_chat_message, prepare_static_params
+
+COMPLETION = {
+    "choices": [
+        {
+            "message": {
+                "role": "assistant",
+                "content": "The quick brown fox jumps over the lazy dog. " * 40,
+                "tool_calls": [
+                    {
+                        "id": "call_abc123",
+                        "type": "function",
+                        "function": {
+                            "name": "get_current_weather",
+                            "arguments": '{"location": "Boston, MA"}',
+                        },
+                    }
+                ],
+            }
+        }
+    ],
+    "model": "gpt-4o-2024-05-13",
+    "provider": "openai",
+    "usage": {"prompt_tokens": 1200, "completion_tokens": 400, "total_tokens": 1600},
+}
+
+
+def make_chunk(token: str) -> dict:
+    return {
+        "model": "gpt-4o-2024-05-13",
+        "provider": "openai",
+        "choices": [{"delta": {"role": "assistant", "content": token}}],
+        "usage": None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--chunks", type=int, default=500)
+    args = parser.parse_args()
+
+    client = make_client()
+    request = {
+        "messages": [prepare_chat_message(m) for m in make_conversation(30_000)],
+        **prepare_static_params(client),
+    }
+    response = json_backend.dumps(COMPLETION)
+    chunks = [json_backend.dumps(make_chunk(f" token{i}")) for i in range(args.chunks)]
+
+    backends = [
+        name
+        for name in json_backend.JSON_BACKENDS
+        if name == "json" or importlib.util.find_spec(name)
+    ]
+    previous = json_backend.backend
+
+    print(
+        f"{'backend':>8} | {'encode request':>15} | {'decode response':>15} | "
+        f"{'decode stream':>15}"
+    )
+    for name in backends:
+        json_backend.set_backend(name)
+
+        def run(fn) -> float:
+            return timeit.timeit(fn, number=args.iterations) / args.iterations * 1e6
+
+        encode = run(lambda: json_backend.dumps(request))
+        decode = run(lambda: json_backend.loads(response))
+        stream = run(lambda: [json_backend.loads(chunk) for chunk in chunks])
+        print(f"{name:>8} | {encode:12.1f} us | {decode:12.1f} us | {stream:12.1f} us")
+
+    json_backend.set_backend(previous)
+
+
+if __name__ == "__main__":
+    main()
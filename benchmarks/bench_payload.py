@@ -0,0 +1,166 @@
+"""
+Microbenchmark for building the /chat/completions request body.
+
+Compares three ways of producing the bytes sent on the wire for a large
+config plus conversation payload (~40 KB):
+
+- dump_all:  model_dump every config on every request, encode the whole dict
+- cached:    reuse the cached static dict, encode the whole dict
+- spliced:   reuse pre-encoded static bytes, encode only messages/tools
+
+It then replays a multi-turn chat of --turns turns and reports the total
+client cost of building every turn's body from dicts (what create() does
+with a list of messages) versus a Conversation, which encodes each message
+once.
+
+    python -m benchmarks.bench_payload --iterations 2000 --turns 50
+"""
+
+import argparse
+import json
+import time
+import timeit
+from dialtone.conversation import Conversation
+from dialtone.types import (
+    ChatMessage,
+    DialtoneClient,
+    ProviderConfig,
+    Tool,
+)
+from dialtone.utils.prepare_payload import (
+    prepare_chat_completion,
+    prepare_chat_message,
+    prepare_static_params,
+    prepare_tool,
+)
+
+
+def make_client() -> DialtoneClient:
+    return DialtoneClient(
+        api_key="bench",
+        provider_config=ProviderConfig(
+            openai=ProviderConfig.OpenAI(api_key="sk-" + "x" * 48),
+            anthropic=ProviderConfig.Anthropic(api_key="sk-ant-" + "x" * 90),
+            google=ProviderConfig.Google(api_key="x" * 39),
+            groq=ProviderConfig.Groq(api_key="gsk_" + "x" * 52),
+            cohere=ProviderConfig.Cohere(api_key="x" * 40),
+            fireworks=ProviderConfig.Fireworks(api_key="x" * 48),
+            deepinfra=ProviderConfig.DeepInfra(api_key="x" * 32),
+            together=ProviderConfig.Together(api_key="x" * 64),
+            replicate=ProviderConfig.Replicate(api_key="r8_" + "x" * 37),
+        ),
+    )
+
+
+def make_conversation(size: int) -> list[ChatMessage]:
+    messages = [ChatMessage(role="system", content="You are a helpful assistant.")]
+    turn = 0
+    while sum(len(message.content) for message in messages) < size:
+        role = "user" if turn % 2 == 0 else "assistant"
+        messages.append(ChatMessage(role=role, content=f"Message {turn}. " * 40))
+        turn += 1
+    return messages
+
+
+TOOLS = [
+    Tool(
+        type="function",
+        function={
+            "name": "get_current_weather",
+            "description": "Get the current weather in a given location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {"type": "string"},
+                    "unit": {"type": "string", "enum": ["celsius", "fahrenheit"]},
+                },
+                "required": ["location"],
+            },
+        },
+    )
+]
+
+
+def dump_all(client: DialtoneClient, messages: list[ChatMessage]) -> bytes:
+    params = {
+        "messages": [prepare_chat_message(message) for message in messages],
+        "dials": client.dials.model_dump(),
+        "provider_config": client.provider_config.model_dump(),
+        "router_model_config": client.router_model_config.model_dump(),
+        "fallback_config": client.fallback_config.model_dump(),
+        "tools_config": client.tools_config.model_dump(),
+        "tools": [prepare_tool(tool) for tool in TOOLS],
+    }
+    return json.dumps(params).encode()
+
+
+def cached(client: DialtoneClient, messages: list[ChatMessage]) -> bytes:
+    params = {
+        "messages": [prepare_chat_message(message) for message in messages],
+        **prepare_static_params(client),
+        "tools": [prepare_tool(tool) for tool in TOOLS],
+    }
+    return json.dumps(params).encode()
+
+
+def spliced(client: DialtoneClient, messages: list[ChatMessage]) -> bytes:
+    return prepare_chat_completion(client=client, messages=messages, tools=TOOLS)[1]
+
+
+def history_turns(client: DialtoneClient, turns: int) -> bytes:
+    history: list[dict] = [{"role": "system", "content": "You are helpful."}]
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"Question {turn}. " * 40})
+        messages = [ChatMessage(**message) for message in history]
+        content = prepare_chat_completion(client=client, messages=messages)[1]
+        history.append({"role": "assistant", "content": f"Answer {turn}. " * 40})
+    return content
+
+
+def conversation_turns(client: DialtoneClient, turns: int) -> bytes:
+    conversation = Conversation([{"role": "system", "content": "You are helpful."}])
+    for turn in range(turns):
+        conversation.append({"role": "user", "content": f"Question {turn}. " * 40})
+        content = prepare_chat_completion(
+            client=client, messages=[], encoded_messages=conversation.encode()
+        )[1]
+        conversation.append({"role": "assistant", "content": f"Answer {turn}. " * 40})
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--conversation-size", type=int, default=30_000)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    client = make_client()
+    messages = make_conversation(args.conversation_size)
+    print(f"Payload size: {len(spliced(client, messages)) / 1024:.1f} KB")
+
+    baseline = None
+    for builder in (dump_all, cached, spliced):
+        seconds = timeit.timeit(
+            lambda: builder(client, messages), number=args.iterations
+        )
+        per_request = seconds / args.iterations * 1e6
+        baseline = baseline or per_request
+        print(
+            f"{builder.__name__:>8}: {per_request:8.1f} us/request "
+            f"({baseline / per_request:.2f}x)"
+        )
+
+    print(f"\n{args.turns} turns:")
+    for builder in (history_turns, conversation_turns):
+        start = time.perf_counter()
+        builder(client, args.turns)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{builder.__name__:>18}: {elapsed * 1000:8.1f} ms total, "
+            f"{elapsed / args.turns * 1e6:8.1f} us/turn"
+        )
+
+
+if __name__ == "__main__":
+    main()
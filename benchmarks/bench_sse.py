@@ -0,0 +1,96 @@
+"""
+Throughput of the streaming line decoder on a large, fast SSE stream.
+
+Compares the previous per-chunk str.splitlines() decoder (fed with chunks
+aligned to line boundaries, since it cannot handle split lines) with the
+incremental SSEDecoder fed with arbitrarily sized network chunks.
+
+    python -m benchmarks.bench_sse --events 100000
+"""
+
+import argparse
+import random
+import time
+from dialtone.utils import json_backend
+from dialtone.utils.sse import DONE, SSEDecoder
+
+
+def make_stream(events: int) -> bytes:
+    lines = []
+    for i in range(events):
+        chunk = {
+            "model": "gpt-4o-mini-2024-07-18",
+            "provider": "openai",
+            "choices": [{"delta": {"role": "assistant", "content": f" tok{i}"}}],
+            "usage": None,
+        }
+        lines.append(b"data: " + json_backend.dumps(chunk) + b"\n\n")
+    lines.append(b"data: [DONE]\n\n")
+    return b"".join(lines)
+
+
+def split_randomly(data: bytes, low: int, high: int) -> list[bytes]:
+    rng = random.Random(0)
+    chunks, position = [], 0
+    while position < len(data):
+        size = rng.randint(low, high)
+        chunks.append(data[position : position + size])
+        position += size
+    return chunks
+
+
+def legacy_decode(chunks: list[str]) -> int:
+    count = 0
+    for response_chunk_text in chunks:
+        for line in response_chunk_text.splitlines():
+            line = line.strip()
+            if line.startswith("data:"):
+                line = line.removeprefix("data:").strip()
+            if line and line != "[DONE]":
+                json_backend.loads(line)
+                count += 1
+    return count
+
+
+def sse_decode(chunks: list[bytes]) -> int:
+    count = 0
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        for event in decoder.feed(chunk):
+            if event.data == DONE:
+                return count
+            json_backend.loads(event.data)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    stream = make_stream(args.events)
+    megabytes = len(stream) / 1e6
+    aligned = [line.decode() + "\n\n" for line in stream.split(b"\n\n") if line]
+    print(
+        f"Stream: {args.events} events, {megabytes:.1f} MB, json={json_backend.backend}"
+    )
+
+    runs = [
+        ("legacy (aligned)", legacy_decode, aligned),
+        ("sse 64B-1KB", sse_decode, split_randomly(stream, 64, 1024)),
+        ("sse 4KB-16KB", sse_decode, split_randomly(stream, 4096, 16384)),
+    ]
+    for name, decode, chunks in runs:
+        start = time.perf_counter()
+        count = decode(chunks)
+        elapsed = time.perf_counter() - start
+        assert count == args.events, (name, count)
+        print(
+            f"{name:>16}: {count / elapsed:10.0f} events/s "
+            f"{megabytes / elapsed:7.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
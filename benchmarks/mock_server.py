@@ -0,0 +1,221 @@
+"""
+Local stand-in for the Dialtone API, used by the benchmarks.
+
+The app is a plain ASGI callable served by hypercorn on a background thread,
+so it speaks both HTTP/1.1 and cleartext HTTP/2 (prior knowledge). It serves
+/v0/chat/route and /v0/chat/completions, streaming the completion as SSE
+chunks when the request sets "stream": true. Latency, chunk rate, response
+sizes and injected errors are configurable.
+"""
+
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from typing import Any
+
+COMPLETION = {
+    "choices": [{"message": {"role": "assistant", "content": "Hello!"}}],
+    "model": "gpt-4o-mini-2024-07-18",
+    "provider": "openai",
+    "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+}
+
+ROUTE = {
+    "model": "gpt-4o-mini-2024-07-18",
+    "providers": ["openai"],
+    "quality_predictions": {"gpt-4o-mini-2024-07-18": 0.9},
+    "routing_strategy": "dials",
+}
+
+
+def make_completion(content: str) -> dict:
+    return {
+        **COMPLETION,
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+    }
+
+
+def make_chunk(token: str, usage: dict | None = None) -> dict:
+    return {
+        "model": COMPLETION["model"],
+        "provider": COMPLETION["provider"],
+        "choices": [{"delta": {"role": "assistant", "content": token}}],
+        "usage": usage,
+    }
+
+
+class MockDialtoneApp:
+    # latency: seconds before the response starts (plus up to latency_jitter)
+    # chunks / chunk_interval: number of SSE chunks per stream and the delay
+    #   between them
+    # token_size: characters per streamed token; completions carry
+    #   chunks * token_size characters
+    # error_rate / error_status: fraction of requests answered with an error
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        chunks: int = 16,
+        chunk_interval: float = 0.0,
+        token_size: int = 4,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.chunks = chunks
+        self.chunk_interval = chunk_interval
+        self.token_size = token_size
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.connections: set[tuple[str, int]] = set()
+        self.requests = 0
+        self.errors = 0
+
+        token = "x" * token_size
+        self.completion_body = json.dumps(make_completion(token * chunks)).encode()
+        self.route_body = json.dumps(ROUTE).encode()
+        usage = {
+            "prompt_tokens": 3,
+            "completion_tokens": chunks,
+            "total_tokens": 3 + chunks,
+        }
+        self.stream_events = [
+            b"data: "
+            + json.dumps(make_chunk(token, usage if i == chunks - 1 else None)).encode()
+            + b"\n\n"
+            for i in range(chunks)
+        ] + [b"data: [DONE]\n\n"]
+
+    async def __call__(self, scope: dict, receive: Any, send: Any):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        self.requests += 1
+        if scope.get("client"):
+            self.connections.add(tuple(scope["client"]))
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        latency = self.latency
+        if self.latency_jitter:
+            latency += self.random.uniform(0, self.latency_jitter)
+        if latency:
+            await asyncio.sleep(latency)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            await self._send(send, self.error_status, b"Injected error", b"text/plain")
+            return
+
+        if scope["path"].endswith("/chat/route"):
+            await self._send(send, 200, self.route_body)
+        elif b'"stream":true' in body:
+            await self._stream(send)
+        else:
+            await self._send(send, 200, self.completion_body)
+
+    async def _send(
+        self,
+        send: Any,
+        status: int,
+        body: bytes,
+        content_type: bytes = b"application/json",
+    ):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", content_type)],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _stream(self, send: Any):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        for event in self.stream_events:
+            if self.chunk_interval:
+                await asyncio.sleep(self.chunk_interval)
+            await send({"type": "http.response.body", "body": event, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    def reset(self):
+        self.connections.clear()
+        self.requests = 0
+        self.errors = 0
+
+
+class MockServer:
+    def __init__(self, app: MockDialtoneApp):
+        self.app = app
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._shutdown: asyncio.Event | None = None
+
+    def __enter__(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        _wait_for_port(self.port)
+        return self
+
+    def __exit__(self, *args: Any):
+        if self._loop and self._shutdown:
+            self._loop.call_soon_threadsafe(self._shutdown.set)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = [f"127.0.0.1:{self.port}"]
+        config.loglevel = "WARNING"
+        config.keep_alive_timeout = 60
+
+        self._loop = asyncio.new_event_loop()
+        self._shutdown = asyncio.Event()
+        self._loop.run_until_complete(
+            serve(self.app, config, shutdown_trigger=self._shutdown.wait)
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Mock server did not start on port {port}")
@@ -0,0 +1,4 @@
+import sys
+from dialtone.cli import main
+
+sys.exit(main())
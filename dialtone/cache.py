@@ -0,0 +1,213 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncGenerator, Generator, Optional
+from pydantic import BaseModel
+from dialtone.utils import json_backend
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CacheBackend(ABC):
+    # Backends store opaque bytes under string keys. Implementations must be
+    # safe to call from multiple threads.
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(
+        self,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        # key -> (expires_at, value), least recently used first
+        self._entries: OrderedDict[str, tuple[Optional[float], bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value)
+            self.size_bytes += len(value)
+
+            while (self.max_entries is not None and len(self) > self.max_entries) or (
+                self.max_bytes is not None and self.size_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self.size_bytes -= len(value)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS dialtone_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM dialtone_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            # Wall clock time, since entries outlive the process.
+            if expires_at is not None and expires_at <= time.time():
+                with self._connection:
+                    self._connection.execute(
+                        "DELETE FROM dialtone_cache WHERE key = ?", (key,)
+                    )
+                return None
+
+            return value
+
+    def set(self, key: str, value: bytes):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO dialtone_cache VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM dialtone_cache")
+
+    def close(self):
+        self._connection.close()
+
+
+class ResponseCache:
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or MemoryCacheBackend()
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        self.backend.set(key, value)
+        with self._lock:
+            self.stats.stores += 1
+
+    def clear(self):
+        self.backend.clear()
+
+
+# The request body already holds everything that determines the response
+# (messages, tools, stream flag, dials and router/provider/fallback config)
+# and is encoded deterministically, so it doubles as the cache key.
+def get_cache_key(url: str, content: bytes) -> str:
+    return hashlib.sha256(url.encode() + b"\n" + content).hexdigest()
+
+
+# Streams are cached as a JSON array of the raw event payloads, so a replay
+# goes through the same chunk parsing as a live stream.
+def encode_stream(events: list[bytes]) -> bytes:
+    return json_backend.dumps([event.decode() for event in events])
+
+
+def decode_stream(value: bytes) -> list[bytes]:
+    return [event.encode() for event in json_backend.loads(value)]
+
+
+def replay_stream(value: bytes) -> Generator[bytes, None, None]:
+    yield from decode_stream(value)
+
+
+async def replay_stream_async(value: bytes) -> AsyncGenerator[bytes, None]:
+    for event in decode_stream(value):
+        yield event
+
+
+# Passes events through and stores them once the stream completes. Streams
+# that fail or are abandoned by the caller are not cached.
+def cache_stream(
+    generator: Generator[bytes, None, None], cache: ResponseCache, key: str
+) -> Generator[bytes, None, None]:
+    events = []
+    for event in generator:
+        events.append(event)
+        yield event
+    cache.set(key, encode_stream(events))
+
+
+async def cache_stream_async(
+    generator: AsyncGenerator[bytes, None], cache: ResponseCache, key: str
+) -> AsyncGenerator[bytes, None]:
+    events = []
+    async for event in generator:
+        events.append(event)
+        yield event
+    cache.set(key, encode_stream(events))
@@ -0,0 +1,301 @@
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+import time
+import httpx
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Iterator, Literal, Optional
+from pydantic import BaseModel
+from dialtone.errors import CassetteMissError
+from dialtone.utils import json_backend
+
+MatchMode = Literal["request", "path"]
+
+# Not meaningful once the response body has been captured
+SKIPPED_HEADERS = {"connection", "keep-alive", "transfer-encoding", "date", "server"}
+
+
+class Interaction(BaseModel):
+    method: str
+    path: str
+    # sha256 of the request body. Request bodies and headers (which carry the
+    # API key) are not stored.
+    request_hash: str
+    # Whether the request asked for a streamed response
+    stream: bool = False
+    status: int
+    headers: list[tuple[str, str]]
+    # Seconds from sending the request to receiving the response headers
+    headers_at: float
+    # "base64" if the raw body is not valid UTF-8, e.g. when it is compressed
+    encoding: Literal["utf-8", "base64"] = "utf-8"
+    # (seconds since the request was sent, raw body bytes) for every chunk
+    # read from the network, so streamed responses keep their timing
+    chunks: list[tuple[float, str]]
+
+    def get_chunks(self) -> list[tuple[float, bytes]]:
+        if self.encoding == "base64":
+            return [(at, base64.b64decode(data)) for at, data in self.chunks]
+        return [(at, data.encode()) for at, data in self.chunks]
+
+
+def get_request_hash(request: httpx.Request) -> str:
+    return hashlib.sha256(request.content).hexdigest()
+
+
+def get_request_path(request: httpx.Request) -> str:
+    return request.url.raw_path.decode()
+
+
+def get_request_stream(request: httpx.Request) -> bool:
+    try:
+        body = json_backend.loads(request.content)
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("stream") is True
+
+
+class Cassette:
+    # Interactions in recording order, stored as one JSON object per line.
+    # With a path, existing interactions are loaded from it and new ones are
+    # appended as they are recorded.
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.interactions: list[Interaction] = []
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                self.interactions = [
+                    Interaction.model_validate_json(line) for line in f if line.strip()
+                ]
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def add(self, interaction: Interaction):
+        with self._lock:
+            self.interactions.append(interaction)
+            if self.path is not None:
+                with open(self.path, "a") as f:
+                    f.write(interaction.model_dump_json() + "\n")
+
+
+def make_interaction(
+    request: httpx.Request,
+    response: httpx.Response,
+    headers_at: float,
+    chunks: list[tuple[float, bytes]],
+) -> Interaction:
+    try:
+        encoded = [(at, data.decode()) for at, data in chunks]
+        encoding = "utf-8"
+    except UnicodeDecodeError:
+        encoded = [(at, base64.b64encode(data).decode()) for at, data in chunks]
+        encoding = "base64"
+
+    return Interaction(
+        method=request.method,
+        path=get_request_path(request),
+        request_hash=get_request_hash(request),
+        stream=get_request_stream(request),
+        status=response.status_code,
+        headers=[
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in SKIPPED_HEADERS
+        ],
+        headers_at=headers_at,
+        encoding=encoding,
+        chunks=encoded,
+    )
+
+
+class RecordingStream(httpx.SyncByteStream):
+    def __init__(
+        self,
+        stream: httpx.SyncByteStream,
+        on_close: Callable[[list[tuple[float, bytes]]], None],
+        sent_at: float,
+    ):
+        self.stream = stream
+        self.on_close = on_close
+        self.sent_at = sent_at
+        self.chunks: list[tuple[float, bytes]] = []
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.stream:
+            self.chunks.append((time.monotonic() - self.sent_at, chunk))
+            yield chunk
+
+    def close(self):
+        self.stream.close()
+        self.on_close(self.chunks)
+
+
+class AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(
+        self,
+        stream: httpx.AsyncByteStream,
+        on_close: Callable[[list[tuple[float, bytes]]], None],
+        sent_at: float,
+    ):
+        self.stream = stream
+        self.on_close = on_close
+        self.sent_at = sent_at
+        self.chunks: list[tuple[float, bytes]] = []
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            self.chunks.append((time.monotonic() - self.sent_at, chunk))
+            yield chunk
+
+    async def aclose(self):
+        await self.stream.aclose()
+        self.on_close(self.chunks)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    # Passes requests through to `transport` and records every exchange,
+    # including the arrival time of each body chunk, once its response is
+    # closed. Use with httpx.Client(transport=RecordingTransport(cassette)).
+    def __init__(
+        self, cassette: Cassette, transport: Optional[httpx.BaseTransport] = None
+    ):
+        self.cassette = cassette
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        sent_at = time.monotonic()
+        response = self.transport.handle_request(request)
+        headers_at = time.monotonic() - sent_at
+
+        def on_close(chunks: list[tuple[float, bytes]]):
+            self.cassette.add(make_interaction(request, response, headers_at, chunks))
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=RecordingStream(response.stream, on_close, sent_at),
+            extensions=response.extensions,
+        )
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        cassette: Cassette,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.cassette = cassette
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        sent_at = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        headers_at = time.monotonic() - sent_at
+
+        def on_close(chunks: list[tuple[float, bytes]]):
+            self.cassette.add(make_interaction(request, response, headers_at, chunks))
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=AsyncRecordingStream(response.stream, on_close, sent_at),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ReplayStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, interaction: Interaction, speed: float):
+        self.interaction = interaction
+        self.speed = speed
+
+    def get_delays(self) -> Iterator[tuple[float, bytes]]:
+        previous = self.interaction.headers_at
+        for at, data in self.interaction.get_chunks():
+            delay = (at - previous) / self.speed if self.speed else 0.0
+            previous = max(previous, at)
+            yield delay, data
+
+    def __iter__(self) -> Iterator[bytes]:
+        for delay, data in self.get_delays():
+            if delay > 0:
+                time.sleep(delay)
+            yield data
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for delay, data in self.get_delays():
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield data
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    # Serves recorded interactions instead of going to the network, for both
+    # httpx.Client and httpx.AsyncClient. Timing is reproduced divided by
+    # `speed` (2.0 replays twice as fast, 0 without any delay).
+    #
+    # match="request" looks responses up by method, path and request body,
+    # match="path" by method, path and whether the request streams, so that
+    # any request to an endpoint gets a recorded response of the right kind,
+    # e.g. in load tests whose prompts differ from the recording. Repeated
+    # matches cycle through the recorded responses in order.
+    def __init__(
+        self, cassette: Cassette, speed: float = 1.0, match: MatchMode = "request"
+    ):
+        self.cassette = cassette
+        self.speed = speed
+        self.match = match
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, int] = defaultdict(int)
+        self._index: dict[tuple, list[Interaction]] = defaultdict(list)
+        for interaction in cassette.interactions:
+            self._index[self._get_key(interaction)].append(interaction)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        interaction = self._find(request)
+        if self.speed and interaction.headers_at:
+            time.sleep(interaction.headers_at / self.speed)
+        return self._build_response(interaction)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        interaction = self._find(request)
+        if self.speed and interaction.headers_at:
+            await asyncio.sleep(interaction.headers_at / self.speed)
+        return self._build_response(interaction)
+
+    def _get_key(self, interaction: Interaction | httpx.Request) -> tuple:
+        if isinstance(interaction, httpx.Request):
+            method, path = interaction.method, get_request_path(interaction)
+            if self.match == "path":
+                return (method, path, get_request_stream(interaction))
+            return (method, path, get_request_hash(interaction))
+        if self.match == "path":
+            return (interaction.method, interaction.path, interaction.stream)
+        return (interaction.method, interaction.path, interaction.request_hash)
+
+    def _find(self, request: httpx.Request) -> Interaction:
+        key = self._get_key(request)
+        interactions = self._index.get(key)
+        if not interactions:
+            raise CassetteMissError(request.method, get_request_path(request))
+
+        with self._lock:
+            index = self._counters[key]
+            self._counters[key] += 1
+        return interactions[index % len(interactions)]
+
+    def _build_response(self, interaction: Interaction) -> httpx.Response:
+        return httpx.Response(
+            interaction.status,
+            headers=interaction.headers,
+            stream=ReplayStream(interaction, self.speed),
+        )
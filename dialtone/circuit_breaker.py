@@ -0,0 +1,304 @@
+import threading
+import time
+import httpx
+from collections import deque
+from typing import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Generator,
+    Literal,
+    Optional,
+    TypeVar,
+)
+from pydantic import BaseModel
+from dialtone.errors import (
+    APIError,
+    BadGatewayError,
+    CircuitOpenError,
+    InternalServerError,
+    ServiceUnavailableError,
+)
+from dialtone.types import LLM, ChatCompletionChunk, Provider, RouterModelConfig
+
+T = TypeVar("T")
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+DEFAULT_FAILURE_ERRORS: tuple[type[Exception], ...] = (
+    InternalServerError,
+    BadGatewayError,
+    ServiceUnavailableError,
+    httpx.TransportError,
+)
+
+
+class CircuitBreakerStats(BaseModel):
+    # Times any circuit went from closed or half-open to open
+    opened: int = 0
+    # Times a half-open circuit closed again after a successful probe
+    closed: int = 0
+    # Calls rejected because their endpoint circuit was open
+    rejected: int = 0
+    # Requests sent with at least one model excluded by an open circuit
+    excluded: int = 0
+
+
+class Circuit:
+    def __init__(self, window: int):
+        self.state: CircuitState = "closed"
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+
+
+class CircuitBreaker:
+    # Tracks the failure rate of each endpoint and of each model/provider pair.
+    # Errors that carry a model and provider in their router details count
+    # against that pair rather than the endpoint, which did respond. A circuit
+    # opens once at least `min_requests` of the last `window` outcomes were
+    # recorded and the failure ratio reaches `failure_threshold`.
+    #
+    # Calls to an endpoint with an open circuit fail fast with
+    # CircuitOpenError. Providers with an open circuit are removed from their
+    # model's provider lists in subsequent requests, and a model with no
+    # provider left is added to exclude_models instead. After `recovery_timeout`
+    # seconds the circuit is half-open and lets one probe through: a success
+    # closes it, a failure opens it again. A probe that never reports back
+    # (e.g. the router picked another model) expires after another
+    # `recovery_timeout`.
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        min_requests: int = 5,
+        window: int = 20,
+        recovery_timeout: float = 30.0,
+        failure_errors: tuple[type[Exception], ...] = DEFAULT_FAILURE_ERRORS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.recovery_timeout = recovery_timeout
+        self.failure_errors = failure_errors
+        self.stats = CircuitBreakerStats()
+
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, Circuit] = {}
+        self._models: dict[tuple[LLM, Provider], Circuit] = {}
+
+    def get_state(self, endpoint: str) -> CircuitState:
+        circuit = self._endpoints.get(endpoint)
+        return circuit.state if circuit else "closed"
+
+    def get_model_state(self, model: LLM, provider: Provider) -> CircuitState:
+        circuit = self._models.get((model, provider))
+        return circuit.state if circuit else "closed"
+
+    def call(self, endpoint: str, fn: Callable[[], T]) -> T:
+        self._before_call(endpoint)
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_error(endpoint, e)
+            raise
+        self.record_success(endpoint)
+        return result
+
+    async def call_async(self, endpoint: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self._before_call(endpoint)
+        try:
+            result = await fn()
+        except Exception as e:
+            self.record_error(endpoint, e)
+            raise
+        self.record_success(endpoint)
+        return result
+
+    def stream(
+        self, endpoint: str, start: Callable[[], Generator[bytes, None, None]]
+    ) -> Generator[bytes, None, None]:
+        self._before_call(endpoint)
+        try:
+            events = start()
+            first = next(events, None)
+        except Exception as e:
+            self.record_error(endpoint, e)
+            raise
+        self.record_success(endpoint)
+        if first is not None:
+            yield first
+            yield from events
+
+    async def stream_async(
+        self, endpoint: str, start: Callable[[], AsyncGenerator[bytes, None]]
+    ) -> AsyncGenerator[bytes, None]:
+        self._before_call(endpoint)
+        try:
+            events = start()
+            first = await anext(events, None)
+        except Exception as e:
+            self.record_error(endpoint, e)
+            raise
+        self.record_success(endpoint)
+        if first is not None:
+            yield first
+            async for event in events:
+                yield event
+
+    # Models to exclude from the next request, and the provider lists to use
+    # for models that only some open circuits apply to, by RouterModelConfig
+    # field. A model is excluded once none of the providers that could serve
+    # the request (by its config and whether the request has tools) is left.
+    # Half-open pairs are left out for one request at a time so that it can
+    # act as the probe.
+    def get_exclusions(
+        self,
+        router_model_config: Optional[RouterModelConfig] = None,
+        tools: bool = False,
+    ) -> tuple[list[LLM], dict[str, dict[str, list[Provider]]]]:
+        now = time.monotonic()
+        excluded: dict[LLM, set[Provider]] = {}
+        with self._lock:
+            for (model, provider), circuit in self._models.items():
+                if not self._allow(circuit, now):
+                    excluded.setdefault(model, set()).add(provider)
+            if excluded:
+                self.stats.excluded += 1
+        if not excluded:
+            return [], {}
+
+        router_model_config = router_model_config or RouterModelConfig()
+        exclude_models: list[LLM] = []
+        model_providers: dict[str, dict[str, list[Provider]]] = {}
+        for model, providers in excluded.items():
+            field = LLM(model).name
+            model_config = getattr(router_model_config, field, None)
+            if model_config is None:
+                exclude_models.append(model)
+                continue
+
+            provider_lists = {
+                name: [provider for provider in value if provider not in providers]
+                for name, value in model_config
+            }
+            if "providers" in provider_lists:
+                allowed = provider_lists["providers"]
+            elif tools:
+                allowed = provider_lists["tools_providers"]
+            else:
+                allowed = provider_lists["no_tools_providers"]
+            if allowed:
+                model_providers[field] = provider_lists
+            else:
+                exclude_models.append(model)
+        return sorted(exclude_models), model_providers
+
+    def record_success(self, endpoint: str):
+        with self._lock:
+            self._record(self._endpoint_circuit(endpoint), True)
+
+    def record_error(self, endpoint: str, error: Exception):
+        failed = isinstance(error, self.failure_errors)
+        details = error.router_details if isinstance(error, APIError) else None
+        with self._lock:
+            if details and details.model is not None and details.provider is not None:
+                # The endpoint worked and reported a failing provider
+                if failed:
+                    self._record(
+                        self._model_circuit(details.model, details.provider), False
+                    )
+                failed = False
+            # Any error that isn't a failure still means the endpoint responded
+            self._record(self._endpoint_circuit(endpoint), not failed)
+
+    def record_model_success(self, model: LLM, provider: Provider):
+        with self._lock:
+            self._record(self._model_circuit(model, provider), True)
+
+    def _before_call(self, endpoint: str):
+        with self._lock:
+            circuit = self._endpoints.get(endpoint)
+            if circuit is not None and not self._allow(circuit, time.monotonic()):
+                self.stats.rejected += 1
+                raise CircuitOpenError(endpoint)
+
+    def _endpoint_circuit(self, endpoint: str) -> Circuit:
+        return self._endpoints.setdefault(endpoint, Circuit(self.window))
+
+    def _model_circuit(self, model: LLM, provider: Provider) -> Circuit:
+        return self._models.setdefault((model, provider), Circuit(self.window))
+
+    def _allow(self, circuit: Circuit, now: float) -> bool:
+        if circuit.state == "closed":
+            return True
+        if circuit.state == "open":
+            if now - circuit.opened_at < self.recovery_timeout:
+                return False
+            circuit.state = "half_open"
+        elif (
+            circuit.probe_started_at is not None
+            and now - circuit.probe_started_at < self.recovery_timeout
+        ):
+            return False
+        circuit.probe_started_at = now
+        return True
+
+    def _record(self, circuit: Circuit, success: bool):
+        if circuit.state == "half_open":
+            if success:
+                circuit.state = "closed"
+                circuit.outcomes.clear()
+                self.stats.closed += 1
+            else:
+                self._open(circuit)
+            return
+
+        circuit.outcomes.append(success)
+        if circuit.state == "closed" and len(circuit.outcomes) >= self.min_requests:
+            failures = circuit.outcomes.count(False)
+            if failures / len(circuit.outcomes) >= self.failure_threshold:
+                self._open(circuit)
+
+    def _open(self, circuit: Circuit):
+        circuit.state = "open"
+        circuit.opened_at = time.monotonic()
+        circuit.probe_started_at = None
+        circuit.outcomes.clear()
+        self.stats.opened += 1
+
+
+# Reports the model/provider serving a stream, taken from the first chunk
+# that carries it, as a success to the circuit breaker.
+def record_stream_model(
+    generator: Generator[ChatCompletionChunk | dict, None, None],
+    circuit_breaker: CircuitBreaker,
+) -> Generator[ChatCompletionChunk | dict, None, None]:
+    recorded = False
+    for chunk in generator:
+        if not recorded:
+            recorded = _record_chunk_model(chunk, circuit_breaker)
+        yield chunk
+
+
+async def record_stream_model_async(
+    generator: AsyncGenerator[ChatCompletionChunk | dict, None],
+    circuit_breaker: CircuitBreaker,
+) -> AsyncGenerator[ChatCompletionChunk | dict, None]:
+    recorded = False
+    async for chunk in generator:
+        if not recorded:
+            recorded = _record_chunk_model(chunk, circuit_breaker)
+        yield chunk
+
+
+def _record_chunk_model(
+    chunk: ChatCompletionChunk | dict, circuit_breaker: CircuitBreaker
+) -> bool:
+    if isinstance(chunk, dict):
+        model, provider = chunk.get("model"), chunk.get("provider")
+    else:
+        model, provider = chunk.model, chunk.provider
+    if model is None or provider is None:
+        return False
+    circuit_breaker.record_model_success(LLM(model), Provider(provider))
+    return True
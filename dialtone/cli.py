@@ -0,0 +1,163 @@
+import argparse
+import os
+import sys
+import time
+from typing import Any, Generator, Optional
+from dialtone.dialtone.dialtone import Dialtone
+from dialtone.rate_limit import RateLimiter
+from dialtone.types import BatchResult
+from dialtone.utils import json_backend
+from dialtone.config import DEFAULT_BASE_URL, DEFAULT_BATCH_CONCURRENCY
+
+
+def read_requests(path: str, skip: int) -> Generator[bytes, None, None]:
+    # Streams the input one line at a time so memory stays constant. Lines
+    # are decoded by the batch, so a malformed one only fails its own request.
+    with open(path, "rb") as f:
+        requests = (line for line in f if line.strip())
+        for index, line in enumerate(requests):
+            if index >= skip:
+                yield line
+
+
+def count_completed(path: str) -> int:
+    # The output is written in input order, so the number of complete lines
+    # is the checkpoint. A torn last line from a crash is truncated.
+    if not os.path.exists(path):
+        return 0
+
+    completed = 0
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            completed += 1
+            valid_bytes += len(line)
+
+    if valid_bytes != os.path.getsize(path):
+        with open(path, "rb+") as f:
+            f.truncate(valid_bytes)
+
+    return completed
+
+
+def format_result(result: BatchResult, offset: int) -> bytes:
+    line: dict[str, Any] = {"index": result.index + offset}
+    if result.error is not None:
+        line["error"] = {
+            "type": type(result.error).__name__,
+            "message": str(result.error),
+        }
+    else:
+        line["response"] = result.response.model_dump(mode="json")
+    return json_backend.dumps(line) + b"\n"
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    config: dict[str, Any] = {}
+    if args.config:
+        with open(args.config, "rb") as f:
+            config = json_backend.loads(f.read())
+
+    api_key = (
+        args.api_key or config.pop("api_key", None) or os.getenv("DIALTONE_API_KEY")
+    )
+    if not api_key:
+        print("Error: Pass --api-key or set DIALTONE_API_KEY", file=sys.stderr)
+        return 2
+
+    if "provider_config" not in config:
+        print("Error: Pass --config with a provider_config", file=sys.stderr)
+        return 2
+
+    if args.overwrite and os.path.exists(args.output):
+        os.remove(args.output)
+    completed = count_completed(args.output)
+    if completed:
+        print(f"Resuming after {completed} completed requests", file=sys.stderr)
+
+    # Flags override the same keys in the config file.
+    if args.base_url is not None:
+        config["base_url"] = args.base_url
+    if args.requests_per_second or args.tokens_per_minute:
+        config["rate_limiter"] = RateLimiter(
+            requests_per_second=args.requests_per_second,
+            tokens_per_minute=args.tokens_per_minute,
+            # Spread requests evenly rather than front-loading a burst.
+            burst=1,
+        )
+
+    succeeded = failed = 0
+    started = time.monotonic()
+    dialtone = Dialtone(api_key=api_key, **config)
+    with dialtone, open(args.output, "ab") as output:
+        for result in dialtone.chat.completions.batch(
+            read_requests(args.input, skip=completed),
+            max_concurrency=args.concurrency,
+            ordered=True,
+        ):
+            output.write(format_result(result, offset=completed))
+            output.flush()
+
+            if result.error is None:
+                succeeded += 1
+            else:
+                failed += 1
+            if args.progress and (succeeded + failed) % args.progress == 0:
+                elapsed = time.monotonic() - started
+                print(
+                    f"{succeeded + failed} done ({failed} failed), "
+                    f"{(succeeded + failed) / elapsed:.1f} req/s",
+                    file=sys.stderr,
+                )
+
+    print(f"Finished: {succeeded} succeeded, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m dialtone")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser(
+        "batch",
+        help="Run a JSONL file of chat completion requests",
+        description=(
+            "Each input line is a JSON list of messages or an object with "
+            "'messages' and optional 'tools'. Results are appended to OUTPUT "
+            "in input order, so rerunning the same command resumes after the "
+            "last completed line."
+        ),
+    )
+    batch.add_argument("input", help="Input JSONL file")
+    batch.add_argument("output", help="Output JSONL file")
+    batch.add_argument(
+        "--config",
+        help="JSON file with Dialtone arguments (provider_config, dials, ...)",
+    )
+    batch.add_argument("--api-key", help="Defaults to $DIALTONE_API_KEY")
+    batch.add_argument("--base-url", help=f"Defaults to {DEFAULT_BASE_URL}")
+    batch.add_argument(
+        "--concurrency", type=positive_int, default=DEFAULT_BATCH_CONCURRENCY
+    )
+    batch.add_argument("--requests-per-second", type=float)
+    batch.add_argument("--tokens-per-minute", type=float)
+    batch.add_argument(
+        "--overwrite", action="store_true", help="Start over instead of resuming"
+    )
+    batch.add_argument(
+        "--progress", type=int, default=1000, help="Report every N results (0 = off)"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        return run_batch(args)
+    return 2
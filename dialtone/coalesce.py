@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Awaitable, Callable, Optional, TypeVar
+from pydantic import BaseModel
+from dialtone.errors import DeadlineExceededError
+
+T = TypeVar("T")
+
+
+class CoalescerStats(BaseModel):
+    # Upstream calls actually made
+    calls: int = 0
+    # Calls that joined an identical in-flight call instead
+    coalesced: int = 0
+
+
+class RequestCoalescer:
+    # Single-flight: identical requests issued while one is already in flight
+    # wait for it and receive the very same result object (or exception)
+    # instead of going to the network again. Only non-streaming calls are
+    # coalesced. A caller that joins an in-flight call stops waiting for it at
+    # its own `deadline` (an absolute time.monotonic() value).
+    def __init__(self):
+        self.stats = CoalescerStats()
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self._inflight_async: dict[str, asyncio.Task] = {}
+
+    def run(self, key: str, fn: Callable[[], T], deadline: Optional[float] = None) -> T:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.stats.calls += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            if deadline is not None:
+                done, _ = wait([future], timeout=max(0.0, deadline - time.monotonic()))
+                if not done:
+                    raise DeadlineExceededError()
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    async def run_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        deadline: Optional[float] = None,
+    ) -> T:
+        task = self._inflight_async.get(key)
+        if task is None:
+            # The upstream call runs as its own task so that cancelling any
+            # one awaiter (including the first) does not cancel the others.
+            task = asyncio.ensure_future(fn())
+            self._inflight_async[key] = task
+            task.add_done_callback(lambda _: self._inflight_async.pop(key, None))
+            self.stats.calls += 1
+        else:
+            self.stats.coalesced += 1
+
+        if deadline is None:
+            return await asyncio.shield(task)
+
+        # Unlike wait_for, wait does not cancel the task when it times out.
+        done, _ = await asyncio.wait(
+            [task], timeout=max(0.0, deadline - time.monotonic())
+        )
+        if not done:
+            raise DeadlineExceededError()
+        return task.result()
@@ -3,3 +3,13 @@ DEFAULT_BASE_URL = "https://dialtone-app.fly.dev"
 API_VERSION = "v0"
 
 DEFAULT_REQUEST_TIMEOUT = 120
+
+DEFAULT_ROUTE_TIMEOUT = 15
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+
+DEFAULT_KEEPALIVE_EXPIRY = 5.0
+
+DEFAULT_BATCH_CONCURRENCY = 16
@@ -0,0 +1,157 @@
+import httpx
+from concurrent.futures import Future
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+)
+from dialtone.stream import ChatCompletionAccumulator
+from dialtone.types import (
+    ChatCompletion,
+    ChatCompletionChunk,
+    ChatMessage,
+    RouteDecision,
+    Tool,
+)
+from dialtone.utils import json_backend
+from dialtone.utils.prepare_payload import prepare_chat_message
+
+if TYPE_CHECKING:
+    from dialtone.dialtone.dialtone import Completions
+    from dialtone.dialtone.async_dialtone import Completions as AsyncCompletions
+
+
+# History of a multi-turn chat. Messages are validated and encoded once when
+# they are added, so that each turn only pays for its new messages instead of
+# re-casting and re-serializing the whole history. Messages must not be
+# mutated after they are added.
+#
+# Can be passed as messages to completions.create and chat.route, or bound to
+# a client with chat.conversation(), whose create() also appends the response.
+class Conversation:
+    def __init__(
+        self,
+        messages: Iterable[ChatMessage | dict[str, Any]] = (),
+        completions: Optional["Completions"] = None,
+    ):
+        self.completions = completions
+        self.messages: list[ChatMessage] = []
+        self._encoded: list[bytes] = []
+        self._content: Optional[bytes] = None
+        self.extend(messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        return iter(self.messages)
+
+    def __getitem__(self, index: int) -> ChatMessage:
+        return self.messages[index]
+
+    def append(self, message: ChatMessage | dict[str, Any]) -> ChatMessage:
+        if isinstance(message, dict):
+            message = ChatMessage(**message)
+        elif not isinstance(message, ChatMessage):
+            raise ValueError("Error: Messages must be a list of ChatMessage or dicts")
+
+        self.messages.append(message)
+        self._encoded.append(json_backend.dumps(prepare_chat_message(message)))
+        self._content = None
+        return message
+
+    def extend(self, messages: Iterable[ChatMessage | dict[str, Any]]):
+        for message in messages:
+            self.append(message)
+
+    def add_completion(self, completion: ChatCompletion) -> ChatMessage:
+        return self.append(completion.choices[0].message)
+
+    # A snapshot sharing the already encoded messages
+    def copy(self) -> "Conversation":
+        conversation = self.__class__(completions=self.completions)
+        conversation.messages = list(self.messages)
+        conversation._encoded = list(self._encoded)
+        conversation._content = self._content
+        return conversation
+
+    # The messages as a JSON array, spliced into request payloads as is
+    def encode(self) -> bytes:
+        if self._content is None:
+            self._content = b"[" + b",".join(self._encoded) + b"]"
+        return self._content
+
+    def create(
+        self,
+        tools: list[Tool] | list[dict[str, Any]] = [],
+        stream: bool = False,
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
+        route: RouteDecision | Future[RouteDecision] | None = None,
+    ):
+        if self.completions is None:
+            raise ValueError("Error: Conversation is not bound to a client")
+
+        response = self.completions.create(
+            messages=self,
+            tools=tools,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            route=route,
+        )
+        if isinstance(response, ChatCompletion):
+            self.add_completion(response)
+            return response
+        return self._record_stream(response)
+
+    def _record_stream(
+        self, chunks: Iterable[ChatCompletionChunk | dict]
+    ) -> Generator[ChatCompletionChunk | dict, None, None]:
+        accumulator = ChatCompletionAccumulator()
+        for chunk in chunks:
+            accumulator.add(chunk)
+            yield chunk
+        self.add_completion(accumulator.get_completion())
+
+
+class AsyncConversation(Conversation):
+    completions: Optional["AsyncCompletions"]
+
+    async def create(
+        self,
+        tools: list[Tool] | list[dict[str, Any]] = [],
+        stream: bool = False,
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
+        route: RouteDecision | Awaitable[RouteDecision] | None = None,
+    ):
+        if self.completions is None:
+            raise ValueError("Error: Conversation is not bound to a client")
+
+        response = await self.completions.create(
+            messages=self,
+            tools=tools,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            route=route,
+        )
+        if isinstance(response, ChatCompletion):
+            self.add_completion(response)
+            return response
+        return self._record_stream_async(response)
+
+    async def _record_stream_async(
+        self, chunks: AsyncGenerator[ChatCompletionChunk | dict, None]
+    ) -> AsyncGenerator[ChatCompletionChunk | dict, None]:
+        accumulator = ChatCompletionAccumulator()
+        async for chunk in chunks:
+            accumulator.add(chunk)
+            yield chunk
+        self.add_completion(accumulator.get_completion())
@@ -1,7 +1,12 @@
-from typing import Any
-from pydantic import BaseModel
+import asyncio
+import httpx
+import time
+from functools import partial
+from typing import Any, AsyncGenerator, Awaitable, Iterable, Optional
+from pydantic import BaseModel, ConfigDict
 from dialtone.types import (
-    ChatCompletionChunk,
+    BatchRequest,
+    BatchResult,
     FallbackConfig,
     ProviderConfig,
     RouterModelConfig,
@@ -10,36 +15,107 @@ from dialtone.types import (
     Tool,
     DialtoneClient,
     Dials,
+    HTTPConfig,
     RouteDecision,
+    StreamConfig,
     ToolsConfig,
 )
 from dialtone.dialtone.dialtone_base import DialtoneBase
+from dialtone.errors import DeadlineExceededError
+from dialtone.coalesce import RequestCoalescer
+from dialtone.conversation import AsyncConversation, Conversation
+from dialtone.rate_limit import RateLimiter, record_stream_usage_async
+from dialtone.retry import RetryPolicy
+from dialtone.hedge import HedgePolicy
+from dialtone.circuit_breaker import CircuitBreaker, record_stream_model_async
+from dialtone.metrics import (
+    MetricsHook,
+    RequestMetrics,
+    start_request,
+    observe,
+    observe_async,
+    observe_stream_async,
+)
+from dialtone.cache import (
+    ResponseCache,
+    cache_stream_async,
+    get_cache_key,
+    replay_stream_async,
+)
 from dialtone.utils.api import (
-    convert_dict_to_type_stream_async,
+    create_async_http_client,
+    get_request_timeout,
     dialtone_post_request_async,
     dialtone_streaming_post_request_async,
+    parse_chunk_stream_async,
+)
+from dialtone.utils.prepare_payload import (
+    prepare_batch_request,
+    prepare_chat_completion,
+    prepare_chat_route,
 )
-from dialtone.utils.prepare_payload import prepare_chat_completion, prepare_chat_route
-from dialtone.config import DEFAULT_BASE_URL, API_VERSION
+from dialtone.utils import json_backend
+from dialtone.config import DEFAULT_BASE_URL, DEFAULT_BATCH_CONCURRENCY, API_VERSION
+
+
+# A prefetched route that failed is dropped, leaving routing to the
+# completion request itself
+async def wait_for_route(
+    route: Awaitable[RouteDecision], deadline: Optional[float] = None
+) -> Optional[RouteDecision]:
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    route = asyncio.ensure_future(route)
+    try:
+        # Shielded so that timing out doesn't cancel a task shared with others
+        return await asyncio.wait_for(asyncio.shield(route), timeout)
+    except TimeoutError:
+        if not route.done():
+            raise DeadlineExceededError()
+        return None
+    except Exception:
+        return None
 
 
 class Completions(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     client: DialtoneClient
+    http_client: httpx.AsyncClient
+    cache: Optional[ResponseCache] = None
+    coalescer: Optional[RequestCoalescer] = None
+    rate_limiter: Optional[RateLimiter] = None
+    retry_policy: Optional[RetryPolicy] = None
+    hedge_policy: Optional[HedgePolicy] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hooks: list[MetricsHook] = []
 
     async def create(
         self,
-        messages: list[ChatMessage] | list[dict],
+        messages: list[ChatMessage] | list[dict[str, Any]] | Conversation,
         tools: list[Tool] | list[dict] = [],
         stream: bool = False,
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
+        route: RouteDecision | Awaitable[RouteDecision] | None = None,
     ):
-        # validate inputs
-        if stream and len(tools) > 0:
-            raise ValueError(
-                "Error: Streaming with tools is not supported by Dialtone yet. Either set stream to False or omit tools."
-            )
+        # deadline is a budget in seconds for the whole call, including
+        # retries and rate limiting
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        request_timeout = get_request_timeout(self.client.http_config, timeout)
+        metrics = (
+            RequestMetrics(endpoint="chat/completions", stream=stream)
+            if self.hooks
+            else None
+        )
 
-        # validate and cast messages
-        if all(isinstance(message, dict) for message in messages):
+        # validate and cast messages. A Conversation's messages were validated
+        # and encoded as they were added.
+        encoded_messages = (
+            messages.encode() if isinstance(messages, Conversation) else None
+        )
+        if encoded_messages is None and all(
+            isinstance(message, dict) for message in messages
+        ):
             messagesLength = len(messages)
             messages = [
                 ChatMessage(**message)
@@ -58,62 +134,387 @@ class Completions(BaseModel):
             if len(tools) != toolsLength:
                 raise ValueError("Error: Tools must be a list of Tool or dicts")
 
-        headers, params = prepare_chat_completion(
-            messages=messages, stream=stream, tools=tools, client=self.client
+        exclude_models, model_providers = (
+            self.circuit_breaker.get_exclusions(
+                self.client.router_model_config, tools=bool(tools)
+            )
+            if self.circuit_breaker
+            else ([], {})
         )
+        # A route decided ahead of time, e.g. by Chat.prefetch_route, pins the
+        # request to its model unless the circuit breaker has excluded it
+        if route is not None and not isinstance(route, RouteDecision):
+            route = await wait_for_route(route, deadline_at)
+        include_models = (
+            [route.model]
+            if route is not None and route.model not in exclude_models
+            else []
+        )
+        payload_started_at = time.monotonic()
+        headers, content = prepare_chat_completion(
+            messages=messages,
+            stream=stream,
+            tools=tools,
+            exclude_models=exclude_models,
+            include_models=include_models,
+            encoded_messages=encoded_messages,
+            model_providers=model_providers,
+            client=self.client,
+        )
+        if metrics is not None:
+            metrics.payload_seconds = time.monotonic() - payload_started_at
+            start_request(metrics, self.hooks, headers)
+
+        url = f"{self.client.base_url}/{API_VERSION}/chat/completions"
+        cache_key = (
+            get_cache_key(url, content) if self.cache or self.coalescer else None
+        )
+        cached = self.cache.get(cache_key) if self.cache else None
+
+        chunk_format = self.client.stream_config.chunk_format
+        if stream and cached is not None:
+            chunks = parse_chunk_stream_async(replay_stream_async(cached), chunk_format)
+            if metrics is not None:
+                metrics.cached = True
+                chunks = observe_stream_async(chunks, metrics, self.hooks)
+            return chunks
 
         if stream:
-            return convert_dict_to_type_stream_async(
-                dialtone_streaming_post_request_async(
-                    url=f"{self.client.base_url}/{API_VERSION}/chat/completions",
-                    data=params,
-                    headers=headers,
-                ),
-                ChatCompletionChunk,
+            start = partial(
+                dialtone_streaming_post_request_async,
+                http_client=self.http_client,
+                url=url,
+                content=content,
+                headers=headers,
+                timeout=request_timeout,
+                deadline=deadline_at,
+                idle_timeout=self.client.stream_config.idle_timeout,
+                metrics=metrics,
             )
+            if self.rate_limiter:
+                start = partial(
+                    self.rate_limiter.stream_async, start, deadline=deadline_at
+                )
+            if self.circuit_breaker:
+                start = partial(
+                    self.circuit_breaker.stream_async, "chat/completions", start
+                )
+            if self.retry_policy:
+                start = partial(
+                    self.retry_policy.stream_async, start, deadline=deadline_at
+                )
 
-        response_json = await dialtone_post_request_async(
-            url=f"{self.client.base_url}/{API_VERSION}/chat/completions",
-            data=params,
-            headers=headers,
-        )
+            events = start()
+            if self.cache:
+                events = cache_stream_async(events, self.cache, cache_key)
 
-        return ChatCompletion(**response_json)
+            chunks = parse_chunk_stream_async(events, chunk_format)
+            if self.rate_limiter:
+                chunks = record_stream_usage_async(chunks, self.rate_limiter)
+            if self.circuit_breaker:
+                chunks = record_stream_model_async(chunks, self.circuit_breaker)
+            if metrics is not None:
+                chunks = observe_stream_async(chunks, metrics, self.hooks)
+
+            return chunks
+
+        if cached is not None:
+            if metrics is not None:
+                metrics.cached = True
+            return observe(
+                partial(ChatCompletion.model_validate_json, cached),
+                metrics,
+                self.hooks,
+            )
+
+        # One attempt at the request. A hedged request makes two at once,
+        # each recording into its own metrics.
+        async def attempt(metrics: Optional[RequestMetrics]) -> dict:
+            send = partial(
+                dialtone_post_request_async,
+                http_client=self.http_client,
+                url=url,
+                content=content,
+                headers=headers,
+                timeout=request_timeout,
+                deadline=deadline_at,
+                metrics=metrics,
+            )
+            if self.rate_limiter:
+                send = partial(self.rate_limiter.call_async, send, deadline=deadline_at)
+            if self.circuit_breaker:
+                send = partial(
+                    self.circuit_breaker.call_async, "chat/completions", send
+                )
+            return await send()
+
+        async def request() -> ChatCompletion:
+            send = partial(attempt, metrics)
+            if self.hedge_policy:
+                send = partial(self.hedge_policy.call_async, attempt, metrics)
+            if self.retry_policy:
+                send = partial(self.retry_policy.call_async, send, deadline=deadline_at)
+
+            response_json = await send()
+            if self.cache:
+                self.cache.set(cache_key, json_backend.dumps(response_json))
+
+            chat_completion = ChatCompletion(**response_json)
+            if self.rate_limiter:
+                self.rate_limiter.record_usage(chat_completion.usage)
+            if self.circuit_breaker:
+                self.circuit_breaker.record_model_success(
+                    chat_completion.model, chat_completion.provider
+                )
+
+            return chat_completion
+
+        if self.coalescer:
+            request = partial(
+                self.coalescer.run_async, cache_key, request, deadline=deadline_at
+            )
+
+        return await observe_async(request, metrics, self.hooks)
+
+    async def batch(
+        self,
+        requests: Iterable[BatchRequest | dict[str, Any] | list | bytes],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        ordered: bool = False,
+    ) -> AsyncGenerator[BatchResult, None]:
+        # Requests are pulled lazily from the iterable and run concurrently
+        # over this client's connection pool. Each request is either a
+        # BatchRequest, a dict of BatchRequest fields, a list of messages or
+        # the JSON encoding of one, which is decoded as part of the request.
+        # Failures are reported on the BatchResult instead of aborting the batch.
+        # With ordered=True, results that finish early are held back, and
+        # in-flight plus held-back requests are capped at max_concurrency.
+        if max_concurrency < 1:
+            raise ValueError("Error: max_concurrency must be at least 1")
+
+        requests = enumerate(requests)
+        pending: set[asyncio.Task] = set()
+        finished: dict[int, BatchResult] = {}
+        next_index = 0
+        exhausted = False
+
+        async def run(
+            index: int, request: BatchRequest | dict[str, Any] | list | bytes
+        ):
+            try:
+                request = prepare_batch_request(request)
+                response = await self.create(
+                    messages=request.messages, tools=request.tools
+                )
+                return BatchResult(index=index, response=response)
+            except Exception as e:
+                return BatchResult(index=index, error=e)
+
+        try:
+            while True:
+                while not exhausted and len(pending) + len(finished) < max_concurrency:
+                    try:
+                        index, request = next(requests)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(run(index, request)))
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result: BatchResult = task.result()
+                    if not ordered:
+                        yield result
+                        continue
+
+                    finished[result.index] = result
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+        finally:
+            for task in pending:
+                task.cancel()
 
 
 class Chat(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     client: DialtoneClient
+    http_client: httpx.AsyncClient
     completions: Completions
+    route_cache: Optional[ResponseCache] = None
+    coalescer: Optional[RequestCoalescer] = None
+    rate_limiter: Optional[RateLimiter] = None
+    retry_policy: Optional[RetryPolicy] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hooks: list[MetricsHook] = []
+
+    def __init__(
+        self,
+        client: DialtoneClient,
+        http_client: httpx.AsyncClient,
+        cache: Optional[ResponseCache] = None,
+        route_cache: Optional[ResponseCache] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hooks: Optional[list[MetricsHook]] = None,
+    ):
+        completions = Completions(
+            client=client,
+            http_client=http_client,
+            cache=cache,
+            coalescer=coalescer,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            hedge_policy=hedge_policy,
+            circuit_breaker=circuit_breaker,
+            hooks=hooks or [],
+        )
+        super().__init__(
+            client=client,
+            http_client=http_client,
+            completions=completions,
+            route_cache=route_cache,
+            coalescer=coalescer,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            hooks=hooks or [],
+        )
 
-    def __init__(self, client: DialtoneClient):
-        completions = Completions(client=client)
-        super().__init__(client=client, completions=completions)
+    def conversation(
+        self, messages: Iterable[ChatMessage | dict[str, Any]] = ()
+    ) -> AsyncConversation:
+        return AsyncConversation(messages, completions=self.completions)
+
+    def prefetch_route(
+        self,
+        messages: list[ChatMessage] | list[dict[str, Any]] | Conversation,
+        tools: list[Tool] = [],
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
+    ) -> asyncio.Task[RouteDecision]:
+        # Starts route() as a task so that routing overlaps with the caller's
+        # own work. Pass the task to completions.create(route=...) to pin the
+        # completion to the chosen model.
+        messages = (
+            messages.copy() if isinstance(messages, Conversation) else list(messages)
+        )
+        return asyncio.ensure_future(
+            self.route(messages, list(tools), timeout, deadline)
+        )
 
     async def route(
-        self, messages: list[ChatMessage] | list[dict[str, Any]], tools: list[Tool] = []
+        self,
+        messages: list[ChatMessage] | list[dict[str, Any]] | Conversation,
+        tools: list[Tool] = [],
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
     ):
-        headers, params = prepare_chat_route(
-            messages=messages, tools=tools, client=self.client
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        request_timeout = get_request_timeout(
+            self.client.http_config, timeout, self.client.http_config.route_timeout
         )
+        metrics = RequestMetrics(endpoint="chat/route") if self.hooks else None
 
-        response_json = await dialtone_post_request_async(
-            url=f"{self.client.base_url}/{API_VERSION}/chat/route",
-            data=params,
-            headers=headers,
-            timeout=15,
+        exclude_models, model_providers = (
+            self.circuit_breaker.get_exclusions(
+                self.client.router_model_config, tools=bool(tools)
+            )
+            if self.circuit_breaker
+            else ([], {})
+        )
+        payload_started_at = time.monotonic()
+        headers, content = prepare_chat_route(
+            messages=messages,
+            tools=tools,
+            exclude_models=exclude_models,
+            encoded_messages=(
+                messages.encode() if isinstance(messages, Conversation) else None
+            ),
+            model_providers=model_providers,
+            client=self.client,
         )
+        if metrics is not None:
+            metrics.payload_seconds = time.monotonic() - payload_started_at
+            start_request(metrics, self.hooks, headers)
 
-        return RouteDecision(
-            model=response_json["model"],
-            providers=response_json["providers"],
-            quality_predictions=response_json["quality_predictions"],
-            routing_strategy=response_json["routing_strategy"],
+        url = f"{self.client.base_url}/{API_VERSION}/chat/route"
+        cache_key = (
+            get_cache_key(url, content) if self.route_cache or self.coalescer else None
         )
+        if self.route_cache:
+            cached = self.route_cache.get(cache_key)
+            if cached is not None:
+                if metrics is not None:
+                    metrics.cached = True
+                return observe(
+                    partial(RouteDecision.model_validate_json, cached),
+                    metrics,
+                    self.hooks,
+                )
+
+        async def request() -> RouteDecision:
+            send = partial(
+                dialtone_post_request_async,
+                http_client=self.http_client,
+                url=url,
+                content=content,
+                headers=headers,
+                timeout=request_timeout,
+                deadline=deadline_at,
+                metrics=metrics,
+            )
+            if self.rate_limiter:
+                send = partial(self.rate_limiter.call_async, send, deadline=deadline_at)
+            if self.circuit_breaker:
+                send = partial(self.circuit_breaker.call_async, "chat/route", send)
+            if self.retry_policy:
+                send = partial(self.retry_policy.call_async, send, deadline=deadline_at)
+
+            response_json = await send()
+            route_decision = RouteDecision(
+                model=response_json["model"],
+                providers=response_json["providers"],
+                quality_predictions=response_json["quality_predictions"],
+                routing_strategy=response_json["routing_strategy"],
+            )
+
+            if self.route_cache:
+                self.route_cache.set(
+                    cache_key, route_decision.model_dump_json().encode()
+                )
+
+            return route_decision
+
+        if self.coalescer:
+            request = partial(
+                self.coalescer.run_async, cache_key, request, deadline=deadline_at
+            )
+
+        return await observe_async(request, metrics, self.hooks)
 
 
 class AsyncDialtone(DialtoneBase):
     chat: Chat
     client: DialtoneClient
+    http_client: httpx.AsyncClient
+    cache: Optional[ResponseCache]
+    route_cache: Optional[ResponseCache]
+    coalescer: Optional[RequestCoalescer]
+    rate_limiter: Optional[RateLimiter]
+    retry_policy: Optional[RetryPolicy]
+    hedge_policy: Optional[HedgePolicy]
+    circuit_breaker: Optional[CircuitBreaker]
+    hooks: list[MetricsHook]
 
     def __init__(
         self,
@@ -123,6 +524,17 @@ class AsyncDialtone(DialtoneBase):
         router_model_config: RouterModelConfig | dict[str, Any] = RouterModelConfig(),
         fallback_config: FallbackConfig | dict[str, Any] = FallbackConfig(),
         tools_config: ToolsConfig | dict[str, Any] = ToolsConfig(),
+        http_config: HTTPConfig | dict[str, Any] = HTTPConfig(),
+        stream_config: StreamConfig | dict[str, Any] = StreamConfig(),
+        http_client: httpx.AsyncClient | None = None,
+        cache: ResponseCache | None = None,
+        route_cache: ResponseCache | None = None,
+        coalescer: RequestCoalescer | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        hooks: list[MetricsHook] | None = None,
         base_url: str = DEFAULT_BASE_URL,
     ):
         super().validate_inputs(
@@ -131,6 +543,8 @@ class AsyncDialtone(DialtoneBase):
             router_model_config=router_model_config,
             fallback_config=fallback_config,
             tools_config=tools_config,
+            http_config=http_config,
+            stream_config=stream_config,
         )
 
         if isinstance(dials, dict):
@@ -143,6 +557,10 @@ class AsyncDialtone(DialtoneBase):
             fallback_config = FallbackConfig(**fallback_config)
         if isinstance(tools_config, dict):
             tools_config = ToolsConfig(**tools_config)
+        if isinstance(http_config, dict):
+            http_config = HTTPConfig(**http_config)
+        if isinstance(stream_config, dict):
+            stream_config = StreamConfig(**stream_config)
 
         self.client = DialtoneClient(
             api_key=api_key,
@@ -151,6 +569,41 @@ class AsyncDialtone(DialtoneBase):
             router_model_config=router_model_config,
             fallback_config=fallback_config,
             tools_config=tools_config,
+            http_config=http_config,
+            stream_config=stream_config,
             base_url=base_url,
         )
-        self.chat = Chat(client=self.client)
+
+        # A caller-provided http_client is borrowed and left open on close.
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_async_http_client(http_config)
+        self.cache = cache
+        self.route_cache = route_cache
+        self.coalescer = coalescer
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        self.circuit_breaker = circuit_breaker
+        self.hooks = hooks or []
+        self.chat = Chat(
+            client=self.client,
+            http_client=self.http_client,
+            cache=cache,
+            route_cache=route_cache,
+            coalescer=coalescer,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            hedge_policy=hedge_policy,
+            circuit_breaker=circuit_breaker,
+            hooks=self.hooks,
+        )
+
+    async def aclose(self):
+        if self._owns_http_client:
+            await self.http_client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args: Any):
+        await self.aclose()
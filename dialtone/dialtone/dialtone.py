@@ -1,7 +1,13 @@
-from typing import Any
-from pydantic import BaseModel
+import httpx
+import threading
+import time
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Generator, Iterable, Optional
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from dialtone.types import (
-    ChatCompletionChunk,
+    BatchRequest,
+    BatchResult,
     FallbackConfig,
     ProviderConfig,
     RouterModelConfig,
@@ -10,36 +16,104 @@ from dialtone.types import (
     Tool,
     DialtoneClient,
     Dials,
+    HTTPConfig,
     RouteDecision,
+    StreamConfig,
     ToolsConfig,
 )
 from dialtone.dialtone.dialtone_base import DialtoneBase
+from dialtone.errors import DeadlineExceededError
+from dialtone.coalesce import RequestCoalescer
+from dialtone.conversation import Conversation
+from dialtone.rate_limit import RateLimiter, record_stream_usage
+from dialtone.retry import RetryPolicy
+from dialtone.hedge import HedgePolicy
+from dialtone.circuit_breaker import CircuitBreaker, record_stream_model
+from dialtone.metrics import (
+    MetricsHook,
+    RequestMetrics,
+    start_request,
+    observe,
+    observe_stream,
+)
+from dialtone.cache import (
+    ResponseCache,
+    cache_stream,
+    get_cache_key,
+    replay_stream,
+)
 from dialtone.utils.api import (
-    convert_dict_to_type_stream,
+    create_http_client,
+    get_request_timeout,
     dialtone_post_request,
     dialtone_streaming_post_request,
+    parse_chunk_stream,
+)
+from dialtone.utils.prepare_payload import (
+    prepare_batch_request,
+    prepare_chat_completion,
+    prepare_chat_route,
 )
-from dialtone.utils.prepare_payload import prepare_chat_completion, prepare_chat_route
-from dialtone.config import DEFAULT_BASE_URL, API_VERSION
+from dialtone.utils import json_backend
+from dialtone.config import DEFAULT_BASE_URL, DEFAULT_BATCH_CONCURRENCY, API_VERSION
+
+
+# A prefetched route that failed is dropped, leaving routing to the
+# completion request itself
+def wait_for_route(
+    route: Future[RouteDecision], deadline: Optional[float] = None
+) -> Optional[RouteDecision]:
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    try:
+        return route.result(timeout=timeout)
+    except TimeoutError:
+        if not route.done():
+            raise DeadlineExceededError()
+        return None
+    except Exception:
+        return None
 
 
 class Completions(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     client: DialtoneClient
+    http_client: httpx.Client
+    cache: Optional[ResponseCache] = None
+    coalescer: Optional[RequestCoalescer] = None
+    rate_limiter: Optional[RateLimiter] = None
+    retry_policy: Optional[RetryPolicy] = None
+    hedge_policy: Optional[HedgePolicy] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hooks: list[MetricsHook] = []
 
     def create(
         self,
-        messages: list[ChatMessage] | list[dict[str, Any]],
+        messages: list[ChatMessage] | list[dict[str, Any]] | Conversation,
         tools: list[Tool] | list[dict[str, Any]] = [],
         stream: bool = False,
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
+        route: RouteDecision | Future[RouteDecision] | None = None,
     ):
-        # validate inputs
-        if stream and len(tools) > 0:
-            raise ValueError(
-                "Error: Streaming with tools is not supported by Dialtone yet. Either set stream to False or omit tools."
-            )
+        # deadline is a budget in seconds for the whole call, including
+        # retries and rate limiting
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        request_timeout = get_request_timeout(self.client.http_config, timeout)
+        metrics = (
+            RequestMetrics(endpoint="chat/completions", stream=stream)
+            if self.hooks
+            else None
+        )
 
-        # validate and cast messages
-        if all(isinstance(message, dict) for message in messages):
+        # validate and cast messages. A Conversation's messages were validated
+        # and encoded as they were added.
+        encoded_messages = (
+            messages.encode() if isinstance(messages, Conversation) else None
+        )
+        if encoded_messages is None and all(
+            isinstance(message, dict) for message in messages
+        ):
             messagesLength = len(messages)
             messages = [
                 ChatMessage(**message)
@@ -58,62 +132,381 @@ class Completions(BaseModel):
             if len(tools) != toolsLength:
                 raise ValueError("Error: Tools must be a list of Tool or dicts")
 
-        headers, params = prepare_chat_completion(
-            messages=messages, stream=stream, tools=tools, client=self.client
+        exclude_models, model_providers = (
+            self.circuit_breaker.get_exclusions(
+                self.client.router_model_config, tools=bool(tools)
+            )
+            if self.circuit_breaker
+            else ([], {})
+        )
+        # A route decided ahead of time, e.g. by Chat.prefetch_route, pins the
+        # request to its model unless the circuit breaker has excluded it
+        if isinstance(route, Future):
+            route = wait_for_route(route, deadline_at)
+        include_models = (
+            [route.model]
+            if route is not None and route.model not in exclude_models
+            else []
+        )
+        payload_started_at = time.monotonic()
+        headers, content = prepare_chat_completion(
+            messages=messages,
+            stream=stream,
+            tools=tools,
+            exclude_models=exclude_models,
+            include_models=include_models,
+            encoded_messages=encoded_messages,
+            model_providers=model_providers,
+            client=self.client,
+        )
+        if metrics is not None:
+            metrics.payload_seconds = time.monotonic() - payload_started_at
+            start_request(metrics, self.hooks, headers)
+
+        url = f"{self.client.base_url}/{API_VERSION}/chat/completions"
+        cache_key = (
+            get_cache_key(url, content) if self.cache or self.coalescer else None
         )
+        cached = self.cache.get(cache_key) if self.cache else None
+
+        chunk_format = self.client.stream_config.chunk_format
+        if stream and cached is not None:
+            chunks = parse_chunk_stream(replay_stream(cached), chunk_format)
+            if metrics is not None:
+                metrics.cached = True
+                chunks = observe_stream(chunks, metrics, self.hooks)
+            return chunks
 
         if stream:
-            return convert_dict_to_type_stream(
-                dialtone_streaming_post_request(
-                    url=f"{self.client.base_url}/{API_VERSION}/chat/completions",
-                    data=params,
-                    headers=headers,
-                ),
-                ChatCompletionChunk,
+            start = partial(
+                dialtone_streaming_post_request,
+                http_client=self.http_client,
+                url=url,
+                content=content,
+                headers=headers,
+                timeout=request_timeout,
+                deadline=deadline_at,
+                idle_timeout=self.client.stream_config.idle_timeout,
+                metrics=metrics,
             )
+            if self.rate_limiter:
+                start = partial(self.rate_limiter.stream, start, deadline=deadline_at)
+            if self.circuit_breaker:
+                start = partial(self.circuit_breaker.stream, "chat/completions", start)
+            if self.retry_policy:
+                start = partial(self.retry_policy.stream, start, deadline=deadline_at)
 
-        response_json = dialtone_post_request(
-            url=f"{self.client.base_url}/{API_VERSION}/chat/completions",
-            data=params,
-            headers=headers,
-        )
+            events = start()
+            if self.cache:
+                events = cache_stream(events, self.cache, cache_key)
+
+            chunks = parse_chunk_stream(events, chunk_format)
+            if self.rate_limiter:
+                chunks = record_stream_usage(chunks, self.rate_limiter)
+            if self.circuit_breaker:
+                chunks = record_stream_model(chunks, self.circuit_breaker)
+            if metrics is not None:
+                chunks = observe_stream(chunks, metrics, self.hooks)
+
+            return chunks
+
+        if cached is not None:
+            if metrics is not None:
+                metrics.cached = True
+            return observe(
+                partial(ChatCompletion.model_validate_json, cached),
+                metrics,
+                self.hooks,
+            )
+
+        # One attempt at the request. A hedged request makes two at once,
+        # each recording into its own metrics.
+        def attempt(metrics: Optional[RequestMetrics]) -> dict:
+            send = partial(
+                dialtone_post_request,
+                http_client=self.http_client,
+                url=url,
+                content=content,
+                headers=headers,
+                timeout=request_timeout,
+                deadline=deadline_at,
+                metrics=metrics,
+            )
+            if self.rate_limiter:
+                send = partial(self.rate_limiter.call, send, deadline=deadline_at)
+            if self.circuit_breaker:
+                send = partial(self.circuit_breaker.call, "chat/completions", send)
+            return send()
+
+        def request() -> ChatCompletion:
+            send = partial(attempt, metrics)
+            if self.hedge_policy:
+                send = partial(self.hedge_policy.call, attempt, metrics)
+            if self.retry_policy:
+                send = partial(self.retry_policy.call, send, deadline=deadline_at)
+
+            response_json = send()
+            if self.cache:
+                self.cache.set(cache_key, json_backend.dumps(response_json))
+
+            chat_completion = ChatCompletion(**response_json)
+            if self.rate_limiter:
+                self.rate_limiter.record_usage(chat_completion.usage)
+            if self.circuit_breaker:
+                self.circuit_breaker.record_model_success(
+                    chat_completion.model, chat_completion.provider
+                )
+
+            return chat_completion
+
+        if self.coalescer:
+            request = partial(
+                self.coalescer.run, cache_key, request, deadline=deadline_at
+            )
+
+        return observe(request, metrics, self.hooks)
+
+    def batch(
+        self,
+        requests: Iterable[BatchRequest | dict[str, Any] | list | bytes],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        ordered: bool = False,
+    ) -> Generator[BatchResult, None, None]:
+        # Requests are pulled lazily from the iterable and run on a thread pool
+        # sharing this client's connection pool. Each request is either a
+        # BatchRequest, a dict of BatchRequest fields, a list of messages or
+        # the JSON encoding of one, which is decoded as part of the request.
+        # Failures are reported on the BatchResult instead of aborting the batch.
+        # With ordered=True, results that finish early are held back, and
+        # in-flight plus held-back requests are capped at max_concurrency.
+        if max_concurrency < 1:
+            raise ValueError("Error: max_concurrency must be at least 1")
+
+        requests = enumerate(requests)
+        pending: dict[Future, int] = {}
+        finished: dict[int, BatchResult] = {}
+        next_index = 0
+        exhausted = False
+
+        def run(index: int, request: BatchRequest | dict[str, Any] | list | bytes):
+            try:
+                request = prepare_batch_request(request)
+                response = self.create(messages=request.messages, tools=request.tools)
+                return BatchResult(index=index, response=response)
+            except Exception as e:
+                return BatchResult(index=index, error=e)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            while True:
+                while not exhausted and len(pending) + len(finished) < max_concurrency:
+                    try:
+                        index, request = next(requests)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(run, index, request)] = index
 
-        return ChatCompletion(**response_json)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    result: BatchResult = future.result()
+                    if not ordered:
+                        yield result
+                        continue
+
+                    finished[result.index] = result
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
 
 
 class Chat(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     client: DialtoneClient
+    http_client: httpx.Client
     completions: Completions
+    route_cache: Optional[ResponseCache] = None
+    coalescer: Optional[RequestCoalescer] = None
+    rate_limiter: Optional[RateLimiter] = None
+    retry_policy: Optional[RetryPolicy] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hooks: list[MetricsHook] = []
 
-    def __init__(self, client: DialtoneClient):
-        completions = Completions(client=client)
-        super().__init__(client=client, completions=completions)
+    _executor: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(
+        self,
+        client: DialtoneClient,
+        http_client: httpx.Client,
+        cache: Optional[ResponseCache] = None,
+        route_cache: Optional[ResponseCache] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hooks: Optional[list[MetricsHook]] = None,
+    ):
+        completions = Completions(
+            client=client,
+            http_client=http_client,
+            cache=cache,
+            coalescer=coalescer,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            hedge_policy=hedge_policy,
+            circuit_breaker=circuit_breaker,
+            hooks=hooks or [],
+        )
+        super().__init__(
+            client=client,
+            http_client=http_client,
+            completions=completions,
+            route_cache=route_cache,
+            coalescer=coalescer,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            hooks=hooks or [],
+        )
+
+    def conversation(
+        self, messages: Iterable[ChatMessage | dict[str, Any]] = ()
+    ) -> Conversation:
+        return Conversation(messages, completions=self.completions)
+
+    def prefetch_route(
+        self,
+        messages: list[ChatMessage] | list[dict[str, Any]] | Conversation,
+        tools: list[Tool] = [],
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
+    ) -> Future[RouteDecision]:
+        # Starts route() in the background so that routing overlaps with the
+        # caller's own work. Pass the future to completions.create(route=...)
+        # to pin the completion to the chosen model.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="dialtone-route")
+        messages = (
+            messages.copy() if isinstance(messages, Conversation) else list(messages)
+        )
+        return self._executor.submit(
+            self.route, messages, list(tools), timeout, deadline
+        )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
     def route(
-        self, messages: list[ChatMessage] | list[dict[str, Any]], tools: list[Tool] = []
+        self,
+        messages: list[ChatMessage] | list[dict[str, Any]] | Conversation,
+        tools: list[Tool] = [],
+        timeout: float | httpx.Timeout | None = None,
+        deadline: Optional[float] = None,
     ):
-        headers, params = prepare_chat_route(
-            messages=messages, tools=tools, client=self.client
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        request_timeout = get_request_timeout(
+            self.client.http_config, timeout, self.client.http_config.route_timeout
         )
+        metrics = RequestMetrics(endpoint="chat/route") if self.hooks else None
 
-        response_json = dialtone_post_request(
-            url=f"{self.client.base_url}/{API_VERSION}/chat/route",
-            data=params,
-            headers=headers,
-            timeout=15,
+        exclude_models, model_providers = (
+            self.circuit_breaker.get_exclusions(
+                self.client.router_model_config, tools=bool(tools)
+            )
+            if self.circuit_breaker
+            else ([], {})
         )
+        payload_started_at = time.monotonic()
+        headers, content = prepare_chat_route(
+            messages=messages,
+            tools=tools,
+            exclude_models=exclude_models,
+            encoded_messages=(
+                messages.encode() if isinstance(messages, Conversation) else None
+            ),
+            model_providers=model_providers,
+            client=self.client,
+        )
+        if metrics is not None:
+            metrics.payload_seconds = time.monotonic() - payload_started_at
+            start_request(metrics, self.hooks, headers)
 
-        return RouteDecision(
-            model=response_json["model"],
-            providers=response_json["providers"],
-            quality_predictions=response_json["quality_predictions"],
-            routing_strategy=response_json["routing_strategy"],
+        url = f"{self.client.base_url}/{API_VERSION}/chat/route"
+        cache_key = (
+            get_cache_key(url, content) if self.route_cache or self.coalescer else None
         )
+        if self.route_cache:
+            cached = self.route_cache.get(cache_key)
+            if cached is not None:
+                if metrics is not None:
+                    metrics.cached = True
+                return observe(
+                    partial(RouteDecision.model_validate_json, cached),
+                    metrics,
+                    self.hooks,
+                )
+
+        def request() -> RouteDecision:
+            send = partial(
+                dialtone_post_request,
+                http_client=self.http_client,
+                url=url,
+                content=content,
+                headers=headers,
+                timeout=request_timeout,
+                deadline=deadline_at,
+                metrics=metrics,
+            )
+            if self.rate_limiter:
+                send = partial(self.rate_limiter.call, send, deadline=deadline_at)
+            if self.circuit_breaker:
+                send = partial(self.circuit_breaker.call, "chat/route", send)
+            if self.retry_policy:
+                send = partial(self.retry_policy.call, send, deadline=deadline_at)
+
+            response_json = send()
+            route_decision = RouteDecision(
+                model=response_json["model"],
+                providers=response_json["providers"],
+                quality_predictions=response_json["quality_predictions"],
+                routing_strategy=response_json["routing_strategy"],
+            )
+
+            if self.route_cache:
+                self.route_cache.set(
+                    cache_key, route_decision.model_dump_json().encode()
+                )
+
+            return route_decision
+
+        if self.coalescer:
+            request = partial(
+                self.coalescer.run, cache_key, request, deadline=deadline_at
+            )
+
+        return observe(request, metrics, self.hooks)
 
 
 class Dialtone(DialtoneBase):
     chat: Chat
     client: DialtoneClient
+    http_client: httpx.Client
+    cache: Optional[ResponseCache]
+    route_cache: Optional[ResponseCache]
+    coalescer: Optional[RequestCoalescer]
+    rate_limiter: Optional[RateLimiter]
+    retry_policy: Optional[RetryPolicy]
+    hedge_policy: Optional[HedgePolicy]
+    circuit_breaker: Optional[CircuitBreaker]
+    hooks: list[MetricsHook]
 
     def __init__(
         self,
@@ -123,6 +516,17 @@ class Dialtone(DialtoneBase):
         router_model_config: RouterModelConfig | dict[str, Any] = RouterModelConfig(),
         fallback_config: FallbackConfig | dict[str, Any] = FallbackConfig(),
         tools_config: ToolsConfig | dict[str, Any] = ToolsConfig(),
+        http_config: HTTPConfig | dict[str, Any] = HTTPConfig(),
+        stream_config: StreamConfig | dict[str, Any] = StreamConfig(),
+        http_client: httpx.Client | None = None,
+        cache: ResponseCache | None = None,
+        route_cache: ResponseCache | None = None,
+        coalescer: RequestCoalescer | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        hooks: list[MetricsHook] | None = None,
         base_url: str = DEFAULT_BASE_URL,
     ):
         super().validate_inputs(
@@ -131,6 +535,8 @@ class Dialtone(DialtoneBase):
             router_model_config=router_model_config,
             fallback_config=fallback_config,
             tools_config=tools_config,
+            http_config=http_config,
+            stream_config=stream_config,
         )
 
         if isinstance(dials, dict):
@@ -143,6 +549,10 @@ class Dialtone(DialtoneBase):
             fallback_config = FallbackConfig(**fallback_config)
         if isinstance(tools_config, dict):
             tools_config = ToolsConfig(**tools_config)
+        if isinstance(http_config, dict):
+            http_config = HTTPConfig(**http_config)
+        if isinstance(stream_config, dict):
+            stream_config = StreamConfig(**stream_config)
 
         self.client = DialtoneClient(
             api_key=api_key,
@@ -151,6 +561,42 @@ class Dialtone(DialtoneBase):
             router_model_config=router_model_config,
             fallback_config=fallback_config,
             tools_config=tools_config,
+            http_config=http_config,
+            stream_config=stream_config,
             base_url=base_url,
         )
-        self.chat = Chat(client=self.client)
+
+        # A caller-provided http_client is borrowed and left open on close.
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client(http_config)
+        self.cache = cache
+        self.route_cache = route_cache
+        self.coalescer = coalescer
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        self.circuit_breaker = circuit_breaker
+        self.hooks = hooks or []
+        self.chat = Chat(
+            client=self.client,
+            http_client=self.http_client,
+            cache=cache,
+            route_cache=route_cache,
+            coalescer=coalescer,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            hedge_policy=hedge_policy,
+            circuit_breaker=circuit_breaker,
+            hooks=self.hooks,
+        )
+
+    def close(self):
+        self.chat.close()
+        if self._owns_http_client:
+            self.http_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
@@ -6,6 +6,8 @@ from dialtone.types import (
     RouterModelConfig,
     FallbackConfig,
     ToolsConfig,
+    HTTPConfig,
+    StreamConfig,
     LLM,
 )
 
@@ -18,6 +20,8 @@ class DialtoneBase:
         router_model_config: RouterModelConfig | dict[str, Any] = RouterModelConfig(),
         fallback_config: FallbackConfig | dict[str, Any] = FallbackConfig(),
         tools_config: ToolsConfig | dict[str, Any] = ToolsConfig(),
+        http_config: HTTPConfig | dict[str, Any] = HTTPConfig(),
+        stream_config: StreamConfig | dict[str, Any] = StreamConfig(),
     ):
         try:
             if isinstance(provider_config, dict):
@@ -66,3 +70,15 @@ class DialtoneBase:
                 tools_config = ToolsConfig(**tools_config)
         except ValidationError as e:
             raise ValidationError(f"Invalid tools_config: {e}")
+
+        try:
+            if isinstance(http_config, dict):
+                http_config = HTTPConfig(**http_config)
+        except ValidationError as e:
+            raise ValidationError(f"Invalid http_config: {e}")
+
+        try:
+            if isinstance(stream_config, dict):
+                stream_config = StreamConfig(**stream_config)
+        except ValidationError as e:
+            raise ValidationError(f"Invalid stream_config: {e}")
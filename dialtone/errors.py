@@ -144,3 +144,30 @@ class ProviderModerationError(APIStatusError):
 class ConfigurationError(APIStatusError):
     status_code: StatusCode = StatusCode.bad_request
     message: str = "Configuration Error"
+
+
+class CircuitOpenError(DialtoneError):
+    def __init__(self, key: str):
+        self.key = key
+        self.message = f"Circuit for {key} is open"
+
+    def __str__(self):
+        return self.message
+
+
+class DeadlineExceededError(DialtoneError, TimeoutError):
+    def __init__(self, message: str = "Deadline exceeded"):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class CassetteMissError(DialtoneError):
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.message = f"No recorded response for {method} {path}"
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,215 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from pydantic import BaseModel
+from dialtone.metrics import RequestMetrics
+
+T = TypeVar("T")
+
+Attempt = Callable[[Optional[RequestMetrics]], T]
+AsyncAttempt = Callable[[Optional[RequestMetrics]], Awaitable[T]]
+
+
+class HedgingStats(BaseModel):
+    requests: int = 0
+    # Duplicate requests fired because the original was slower than the delay
+    hedged: int = 0
+    # Calls where the duplicate finished first
+    hedge_wins: int = 0
+    # Hedges skipped because they would exceed max_extra_load
+    budget_exhausted: int = 0
+    # Delay currently used before hedging (None until there are enough samples)
+    current_delay: Optional[float] = None
+
+
+class HedgePolicy:
+    # Hedged requests for non-streaming completions: if the original request
+    # has not finished after `delay` seconds a duplicate is sent and whichever
+    # succeeds first is returned. The loser is cancelled (in the async client;
+    # the sync client cannot interrupt a request already running on its
+    # thread, so its result is discarded).
+    #
+    # Without a fixed delay, the `percentile` of the last `window` successful
+    # latencies is used once `min_samples` have been observed. Hedges are
+    # capped at `max_extra_load` times the number of requests.
+    #
+    # Attempts are called with their own RequestMetrics (forked from the
+    # request's, or None without metrics), which are merged back once the
+    # call returns.
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 1000,
+        max_extra_load: float = 0.1,
+    ):
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_load = max_extra_load
+        self.stats = HedgingStats(current_delay=delay)
+
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def call(self, fn: Attempt[T], metrics: Optional[RequestMetrics] = None) -> T:
+        delay = self._start_request()
+        if delay is None:
+            return self._timed(fn, metrics)
+
+        # Thread.start() returns once the primary is running, so the delay
+        # is measured from when it actually started.
+        attempts: dict[Future, Optional[RequestMetrics]] = {}
+        primary = self._spawn(fn, metrics, attempts)
+        used = primary
+        try:
+            done, _ = wait([primary], timeout=delay)
+            if not done and self._start_hedge():
+                self._spawn(fn, metrics, attempts)
+
+            pending = set(attempts)
+            failed: Optional[Future] = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        used = future
+                        if future is not primary:
+                            self._count("hedge_wins")
+                        return future.result()
+                    if failed is None:
+                        failed = used = future
+            raise failed.exception()
+        finally:
+            join_attempts(metrics, attempts, used)
+
+    async def call_async(
+        self, fn: AsyncAttempt[T], metrics: Optional[RequestMetrics] = None
+    ) -> T:
+        delay = self._start_request()
+        if delay is None:
+            return await self._timed_async(fn, metrics)
+
+        attempts: dict[asyncio.Future, Optional[RequestMetrics]] = {}
+        primary = self._spawn_async(fn, metrics, attempts)
+        used = primary
+        try:
+            done, _ = await asyncio.wait([primary], timeout=delay)
+            if not done and self._start_hedge():
+                self._spawn_async(fn, metrics, attempts)
+
+            pending = set(attempts)
+            failed: Optional[asyncio.Future] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        used = task
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    if failed is None:
+                        failed = used = task
+            raise failed.exception()
+        finally:
+            for task in attempts:
+                task.cancel()
+            join_attempts(metrics, attempts, used)
+
+    # Returns the delay before hedging this request, or None if it should not
+    # be hedged at all.
+    def _start_request(self) -> Optional[float]:
+        with self._lock:
+            self.stats.requests += 1
+            if self.delay is not None:
+                return self.delay
+            if len(self._latencies) < self.min_samples:
+                return None
+
+            latencies = sorted(self._latencies)
+            index = min(
+                len(latencies) - 1, math.ceil(self.percentile * len(latencies)) - 1
+            )
+            self.stats.current_delay = latencies[index]
+            return self.stats.current_delay
+
+    def _start_hedge(self) -> bool:
+        with self._lock:
+            if self.stats.hedged + 1 > self.max_extra_load * self.stats.requests:
+                self.stats.budget_exhausted += 1
+                return False
+            self.stats.hedged += 1
+            return True
+
+    def _timed(self, fn: Attempt[T], metrics: Optional[RequestMetrics]) -> T:
+        start = time.monotonic()
+        result = fn(metrics)
+        self._record_latency(time.monotonic() - start)
+        return result
+
+    async def _timed_async(
+        self, fn: AsyncAttempt[T], metrics: Optional[RequestMetrics]
+    ) -> T:
+        start = time.monotonic()
+        result = await fn(metrics)
+        self._record_latency(time.monotonic() - start)
+        return result
+
+    # Starts an attempt on a thread of its own. A bounded pool would cap the
+    # client's concurrency and count queueing time towards the hedge delay.
+    def _spawn(
+        self,
+        fn: Attempt[T],
+        metrics: Optional[RequestMetrics],
+        attempts: dict[Future, Optional[RequestMetrics]],
+    ) -> Future:
+        attempt = metrics.fork_attempt() if metrics is not None else None
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        attempts[future] = attempt
+
+        def run():
+            try:
+                future.set_result(self._timed(fn, attempt))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="dialtone-hedge", daemon=True).start()
+        return future
+
+    def _spawn_async(
+        self,
+        fn: AsyncAttempt[T],
+        metrics: Optional[RequestMetrics],
+        attempts: dict[asyncio.Future, Optional[RequestMetrics]],
+    ) -> asyncio.Future:
+        attempt = metrics.fork_attempt() if metrics is not None else None
+        task = asyncio.ensure_future(self._timed_async(fn, attempt))
+        attempts[task] = attempt
+        return task
+
+    def _record_latency(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+
+def join_attempts(
+    metrics: Optional[RequestMetrics],
+    attempts: dict[Any, Optional[RequestMetrics]],
+    used: Any,
+):
+    if metrics is None:
+        return
+    for key, attempt in attempts.items():
+        metrics.join_attempt(attempt, used=key is used)
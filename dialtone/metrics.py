@@ -0,0 +1,532 @@
+import bisect
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Generator,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+from pydantic import BaseModel, Field, PrivateAttr
+from dialtone.errors import APIStatusError
+from dialtone.types import (
+    LLM,
+    ChatCompletion,
+    ChatCompletionChunk,
+    Provider,
+    RouteDecision,
+    TokenUsage,
+)
+
+T = TypeVar("T")
+
+
+class RequestMetrics(BaseModel):
+    # Timings of one create() or route() call, in seconds. Phases that could
+    # not be observed are None, e.g. connect_seconds when a pooled connection
+    # was reused, or ttfb_seconds for transports that don't emit httpx trace
+    # events. With retries, per-attempt timings describe the last attempt.
+    endpoint: str
+    stream: bool = False
+    cached: bool = False
+    attempts: int = 0
+    model: Optional[LLM] = None
+    provider: Optional[Provider] = None
+    usage: Optional[TokenUsage] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    payload_seconds: Optional[float] = None
+    connect_seconds: Optional[float] = None
+    ttfb_seconds: Optional[float] = None
+    first_chunk_seconds: Optional[float] = None
+    total_seconds: Optional[float] = None
+    chunks: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    # Tracing spans of the request and of its stream, set by
+    # OpenTelemetryTracing
+    span: Any = Field(default=None, exclude=True, repr=False)
+    stream_span: Any = Field(default=None, exclude=True, repr=False)
+
+    _started_at: float = PrivateAttr(default_factory=time.monotonic)
+    _attempt_started_at: float = PrivateAttr(default=0.0)
+    _connect_started_at: float = PrivateAttr(default=0.0)
+
+    @property
+    def chunks_per_second(self) -> Optional[float]:
+        if not self.chunks or not self.total_seconds:
+            return None
+        return self.chunks / self.total_seconds
+
+    def start_attempt(self, content: bytes):
+        self.attempts += 1
+        self.bytes_sent += len(content)
+        self.ttfb_seconds = None
+        self._attempt_started_at = time.monotonic()
+
+    # Metrics for one of several attempts running at the same time, e.g. a
+    # request and its hedged duplicate, so that each keeps its own timings.
+    def fork_attempt(self) -> "RequestMetrics":
+        return RequestMetrics(endpoint=self.endpoint, stream=self.stream)
+
+    # Adds a forked attempt's counters to this request. The status and
+    # per-attempt timings are those of the attempt whose response was used.
+    def join_attempt(self, attempt: "RequestMetrics", used: bool):
+        self.attempts += attempt.attempts
+        self.bytes_sent += attempt.bytes_sent
+        self.bytes_received += attempt.bytes_received
+        if used:
+            self.status_code = attempt.status_code
+            self.ttfb_seconds = attempt.ttfb_seconds
+            if attempt.connect_seconds is not None:
+                self.connect_seconds = attempt.connect_seconds
+
+    def record_response_headers(self):
+        if self.ttfb_seconds is None:
+            self.ttfb_seconds = time.monotonic() - self._attempt_started_at
+
+    # httpx "trace" request extension. Called by httpcore for every phase of
+    # the request; only connection setup and response headers are kept.
+    def trace(self, event: str, info: dict[str, Any]):
+        if event == "connection.connect_tcp.started":
+            self._connect_started_at = time.monotonic()
+        elif event.startswith("connection.") and event.endswith(".complete"):
+            self.connect_seconds = time.monotonic() - self._connect_started_at
+        elif event.endswith(".receive_response_headers.complete"):
+            self.ttfb_seconds = time.monotonic() - self._attempt_started_at
+
+    async def trace_async(self, event: str, info: dict[str, Any]):
+        self.trace(event, info)
+
+    def record_chunk(self, chunk: ChatCompletionChunk | dict):
+        self.chunks += 1
+        if self.first_chunk_seconds is None:
+            self.first_chunk_seconds = time.monotonic() - self._started_at
+
+        if isinstance(chunk, dict):
+            model, provider = chunk.get("model"), chunk.get("provider")
+            usage = TokenUsage(**chunk["usage"]) if chunk.get("usage") else None
+        else:
+            model, provider, usage = chunk.model, chunk.provider, chunk.usage
+        if self.model is None and model is not None:
+            self.model = LLM(model)
+        if self.provider is None and provider is not None:
+            self.provider = Provider(provider)
+        if usage is not None:
+            self.usage = usage
+
+    def record_result(self, result: Any):
+        if isinstance(result, ChatCompletion):
+            self.model = result.model
+            self.provider = result.provider
+            self.usage = result.usage
+        elif isinstance(result, RouteDecision):
+            self.model = result.model
+
+    def record_error(self, error: Exception):
+        self.error = type(error).__name__
+        if isinstance(error, APIStatusError):
+            self.status_code = error.response.status_code
+
+    def finish(self):
+        self.total_seconds = time.monotonic() - self._started_at
+
+
+class MetricsHook:
+    # Receives the metrics of every finished request. Hooks are called on the
+    # thread or event loop that made the request and must not block. All
+    # callbacks default to doing nothing, so hooks only implement the ones
+    # they need.
+    def on_request(self, metrics: RequestMetrics):
+        pass
+
+    # Called once the payload is built, before anything is sent. `headers` are
+    # the headers of the request and may be modified.
+    def on_request_start(self, metrics: RequestMetrics, headers: dict[str, str]):
+        pass
+
+    # Called when the first chunk of a stream arrives
+    def on_stream_start(self, metrics: RequestMetrics):
+        pass
+
+    # Context that sending the request and reading each chunk runs in, e.g.
+    # to make a tracing span current for the HTTP client's own spans
+    def activate(self, metrics: RequestMetrics) -> ContextManager[Any]:
+        return nullcontext()
+
+
+def start_request(
+    metrics: RequestMetrics, hooks: list[MetricsHook], headers: dict[str, str]
+):
+    for hook in hooks:
+        hook.on_request_start(metrics, headers)
+
+
+@contextmanager
+def activate(metrics: RequestMetrics, hooks: list[MetricsHook]) -> Iterator[None]:
+    with ExitStack() as stack:
+        for hook in hooks:
+            stack.enter_context(hook.activate(metrics))
+        yield
+
+
+def emit(metrics: RequestMetrics, hooks: list[MetricsHook]):
+    metrics.finish()
+    for hook in hooks:
+        hook.on_request(metrics)
+
+
+def observe(
+    fn: Callable[[], T], metrics: Optional[RequestMetrics], hooks: list[MetricsHook]
+) -> T:
+    if metrics is None:
+        return fn()
+
+    try:
+        with activate(metrics, hooks):
+            result = fn()
+    except Exception as e:
+        metrics.record_error(e)
+        emit(metrics, hooks)
+        raise
+    metrics.record_result(result)
+    emit(metrics, hooks)
+    return result
+
+
+async def observe_async(
+    fn: Callable[[], Awaitable[T]],
+    metrics: Optional[RequestMetrics],
+    hooks: list[MetricsHook],
+) -> T:
+    if metrics is None:
+        return await fn()
+
+    try:
+        with activate(metrics, hooks):
+            result = await fn()
+    except Exception as e:
+        metrics.record_error(e)
+        emit(metrics, hooks)
+        raise
+    metrics.record_result(result)
+    emit(metrics, hooks)
+    return result
+
+
+def record_chunk(
+    chunk: ChatCompletionChunk | dict,
+    metrics: RequestMetrics,
+    hooks: list[MetricsHook],
+):
+    metrics.record_chunk(chunk)
+    if metrics.chunks == 1:
+        for hook in hooks:
+            hook.on_stream_start(metrics)
+
+
+# Metrics of a stream are emitted once it is exhausted, fails or is closed.
+# Hooks are only activated while a chunk is read, not while the caller
+# handles it.
+def observe_stream(
+    generator: Generator[ChatCompletionChunk | dict, None, None],
+    metrics: RequestMetrics,
+    hooks: list[MetricsHook],
+) -> Generator[ChatCompletionChunk | dict, None, None]:
+    try:
+        while True:
+            with activate(metrics, hooks):
+                chunk = next(generator, None)
+            if chunk is None:
+                break
+            record_chunk(chunk, metrics, hooks)
+            yield chunk
+    except Exception as e:
+        metrics.record_error(e)
+        raise
+    finally:
+        emit(metrics, hooks)
+
+
+async def observe_stream_async(
+    generator: AsyncGenerator[ChatCompletionChunk | dict, None],
+    metrics: RequestMetrics,
+    hooks: list[MetricsHook],
+) -> AsyncGenerator[ChatCompletionChunk | dict, None]:
+    try:
+        while True:
+            with activate(metrics, hooks):
+                chunk = await anext(generator, None)
+            if chunk is None:
+                break
+            record_chunk(chunk, metrics, hooks)
+            yield chunk
+    except Exception as e:
+        metrics.record_error(e)
+        raise
+    finally:
+        emit(metrics, hooks)
+
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+SIZE_BUCKETS = tuple(float(4**exponent) for exponent in range(4, 14))
+RATE_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+
+# Histogram metrics and their buckets. Each is read from the RequestMetrics
+# attribute of the same name.
+HISTOGRAMS: dict[str, tuple[float, ...]] = {
+    "payload_seconds": LATENCY_BUCKETS,
+    "connect_seconds": LATENCY_BUCKETS,
+    "ttfb_seconds": LATENCY_BUCKETS,
+    "first_chunk_seconds": LATENCY_BUCKETS,
+    "total_seconds": LATENCY_BUCKETS,
+    "chunks_per_second": RATE_BUCKETS,
+    "bytes_sent": SIZE_BUCKETS,
+    "bytes_received": SIZE_BUCKETS,
+}
+
+
+class HistogramSnapshot(BaseModel):
+    count: int
+    sum: float
+    min: Optional[float]
+    max: Optional[float]
+    p50: Optional[float]
+    p90: Optional[float]
+    p99: Optional[float]
+
+
+class Histogram:
+    # Fixed-bucket histogram. Quantiles are interpolated linearly within the
+    # bucket they fall in, so they are only as precise as the buckets.
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else self.min
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            count=self.count,
+            sum=self.sum,
+            min=self.min,
+            max=self.max,
+            p50=self.quantile(0.5),
+            p90=self.quantile(0.9),
+            p99=self.quantile(0.99),
+        )
+
+
+class EndpointSnapshot(BaseModel):
+    requests: int = 0
+    errors: dict[str, int] = {}
+    # Keyed by "model/provider"
+    models: dict[str, int] = {}
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    histograms: dict[str, HistogramSnapshot] = {}
+
+
+class InMemoryMetrics(MetricsHook):
+    # Aggregates request metrics per endpoint ("chat/completions",
+    # "chat/route") in memory. Safe to share between threads.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointSnapshot] = {}
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+
+    def on_request(self, metrics: RequestMetrics):
+        with self._lock:
+            endpoint = self._endpoints.setdefault(metrics.endpoint, EndpointSnapshot())
+            endpoint.requests += 1
+            if metrics.error is not None:
+                endpoint.errors[metrics.error] = (
+                    endpoint.errors.get(metrics.error, 0) + 1
+                )
+            if metrics.model is not None:
+                key = f"{metrics.model}/{metrics.provider}"
+                endpoint.models[key] = endpoint.models.get(key, 0) + 1
+            if metrics.usage is not None:
+                endpoint.prompt_tokens += metrics.usage.prompt_tokens
+                endpoint.completion_tokens += metrics.usage.completion_tokens
+
+            for name, buckets in HISTOGRAMS.items():
+                value = getattr(metrics, name)
+                if value is None or (name.startswith("bytes") and metrics.cached):
+                    continue
+                histogram = self._histograms.get((metrics.endpoint, name))
+                if histogram is None:
+                    histogram = self._histograms[(metrics.endpoint, name)] = Histogram(
+                        buckets
+                    )
+                histogram.observe(value)
+
+    def get_histogram(self, endpoint: str, name: str) -> Optional[Histogram]:
+        return self._histograms.get((endpoint, name))
+
+    def snapshot(self) -> dict[str, EndpointSnapshot]:
+        with self._lock:
+            snapshot = {}
+            for name, endpoint in self._endpoints.items():
+                snapshot[name] = endpoint.model_copy(
+                    update={
+                        "errors": dict(endpoint.errors),
+                        "models": dict(endpoint.models),
+                        "histograms": {
+                            histogram_name: histogram.snapshot()
+                            for (
+                                histogram_endpoint,
+                                histogram_name,
+                            ), histogram in self._histograms.items()
+                            if histogram_endpoint == name
+                        },
+                    }
+                )
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._histograms.clear()
+
+
+def get_labels(metrics: RequestMetrics) -> dict[str, str]:
+    return {
+        "endpoint": metrics.endpoint,
+        "model": str(metrics.model or ""),
+        "provider": str(metrics.provider or ""),
+        "stream": str(metrics.stream).lower(),
+        "status": metrics.error or "ok",
+    }
+
+
+class PrometheusMetrics(MetricsHook):
+    # Exports request metrics with prometheus_client (pip install
+    # dialtone[prometheus]). Histograms are named <namespace>_<metric>, e.g.
+    # dialtone_total_seconds, and labelled with endpoint, model, provider,
+    # stream and status.
+    def __init__(self, namespace: str = "dialtone", registry: Any = None):
+        import prometheus_client
+
+        registry = registry or prometheus_client.REGISTRY
+        labels = ["endpoint", "model", "provider", "stream", "status"]
+        self.histograms = {
+            name: prometheus_client.Histogram(
+                f"{namespace}_{name}",
+                f"Dialtone request {name.replace('_', ' ')}",
+                labels,
+                buckets=buckets,
+                registry=registry,
+            )
+            for name, buckets in HISTOGRAMS.items()
+        }
+        self.requests = prometheus_client.Counter(
+            f"{namespace}_requests",
+            "Dialtone requests",
+            labels + ["cached"],
+            registry=registry,
+        )
+        self.tokens = prometheus_client.Counter(
+            f"{namespace}_tokens",
+            "Tokens used by Dialtone requests",
+            labels + ["type"],
+            registry=registry,
+        )
+
+    def on_request(self, metrics: RequestMetrics):
+        labels = get_labels(metrics)
+        self.requests.labels(**labels, cached=str(metrics.cached).lower()).inc()
+        if metrics.usage is not None:
+            self.tokens.labels(**labels, type="prompt").inc(metrics.usage.prompt_tokens)
+            self.tokens.labels(**labels, type="completion").inc(
+                metrics.usage.completion_tokens
+            )
+        for name, histogram in self.histograms.items():
+            value = getattr(metrics, name)
+            if value is not None:
+                histogram.labels(**labels).observe(value)
+
+
+class OpenTelemetryMetrics(MetricsHook):
+    # Records request metrics with the OpenTelemetry metrics API (pip install
+    # dialtone[opentelemetry]). Uses the global meter provider unless a meter
+    # is given.
+    def __init__(self, meter: Any = None):
+        from opentelemetry import metrics
+
+        meter = meter or metrics.get_meter("dialtone")
+        self.histograms = {
+            name: meter.create_histogram(
+                f"dialtone.{name}",
+                unit=(
+                    "s"
+                    if name.endswith("seconds")
+                    else "By" if name.startswith("bytes") else "{chunk}/s"
+                ),
+            )
+            for name in HISTOGRAMS
+        }
+        self.requests = meter.create_counter("dialtone.requests")
+        self.tokens = meter.create_counter("dialtone.tokens", unit="{token}")
+
+    def on_request(self, metrics: RequestMetrics):
+        attributes = get_labels(metrics)
+        self.requests.add(1, {**attributes, "cached": metrics.cached})
+        if metrics.usage is not None:
+            self.tokens.add(
+                metrics.usage.prompt_tokens, {**attributes, "type": "prompt"}
+            )
+            self.tokens.add(
+                metrics.usage.completion_tokens, {**attributes, "type": "completion"}
+            )
+        for name, histogram in self.histograms.items():
+            value = getattr(metrics, name)
+            if value is not None:
+                histogram.record(value, attributes)
@@ -0,0 +1,223 @@
+import asyncio
+import threading
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Generator, Optional, TypeVar
+from pydantic import BaseModel
+from dialtone.errors import DeadlineExceededError, RateLimitError
+from dialtone.types import ChatCompletionChunk, TokenUsage
+from dialtone.utils.api import get_retry_after
+
+T = TypeVar("T")
+
+
+class RateLimiterStats(BaseModel):
+    acquired: int = 0
+    # Total time callers spent waiting for a slot
+    waited_seconds: float = 0.0
+    rate_limited: int = 0
+    # Current adaptive requests/sec ceiling (None if requests are not limited)
+    current_requests_per_second: Optional[float] = None
+
+
+class RateLimiter:
+    # Client-side pacing for create() and route() calls, shared by threads and
+    # coroutines. Requests/sec is a token bucket (implemented as GCRA: each
+    # caller reserves the next free slot) with room for `burst` back-to-back
+    # requests. Tokens/min is a bucket refilled continuously and debited with
+    # the TokenUsage of each response after the fact; while it is in debt new
+    # calls wait for it to refill.
+    #
+    # On RateLimitError the request rate is cut multiplicatively and every
+    # caller pauses for Retry-After if the server sent one. Each success then
+    # raises the rate additively back towards the configured ceiling.
+    #
+    # `deadline` is an absolute time.monotonic() value. A caller whose slot
+    # would start after it gets DeadlineExceededError right away instead of
+    # waiting, and its slot is left to the callers behind it.
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        increase_fraction: float = 0.02,
+        min_requests_per_second: Optional[float] = None,
+    ):
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.burst = burst or (
+            max(1, int(requests_per_second)) if requests_per_second else 1
+        )
+        self.decrease_factor = decrease_factor
+        self.increase_fraction = increase_fraction
+        self.min_requests_per_second = min_requests_per_second or (
+            requests_per_second * 0.05 if requests_per_second else None
+        )
+        self.stats = RateLimiterStats(current_requests_per_second=requests_per_second)
+
+        self._lock = threading.Lock()
+        self._rate = requests_per_second
+        self._next_request_at = time.monotonic()
+        self._tokens = tokens_per_minute or 0.0
+        self._tokens_updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self, deadline: Optional[float] = None):
+        delay = self._reserve(deadline)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, deadline: Optional[float] = None):
+        delay = self._reserve(deadline)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def call(self, fn: Callable[[], T], deadline: Optional[float] = None) -> T:
+        self.acquire(deadline)
+        try:
+            result = fn()
+        except RateLimitError as e:
+            self.record_rate_limited(e)
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(
+        self, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None
+    ) -> T:
+        await self.acquire_async(deadline)
+        try:
+            result = await fn()
+        except RateLimitError as e:
+            self.record_rate_limited(e)
+            raise
+        self.record_success()
+        return result
+
+    def stream(
+        self,
+        start: Callable[[], Generator[bytes, None, None]],
+        deadline: Optional[float] = None,
+    ) -> Generator[bytes, None, None]:
+        self.acquire(deadline)
+        try:
+            events = start()
+            first = next(events, None)
+        except RateLimitError as e:
+            self.record_rate_limited(e)
+            raise
+        self.record_success()
+        if first is not None:
+            yield first
+            yield from events
+
+    async def stream_async(
+        self,
+        start: Callable[[], AsyncGenerator[bytes, None]],
+        deadline: Optional[float] = None,
+    ) -> AsyncGenerator[bytes, None]:
+        await self.acquire_async(deadline)
+        try:
+            events = start()
+            first = await anext(events, None)
+        except RateLimitError as e:
+            self.record_rate_limited(e)
+            raise
+        self.record_success()
+        if first is not None:
+            yield first
+            async for event in events:
+                yield event
+
+    def record_success(self):
+        with self._lock:
+            if self._rate is not None and self.requests_per_second is not None:
+                self._rate = min(
+                    self.requests_per_second,
+                    self._rate + self.requests_per_second * self.increase_fraction,
+                )
+                self.stats.current_requests_per_second = self._rate
+
+    def record_usage(self, usage: Optional[TokenUsage]):
+        if usage is None or self.tokens_per_minute is None:
+            return
+        with self._lock:
+            self._refill_tokens(time.monotonic())
+            self._tokens -= usage.total_tokens
+
+    def record_rate_limited(self, error: Optional[RateLimitError] = None):
+        retry_after = get_retry_after(error.response) if error is not None else None
+        with self._lock:
+            self.stats.rate_limited += 1
+            if self._rate is not None:
+                self._rate = max(
+                    self.min_requests_per_second, self._rate * self.decrease_factor
+                )
+                self.stats.current_requests_per_second = self._rate
+            if retry_after is not None:
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + retry_after
+                )
+
+    def _reserve(self, deadline: Optional[float] = None) -> float:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._paused_until)
+
+            if self.tokens_per_minute is not None:
+                self._refill_tokens(now)
+                if self._tokens < 0:
+                    start = max(
+                        start, now - self._tokens / (self.tokens_per_minute / 60)
+                    )
+
+            if self._rate is not None:
+                interval = 1 / self._rate
+                # Theoretical arrival time of this request. Callers may run
+                # ahead of it by up to `burst - 1` intervals.
+                arrival = max(self._next_request_at, start)
+                start = max(start, arrival - (self.burst - 1) * interval)
+
+            if deadline is not None and start > deadline:
+                raise DeadlineExceededError()
+            if self._rate is not None:
+                self._next_request_at = arrival + interval
+
+            delay = start - now
+            self.stats.acquired += 1
+            if delay > 0:
+                self.stats.waited_seconds += delay
+            return delay
+
+    def _refill_tokens(self, now: float):
+        elapsed = now - self._tokens_updated_at
+        self._tokens = min(
+            self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60
+        )
+        self._tokens_updated_at = now
+
+
+def get_chunk_usage(chunk: ChatCompletionChunk | dict) -> Optional[TokenUsage]:
+    if isinstance(chunk, dict):
+        return TokenUsage(**chunk["usage"]) if chunk.get("usage") else None
+    return chunk.usage
+
+
+# Debits the token budget with the usage reported by a stream, which
+# usually arrives on its last chunk.
+def record_stream_usage(
+    generator: Generator[ChatCompletionChunk | dict, None, None],
+    rate_limiter: RateLimiter,
+) -> Generator[ChatCompletionChunk | dict, None, None]:
+    for chunk in generator:
+        rate_limiter.record_usage(get_chunk_usage(chunk))
+        yield chunk
+
+
+async def record_stream_usage_async(
+    generator: AsyncGenerator[ChatCompletionChunk | dict, None],
+    rate_limiter: RateLimiter,
+) -> AsyncGenerator[ChatCompletionChunk | dict, None]:
+    async for chunk in generator:
+        rate_limiter.record_usage(get_chunk_usage(chunk))
+        yield chunk
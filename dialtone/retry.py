@@ -0,0 +1,219 @@
+import asyncio
+import math
+import random
+import threading
+import time
+import httpx
+from typing import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Generator,
+    Literal,
+    Optional,
+    TypeVar,
+)
+from pydantic import BaseModel
+from dialtone.errors import (
+    APIStatusError,
+    BadGatewayError,
+    InternalServerError,
+    RateLimitError,
+    ServiceUnavailableError,
+)
+from dialtone.utils.api import get_retry_after
+
+T = TypeVar("T")
+
+DEFAULT_RETRYABLE_ERRORS: tuple[type[Exception], ...] = (
+    InternalServerError,
+    BadGatewayError,
+    ServiceUnavailableError,
+    RateLimitError,
+    httpx.TransportError,
+)
+
+
+class RetryStats(BaseModel):
+    attempts: int = 0
+    retries: int = 0
+    # Calls that succeeded after at least one retry
+    recovered: int = 0
+    # Calls that failed with a retryable error after running out of
+    # attempts or deadline
+    exhausted: int = 0
+
+
+class RetryPolicy:
+    # Retries a call on retryable errors with exponential backoff:
+    # initial_backoff * backoff_multiplier ** retry, capped at max_backoff.
+    # "full" jitter picks a uniformly random delay up to that value, "equal"
+    # keeps half of it fixed. A Retry-After header, if present, is used as
+    # the minimum delay. No retry is attempted if it would overrun `deadline`
+    # seconds measured from the first attempt.
+    #
+    # Streams are only retried if they fail before yielding their first event;
+    # after that the caller has already seen part of the response.
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        backoff_multiplier: float = 2.0,
+        jitter: Literal["full", "equal", "none"] = "full",
+        respect_retry_after: bool = True,
+        deadline: Optional[float] = None,
+        retry_on: tuple[type[Exception], ...] = DEFAULT_RETRYABLE_ERRORS,
+    ):
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.stats = RetryStats()
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[[], T], deadline: Optional[float] = None) -> T:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            self._count("attempts")
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self.get_delay(e, attempt, started, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if attempt > 1:
+                self._count("recovered")
+            return result
+
+    async def call_async(
+        self, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None
+    ) -> T:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            self._count("attempts")
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self.get_delay(e, attempt, started, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if attempt > 1:
+                self._count("recovered")
+            return result
+
+    def stream(
+        self,
+        start: Callable[[], Generator[bytes, None, None]],
+        deadline: Optional[float] = None,
+    ) -> Generator[bytes, None, None]:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            self._count("attempts")
+            events = start()
+            try:
+                first = next(events, None)
+            except Exception as e:
+                delay = self.get_delay(e, attempt, started, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if attempt > 1:
+                self._count("recovered")
+            if first is not None:
+                yield first
+                yield from events
+            return
+
+    async def stream_async(
+        self,
+        start: Callable[[], AsyncGenerator[bytes, None]],
+        deadline: Optional[float] = None,
+    ) -> AsyncGenerator[bytes, None]:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            self._count("attempts")
+            events = start()
+            try:
+                first = await anext(events, None)
+            except Exception as e:
+                delay = self.get_delay(e, attempt, started, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if attempt > 1:
+                self._count("recovered")
+            if first is not None:
+                yield first
+                async for event in events:
+                    yield event
+            return
+
+    # Returns how long to wait before the next attempt, or None if the error
+    # should be raised. `deadline` is an absolute time.monotonic() value for
+    # the whole call, on top of the policy's own deadline.
+    def get_delay(
+        self,
+        error: Exception,
+        attempt: int,
+        started: float,
+        deadline: Optional[float] = None,
+    ) -> Optional[float]:
+        if not isinstance(error, self.retry_on):
+            return None
+
+        if attempt >= self.max_attempts:
+            self._count("exhausted")
+            return None
+
+        delay = min(
+            self.max_backoff,
+            self.initial_backoff * self.backoff_multiplier ** (attempt - 1),
+        )
+        if self.jitter == "full":
+            delay = random.uniform(0, delay)
+        elif self.jitter == "equal":
+            delay = delay / 2 + random.uniform(0, delay / 2)
+
+        if self.respect_retry_after and isinstance(error, APIStatusError):
+            retry_after = get_retry_after(error.response)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+
+        if self.deadline is not None:
+            deadline = min(
+                deadline if deadline is not None else math.inf,
+                started + self.deadline,
+            )
+        if deadline is not None and time.monotonic() + delay > deadline:
+            self._count("exhausted")
+            return None
+
+        self._count("retries")
+        return delay
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
@@ -0,0 +1,300 @@
+from typing import AsyncIterator, Iterator, Optional
+from dialtone.types import (
+    LLM,
+    ChatCompletion,
+    ChatCompletionChunk,
+    ChatMessage,
+    Choice,
+    ChunkEvent,
+    Provider,
+    StreamEvent,
+    TokenUsage,
+    ToolCall,
+    ToolCallEvent,
+    ToolCallFunction,
+)
+from dialtone.utils import json_backend
+
+
+class ToolCallState:
+    def __init__(self, index: int):
+        self.index = index
+        self.id: Optional[str] = None
+        self.name_parts: list[str] = []
+        self.argument_parts: list[str] = []
+        self.done = False
+
+    # Returns True if this fragment completed the arguments. Nothing can
+    # validly follow a complete JSON object, so once the arguments parse the
+    # call is done. Parsing is only attempted when a fragment closes one.
+    def add(
+        self, id: Optional[str], name: Optional[str], arguments: Optional[str]
+    ) -> bool:
+        if id:
+            self.id = id
+        if name:
+            self.name_parts.append(name)
+        if arguments:
+            self.argument_parts.append(arguments)
+            if not self.done and arguments.rstrip().endswith(("}", "]")):
+                try:
+                    json_backend.loads("".join(self.argument_parts))
+                except ValueError:
+                    return False
+                self.done = True
+                return True
+        return False
+
+    def get_tool_call(self) -> ToolCall:
+        return ToolCall(
+            id=self.id or "",
+            type="function",
+            function=ToolCallFunction(
+                name="".join(self.name_parts),
+                arguments="".join(self.argument_parts),
+            ),
+        )
+
+
+class ChoiceState:
+    def __init__(self):
+        self.role: Optional[str] = None
+        # Fragments are joined once at the end instead of concatenated per
+        # chunk, which would copy the content accumulated so far every time
+        self.content_parts: list[str] = []
+        self.tool_calls: dict[int, ToolCallState] = {}
+        self.finish_reason: Optional[str] = None
+
+    def add_tool_call(
+        self,
+        index: int,
+        id: Optional[str],
+        name: Optional[str],
+        arguments: Optional[str],
+    ) -> Optional[ToolCallState]:
+        tool_call = self.tool_calls.get(index)
+        if tool_call is None:
+            tool_call = self.tool_calls[index] = ToolCallState(index)
+        return tool_call if tool_call.add(id, name, arguments) else None
+
+    # Marks the tool calls whose arguments never parsed as done, e.g. when
+    # the response was cut off by max tokens
+    def finish(self) -> list[ToolCallState]:
+        remaining = [
+            self.tool_calls[index]
+            for index in sorted(self.tool_calls)
+            if not self.tool_calls[index].done
+        ]
+        for tool_call in remaining:
+            tool_call.done = True
+        return remaining
+
+    def get_choice(self) -> Choice:
+        return Choice(
+            message=ChatMessage(
+                role=self.role or "assistant",
+                content="".join(self.content_parts),
+                tool_calls=[
+                    self.tool_calls[index].get_tool_call()
+                    for index in sorted(self.tool_calls)
+                ],
+            )
+        )
+
+
+# Assembles the ChatCompletion a stream would have returned without
+# stream=True. Accepts chunks in either StreamConfig.chunk_format.
+class ChatCompletionAccumulator:
+    def __init__(self):
+        self.choices: list[ChoiceState] = []
+        self.model: Optional[LLM] = None
+        self.provider: Optional[Provider] = None
+        self.usage: Optional[TokenUsage] = None
+        # (choice index, tool call) for tool calls completed since the last
+        # pop_completed_tool_calls
+        self.completed_tool_calls: list[tuple[int, ToolCall]] = []
+
+    def add(self, chunk: ChatCompletionChunk | dict):
+        if isinstance(chunk, dict):
+            self._add_dict(chunk)
+            return
+
+        if chunk.model is not None:
+            self.model = chunk.model
+        if chunk.provider is not None:
+            self.provider = chunk.provider
+        if chunk.usage is not None:
+            self.usage = chunk.usage
+
+        choices = self.choices
+        for index, chunk_choice in enumerate(chunk.choices):
+            choice = choices[index] if index < len(choices) else self._get_choice(index)
+            delta = chunk_choice.delta
+            if delta.role is not None:
+                choice.role = delta.role
+            content = delta.content
+            if content:
+                choice.content_parts.append(content)
+            if delta.tool_calls:
+                for tool_call in delta.tool_calls:
+                    function = tool_call.function
+                    completed = choice.add_tool_call(
+                        tool_call.index,
+                        tool_call.id,
+                        function.name if function else None,
+                        function.arguments if function else None,
+                    )
+                    if completed:
+                        self._complete(index, [completed])
+            if chunk_choice.finish_reason is not None:
+                choice.finish_reason = chunk_choice.finish_reason
+                self._complete(index, choice.finish())
+
+    # Called at the end of the stream to complete any unfinished tool calls
+    def finish(self):
+        for index, choice in enumerate(self.choices):
+            self._complete(index, choice.finish())
+
+    def pop_completed_tool_calls(self) -> list[tuple[int, ToolCall]]:
+        completed, self.completed_tool_calls = self.completed_tool_calls, []
+        return completed
+
+    def get_completion(self) -> ChatCompletion:
+        if self.model is None or self.provider is None:
+            raise ValueError("Error: Stream did not report a model and provider")
+
+        return ChatCompletion(
+            choices=[choice.get_choice() for choice in self.choices],
+            model=self.model,
+            provider=self.provider,
+            usage=self.usage or TokenUsage(),
+        )
+
+    def _complete(self, index: int, tool_calls: list[ToolCallState]):
+        for tool_call in tool_calls:
+            self.completed_tool_calls.append((index, tool_call.get_tool_call()))
+
+    def _get_choice(self, index: int) -> ChoiceState:
+        while len(self.choices) <= index:
+            self.choices.append(ChoiceState())
+        return self.choices[index]
+
+    def _add_dict(self, chunk: dict):
+        # Model and provider are the same on every chunk, so only convert them
+        # to their enums until they are known
+        if self.model is None and chunk.get("model") is not None:
+            self.model = LLM(chunk["model"])
+        if self.provider is None and chunk.get("provider") is not None:
+            self.provider = Provider(chunk["provider"])
+        usage = chunk.get("usage")
+        if usage:
+            self.usage = TokenUsage(**usage)
+
+        choices = self.choices
+        for index, chunk_choice in enumerate(chunk.get("choices") or []):
+            choice = choices[index] if index < len(choices) else self._get_choice(index)
+            delta = chunk_choice.get("delta") or {}
+            role = delta.get("role")
+            if role is not None:
+                choice.role = role
+            content = delta.get("content")
+            if content:
+                choice.content_parts.append(content)
+            tool_calls = delta.get("tool_calls")
+            if tool_calls:
+                for tool_call in tool_calls:
+                    function = tool_call.get("function") or {}
+                    completed = choice.add_tool_call(
+                        tool_call["index"],
+                        tool_call.get("id"),
+                        function.get("name"),
+                        function.get("arguments"),
+                    )
+                    if completed:
+                        self._complete(index, [completed])
+            finish_reason = chunk_choice.get("finish_reason")
+            if finish_reason is not None:
+                choice.finish_reason = finish_reason
+                self._complete(index, choice.finish())
+
+
+# Wraps the chunks returned by create(stream=True), yielding them unchanged
+# while accumulating them. completion is available once iteration ends.
+# events() additionally yields each tool call as soon as it is complete, so
+# tools can start running while the rest of the response streams in.
+class ChatCompletionStream:
+    def __init__(self, chunks: Iterator[ChatCompletionChunk | dict]):
+        self.chunks = chunks
+        self.accumulator = ChatCompletionAccumulator()
+        self._completion: Optional[ChatCompletion] = None
+        self._done = False
+
+    def __iter__(self) -> Iterator[ChatCompletionChunk | dict]:
+        for chunk in self.chunks:
+            self.accumulator.add(chunk)
+            yield chunk
+        self.accumulator.finish()
+        self._done = True
+
+    def events(self) -> Iterator[StreamEvent]:
+        for chunk in self:
+            yield ChunkEvent(chunk=chunk)
+            yield from self._pop_tool_call_events()
+        yield from self._pop_tool_call_events()
+
+    def _pop_tool_call_events(self) -> Iterator[ToolCallEvent]:
+        for choice_index, tool_call in self.accumulator.pop_completed_tool_calls():
+            yield ToolCallEvent(choice_index=choice_index, tool_call=tool_call)
+
+    @property
+    def completion(self) -> ChatCompletion:
+        if not self._done:
+            raise RuntimeError("Error: Stream has not been fully consumed")
+        if self._completion is None:
+            self._completion = self.accumulator.get_completion()
+        return self._completion
+
+    def until_done(self) -> ChatCompletion:
+        for _ in self:
+            pass
+        return self.completion
+
+
+class AsyncChatCompletionStream:
+    def __init__(self, chunks: AsyncIterator[ChatCompletionChunk | dict]):
+        self.chunks = chunks
+        self.accumulator = ChatCompletionAccumulator()
+        self._completion: Optional[ChatCompletion] = None
+        self._done = False
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk | dict]:
+        async for chunk in self.chunks:
+            self.accumulator.add(chunk)
+            yield chunk
+        self.accumulator.finish()
+        self._done = True
+
+    async def events(self) -> AsyncIterator[StreamEvent]:
+        async for chunk in self:
+            yield ChunkEvent(chunk=chunk)
+            for event in self._pop_tool_call_events():
+                yield event
+        for event in self._pop_tool_call_events():
+            yield event
+
+    def _pop_tool_call_events(self) -> Iterator[ToolCallEvent]:
+        for choice_index, tool_call in self.accumulator.pop_completed_tool_calls():
+            yield ToolCallEvent(choice_index=choice_index, tool_call=tool_call)
+
+    @property
+    def completion(self) -> ChatCompletion:
+        if not self._done:
+            raise RuntimeError("Error: Stream has not been fully consumed")
+        if self._completion is None:
+            self._completion = self.accumulator.get_completion()
+        return self._completion
+
+    async def until_done(self) -> ChatCompletion:
+        async for _ in self:
+            pass
+        return self.completion
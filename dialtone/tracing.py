@@ -0,0 +1,95 @@
+from typing import Any, ContextManager
+from dialtone.metrics import MetricsHook, RequestMetrics
+
+
+class OpenTelemetryTracing(MetricsHook):
+    # Wraps every create() and route() call in an OpenTelemetry span and
+    # propagates its context to Dialtone in the request headers (W3C
+    # traceparent with the default propagator). The span is current while the
+    # request is sent, so spans of instrumented HTTP clients nest under it.
+    # Streams get a child span from the first chunk until the stream is
+    # exhausted, closed or fails. Requires
+    # opentelemetry-api (pip install dialtone[opentelemetry]); uses the global
+    # tracer provider unless a tracer is given.
+    #
+    # Pass it in `hooks` like any other metrics hook. Clients without hooks
+    # don't collect anything, so tracing costs nothing when it is not enabled.
+    def __init__(self, tracer: Any = None):
+        from opentelemetry import propagate, trace
+
+        self.tracer = tracer or trace.get_tracer("dialtone")
+        self._trace = trace
+        self._propagate = propagate
+
+    def on_request_start(self, metrics: RequestMetrics, headers: dict[str, str]):
+        name = (
+            "dialtone.chat.route"
+            if metrics.endpoint == "chat/route"
+            else "dialtone.chat.completions.create"
+        )
+        metrics.span = self.tracer.start_span(
+            name,
+            kind=self._trace.SpanKind.CLIENT,
+            attributes={
+                "dialtone.endpoint": metrics.endpoint,
+                "dialtone.stream": metrics.stream,
+            },
+        )
+        self._propagate.inject(
+            headers, context=self._trace.set_span_in_context(metrics.span)
+        )
+
+    def activate(self, metrics: RequestMetrics) -> ContextManager[Any]:
+        if metrics.span is None:
+            return super().activate(metrics)
+        # Errors are recorded on the span by on_request
+        return self._trace.use_span(
+            metrics.span,
+            end_on_exit=False,
+            record_exception=False,
+            set_status_on_exception=False,
+        )
+
+    def on_stream_start(self, metrics: RequestMetrics):
+        if metrics.span is None:
+            return
+        metrics.stream_span = self.tracer.start_span(
+            "dialtone.chat.completions.stream",
+            context=self._trace.set_span_in_context(metrics.span),
+        )
+
+    def on_request(self, metrics: RequestMetrics):
+        span = metrics.span
+        if span is None:
+            return
+
+        span.set_attributes(get_span_attributes(metrics))
+        if metrics.error is not None:
+            span.set_status(self._trace.StatusCode.ERROR, metrics.error)
+
+        stream_span = metrics.stream_span
+        if stream_span is not None:
+            stream_span.set_attribute("dialtone.chunks", metrics.chunks)
+            if metrics.error is not None:
+                stream_span.set_status(self._trace.StatusCode.ERROR, metrics.error)
+            stream_span.end()
+        span.end()
+
+
+def get_span_attributes(metrics: RequestMetrics) -> dict[str, Any]:
+    attributes: dict[str, Any] = {
+        "dialtone.cached": metrics.cached,
+        "dialtone.attempts": metrics.attempts,
+    }
+    if metrics.model is not None:
+        attributes["gen_ai.response.model"] = str(metrics.model)
+    if metrics.provider is not None:
+        attributes["dialtone.provider"] = str(metrics.provider)
+    if metrics.usage is not None:
+        attributes["gen_ai.usage.input_tokens"] = metrics.usage.prompt_tokens
+        attributes["gen_ai.usage.output_tokens"] = metrics.usage.completion_tokens
+    if metrics.status_code is not None:
+        attributes["http.response.status_code"] = metrics.status_code
+    if metrics.error is not None:
+        attributes["error.type"] = metrics.error
+    return attributes
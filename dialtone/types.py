@@ -1,8 +1,15 @@
 import sys
 from enum import StrEnum
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from typing import List, Literal, Any, Optional
-from dialtone.config import DEFAULT_BASE_URL
+from dialtone.config import (
+    DEFAULT_BASE_URL,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_ROUTE_TIMEOUT,
+)
 
 
 class Tool(BaseModel):
@@ -111,39 +118,98 @@ class ChatCompletionChunk(BaseModel):
     usage: TokenUsage | None
 
 
-class OpenAIProviderConfig(BaseModel):
+class ChunkEvent(BaseModel):
+    type: Literal["chunk"] = "chunk"
+    chunk: ChatCompletionChunk | dict
+
+
+# Emitted as soon as a streamed tool call's arguments are complete, before
+# the rest of the response has arrived
+class ToolCallEvent(BaseModel):
+    type: Literal["tool_call"] = "tool_call"
+    choice_index: int
+    tool_call: ToolCall
+
+
+StreamEvent = ChunkEvent | ToolCallEvent
+
+
+# Mutation counter shared by a config model and every config model nested in
+# it. Always compares equal so that it doesn't affect model equality.
+class ConfigRevision:
+    def __init__(self):
+        self.value = 0
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ConfigRevision)
+
+
+class ConfigModel(BaseModel):
+    # Bumped on every field assignment of this model or of a config model
+    # nested in it, so that payloads serialized from the config can be cached
+    # and invalidated cheaply. In-place mutation of lists is not tracked:
+    # assign a new list instead.
+    _revision: ConfigRevision = PrivateAttr(default_factory=ConfigRevision)
+
+    @property
+    def revision(self) -> int:
+        return self._revision.value
+
+    def model_post_init(self, __context: Any):
+        self._share_revision(self._revision)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            if isinstance(value, ConfigModel):
+                value._share_revision(self._revision)
+            self._revision.value += 1
+
+    # model_copy(deep=True) passes no memo, which would give the copied
+    # fields and the copied revision separate ones and unshare it.
+    def __deepcopy__(self, memo: Optional[dict[int, Any]] = None):
+        return super().__deepcopy__({} if memo is None else memo)
+
+    def _share_revision(self, revision: ConfigRevision):
+        self._revision = revision
+        for value in self.__dict__.values():
+            if isinstance(value, ConfigModel):
+                value._share_revision(revision)
+
+
+class OpenAIProviderConfig(ConfigModel):
     api_key: str
 
 
-class AnthropicProviderConfig(BaseModel):
+class AnthropicProviderConfig(ConfigModel):
     api_key: str
 
 
-class GoogleProviderConfig(BaseModel):
+class GoogleProviderConfig(ConfigModel):
     api_key: str
 
 
-class CohereProviderConfig(BaseModel):
+class CohereProviderConfig(ConfigModel):
     api_key: str
 
 
-class GroqProviderConfig(BaseModel):
+class GroqProviderConfig(ConfigModel):
     api_key: str
 
 
-class ReplicateProviderConfig(BaseModel):
+class ReplicateProviderConfig(ConfigModel):
     api_key: str
 
 
-class FireworksProviderConfig(BaseModel):
+class FireworksProviderConfig(ConfigModel):
     api_key: str
 
 
-class TogetherProviderConfig(BaseModel):
+class TogetherProviderConfig(ConfigModel):
     api_key: str
 
 
-class DeepInfraProviderConfig(BaseModel):
+class DeepInfraProviderConfig(ConfigModel):
     api_key: str
 
 
@@ -185,43 +251,43 @@ AnthropicProviders = [Provider.Anthropic]
 GoogleProviders = [Provider.Google]
 
 
-class OpenAIModelConfig(BaseModel):
+class OpenAIModelConfig(ConfigModel):
     providers: list[Provider] = OpenAiProviders
 
 
-class AnthropicModelConfig(BaseModel):
+class AnthropicModelConfig(ConfigModel):
     providers: list[Provider] = AnthropicProviders
 
 
-class GoogleModelConfig(BaseModel):
+class GoogleModelConfig(ConfigModel):
     providers: list[Provider] = GoogleProviders
 
 
-class CohereModelConfig(BaseModel):
+class CohereModelConfig(ConfigModel):
     providers: list[Provider] = CohereProviders
 
 
-class Llama_3_70B_ModelConfig(BaseModel):
+class Llama_3_70B_ModelConfig(ConfigModel):
     tools_providers: list[Provider] = Llama_3_ToolsProviders
     no_tools_providers: list[Provider] = Llama_3_NoToolsProviders
 
 
-class Llama_3_1_8B_ModelConfig(BaseModel):
+class Llama_3_1_8B_ModelConfig(ConfigModel):
     tools_providers: list[Provider] = Llama_3_1_ToolsProviders
     no_tools_providers: list[Provider] = Llama_3_1_NoToolsProviders
 
 
-class Llama_3_1_70B_ModelConfig(BaseModel):
+class Llama_3_1_70B_ModelConfig(ConfigModel):
     tools_providers: list[Provider] = Llama_3_1_ToolsProviders
     no_tools_providers: list[Provider] = Llama_3_1_NoToolsProviders
 
 
-class Llama_3_1_405B_ModelConfig(BaseModel):
+class Llama_3_1_405B_ModelConfig(ConfigModel):
     tools_providers: list[Provider] = Llama_3_1_405B_ToolsProviders
     no_tools_providers: list[Provider] = Llama_3_1_405B_NoToolsProviders
 
 
-class ProviderConfig(BaseModel):
+class ProviderConfig(ConfigModel):
     openai: Optional[OpenAIProviderConfig] = None
     anthropic: Optional[AnthropicProviderConfig] = None
     google: Optional[GoogleProviderConfig] = None
@@ -269,7 +335,7 @@ class ProviderConfig(BaseModel):
         return DeepInfraProviderConfig(api_key=api_key)
 
 
-class RouterModelConfig(BaseModel):
+class RouterModelConfig(ConfigModel):
     include_models: list[LLM | str] = []
     exclude_models: list[LLM | str] = []
 
@@ -361,7 +427,7 @@ class RouterModelConfig(BaseModel):
         )
 
 
-class FallbackConfig(BaseModel):
+class FallbackConfig(ConfigModel):
     # By default just fall back through models recommended by the router from best to worst.
     fallback_model: Optional[LLM] = None
 
@@ -372,12 +438,12 @@ class FallbackConfig(BaseModel):
     max_provider_fallback_attempts: int = sys.maxsize
 
 
-class ToolsConfig(BaseModel):
+class ToolsConfig(ConfigModel):
     # By default assume no parallel tool use
     parallel_tool_use: bool = False
 
 
-class Dials(BaseModel):
+class Dials(ConfigModel):
     quality: float = 1
     cost: float = 0
 
@@ -385,18 +451,80 @@ class Dials(BaseModel):
         return (self.quality + self.cost) == 1
 
 
-class DialtoneClient(BaseModel):
+class HTTPConfig(BaseModel):
+    # All requests go to a single host (base_url), so these limits are per host.
+    max_connections: Optional[int] = DEFAULT_MAX_CONNECTIONS
+    max_keepalive_connections: Optional[int] = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: Optional[float] = DEFAULT_KEEPALIVE_EXPIRY
+    # Multiplex concurrent requests over fewer connections. Requires the h2 package.
+    http2: bool = False
+    # With http2, set to False to use HTTP/2 without negotiating it over TLS
+    # (prior knowledge), e.g. for a cleartext HTTP/2 server.
+    http1: bool = True
+    # Default timeouts in seconds, overridable per call. connect_timeout
+    # defaults to the request timeout.
+    timeout: float = DEFAULT_REQUEST_TIMEOUT
+    route_timeout: float = DEFAULT_ROUTE_TIMEOUT
+    connect_timeout: Optional[float] = None
+
+
+ChunkFormat = Literal["model", "dict"]
+
+
+class StreamConfig(BaseModel):
+    # "model" yields validated ChatCompletionChunk objects, "dict" yields the
+    # decoded JSON as plain dicts and skips model construction entirely.
+    chunk_format: ChunkFormat = "model"
+    # Maximum time to wait for the next bytes of a stream, in seconds.
+    # Defaults to the read timeout of the request.
+    idle_timeout: Optional[float] = None
+
+
+class DialtoneClient(ConfigModel):
     api_key: str
     provider_config: ProviderConfig
     dials: Dials = Dials()
     router_model_config: RouterModelConfig = RouterModelConfig()
     fallback_config: FallbackConfig = FallbackConfig()
     tools_config: ToolsConfig = ToolsConfig()
+    http_config: HTTPConfig = HTTPConfig()
+    stream_config: StreamConfig = StreamConfig()
     base_url: str = DEFAULT_BASE_URL
 
+    # (cache key, value) for the static part of the request payload. The
+    # params are keyed on the revision, the encoded content on the revision
+    # and the JSON encoder.
+    _static_params: Optional[tuple[int, dict]] = PrivateAttr(default=None)
+    _static_content: Optional[tuple[tuple[int, Any], bytes]] = PrivateAttr(default=None)
+
+    # The config models the client is created with are copied, so that
+    # changing them afterwards, or sharing them with other clients, doesn't
+    # affect it. Change the client's config through its own fields, e.g.
+    # client.dials.quality = 0.5. Models assigned to it later become part of
+    # it and must not be shared.
+    def model_post_init(self, __context: Any):
+        for name, value in list(self.__dict__.items()):
+            if isinstance(value, ConfigModel):
+                self.__dict__[name] = value.model_copy(deep=True)
+        super().model_post_init(__context)
+
 
 class RouteDecision(BaseModel):
     model: LLM
     providers: list[Provider]
     quality_predictions: dict[str, float]
     routing_strategy: str
+
+
+class BatchRequest(BaseModel):
+    messages: list[ChatMessage]
+    tools: list[Tool] = []
+
+
+class BatchResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Position of the request in the input iterable
+    index: int
+    response: Optional[ChatCompletion] = None
+    error: Optional[Exception] = None
@@ -1,6 +1,10 @@
 import httpx
 import json
-from typing import Any, AsyncGenerator, Generator, Type, TypeVar
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncGenerator, Generator, Iterator, Optional, Type
 from dialtone.errors import (
     APIErrorRouterDetails,
     BadRequestError,
@@ -15,14 +19,16 @@ from dialtone.errors import (
     ServiceUnavailableError,
     ProviderModerationError,
     ConfigurationError,
+    DeadlineExceededError,
     APIError,
     ErrorCode,
     StatusCode,
 )
 from dialtone.config import DEFAULT_REQUEST_TIMEOUT
-
-# Generic type variable
-T = TypeVar("T")
+from dialtone.metrics import RequestMetrics
+from dialtone.types import ChatCompletionChunk, ChunkFormat, HTTPConfig
+from dialtone.utils import json_backend
+from dialtone.utils.sse import DONE, SSEDecoder
 
 
 def get_status_code_from_error_code(error_code: ErrorCode) -> StatusCode:
@@ -94,6 +100,24 @@ def get_error_class_from_error_code(error_code: ErrorCode) -> Type[APIError]:
     return ERROR_CLASS_FROM_ERROR_CODE[error_code]
 
 
+def get_retry_after(response: httpx.Response) -> Optional[float]:
+    # Retry-After is either a number of seconds or an HTTP date.
+    retry_after = response.headers.get("retry-after")
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
 def process_response(response: httpx.Response):
     try:
         response.raise_for_status()
@@ -105,7 +129,7 @@ def process_response(response: httpx.Response):
         }
 
         try:
-            response_body: dict = exc.response.json()
+            response_body: dict = json_backend.loads(exc.response.content)
 
             error_code = response_body.get("detail", {}).get("error_code")
 
@@ -136,80 +160,280 @@ def process_response(response: httpx.Response):
 
             raise error_class(**error_params) from None
 
-    return response.json()
+    return json_backend.loads(response.content)
+
+
+def get_request_timeout(
+    http_config: HTTPConfig,
+    timeout: float | httpx.Timeout | None = None,
+    default: float | None = None,
+) -> httpx.Timeout:
+    if isinstance(timeout, httpx.Timeout):
+        return timeout
+
+    if timeout is None:
+        timeout = default if default is not None else http_config.timeout
+    connect_timeout = http_config.connect_timeout
+    return httpx.Timeout(
+        timeout, connect=connect_timeout if connect_timeout is not None else timeout
+    )
+
+
+# Caps every phase of the timeout at the time left until `deadline`, an
+# absolute time.monotonic() value.
+def get_timeout(
+    timeout: float | httpx.Timeout, deadline: Optional[float] = None
+) -> httpx.Timeout:
+    if not isinstance(timeout, httpx.Timeout):
+        timeout = httpx.Timeout(timeout)
+    if deadline is None:
+        return timeout
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError()
+
+    def cap(phase: Optional[float]) -> float:
+        return remaining if phase is None else min(phase, remaining)
+
+    return httpx.Timeout(
+        connect=cap(timeout.connect),
+        read=cap(timeout.read),
+        write=cap(timeout.write),
+        pool=cap(timeout.pool),
+    )
+
+
+# Read timeouts are capped at the time left until `deadline`, so one that
+# fires once the deadline has passed is reported as the deadline.
+@contextmanager
+def raise_on_deadline(deadline: Optional[float]) -> Iterator[None]:
+    try:
+        yield
+    except httpx.ReadTimeout as e:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceededError() from e
+        raise
+
+
+def create_http_client(http_config: HTTPConfig) -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=http_config.max_connections,
+            max_keepalive_connections=http_config.max_keepalive_connections,
+            keepalive_expiry=http_config.keepalive_expiry,
+        ),
+        timeout=get_request_timeout(http_config),
+        http1=http_config.http1,
+        http2=http_config.http2,
+    )
+
+
+def create_async_http_client(http_config: HTTPConfig) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=http_config.max_connections,
+            max_keepalive_connections=http_config.max_keepalive_connections,
+            keepalive_expiry=http_config.keepalive_expiry,
+        ),
+        timeout=get_request_timeout(http_config),
+        http1=http_config.http1,
+        http2=http_config.http2,
+    )
 
 
 def dialtone_post_request(
+    http_client: httpx.Client,
     url: str,
-    data: dict[str, Any],
+    content: bytes,
     headers: dict[str, str],
-    timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    timeout: float | httpx.Timeout = DEFAULT_REQUEST_TIMEOUT,
+    deadline: Optional[float] = None,
+    metrics: Optional[RequestMetrics] = None,
 ) -> dict:
-    with httpx.Client() as client:
-        response = client.post(url, json=data, headers=headers, timeout=timeout)
-        return process_response(response)
+    extensions = None
+    if metrics is not None:
+        metrics.start_attempt(content)
+        extensions = {"trace": metrics.trace}
+
+    response = http_client.post(
+        url,
+        content=content,
+        headers=headers,
+        timeout=get_timeout(timeout, deadline),
+        extensions=extensions,
+    )
+    if metrics is not None:
+        metrics.status_code = response.status_code
+        metrics.bytes_received += len(response.content)
+    return process_response(response)
 
 
 async def dialtone_post_request_async(
+    http_client: httpx.AsyncClient,
     url: str,
-    data: dict[str, Any],
+    content: bytes,
     headers: dict[str, str],
-    timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    timeout: float | httpx.Timeout = DEFAULT_REQUEST_TIMEOUT,
+    deadline: Optional[float] = None,
+    metrics: Optional[RequestMetrics] = None,
 ) -> dict:
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data, headers=headers, timeout=timeout)
-        return process_response(response)
+    extensions = None
+    if metrics is not None:
+        metrics.start_attempt(content)
+        extensions = {"trace": metrics.trace_async}
+
+    response = await http_client.post(
+        url,
+        content=content,
+        headers=headers,
+        timeout=get_timeout(timeout, deadline),
+        extensions=extensions,
+    )
+    if metrics is not None:
+        metrics.status_code = response.status_code
+        metrics.bytes_received += len(response.content)
+    return process_response(response)
 
 
 def dialtone_streaming_post_request(
+    http_client: httpx.Client,
     url: str,
-    data: dict[str, Any],
+    content: bytes,
     headers: dict[str, str],
-    timeout: int = DEFAULT_REQUEST_TIMEOUT,
-) -> Generator[dict, None, None]:
-    with httpx.Client() as client:
-        with client.stream(
-            "POST", url, json=data, headers=headers, timeout=timeout
-        ) as response:
-            for response_chunk_text in response.iter_text():
-                for line in response_chunk_text.splitlines():
-                    line = line.strip()
-                    if line.startswith("data:"):
-                        line = line.removeprefix("data:").strip()
-                    if line:
-                        response_chunk_json: dict = json.loads(line)
-                        yield response_chunk_json
+    timeout: float | httpx.Timeout = DEFAULT_REQUEST_TIMEOUT,
+    deadline: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    metrics: Optional[RequestMetrics] = None,
+) -> Generator[bytes, None, None]:
+    timeout = get_timeout(timeout)
+    if idle_timeout is not None:
+        # httpx's read timeout applies to each read, i.e. the gap between chunks
+        timeout = httpx.Timeout(
+            connect=timeout.connect,
+            read=idle_timeout,
+            write=timeout.write,
+            pool=timeout.pool,
+        )
+    timeout = get_timeout(timeout, deadline)
+
+    extensions = None
+    if metrics is not None:
+        metrics.start_attempt(content)
+        extensions = {"trace": metrics.trace}
+
+    with raise_on_deadline(deadline), http_client.stream(
+        "POST",
+        url,
+        content=content,
+        headers=headers,
+        timeout=timeout,
+        extensions=extensions,
+    ) as response:
+        if metrics is not None:
+            metrics.record_response_headers()
+            metrics.status_code = response.status_code
+
+        if response.is_error:
+            response.read()
+            process_response(response)
+
+        decoder = SSEDecoder()
+        for response_chunk in response.iter_bytes():
+            if deadline is not None and time.monotonic() > deadline:
+                raise DeadlineExceededError()
+            if metrics is not None:
+                metrics.bytes_received += len(response_chunk)
+            for event in decoder.feed(response_chunk):
+                if event.data == DONE:
+                    return
+                yield event.data
+
+        for event in decoder.flush():
+            if event.data == DONE:
+                return
+            yield event.data
 
 
 async def dialtone_streaming_post_request_async(
+    http_client: httpx.AsyncClient,
     url: str,
-    data: dict[str, Any],
+    content: bytes,
     headers: dict[str, str],
-    timeout: int = DEFAULT_REQUEST_TIMEOUT,
-) -> AsyncGenerator[dict, None]:
-    async with httpx.AsyncClient() as client:
-        async with client.stream(
-            "POST", url, json=data, headers=headers, timeout=timeout
+    timeout: float | httpx.Timeout = DEFAULT_REQUEST_TIMEOUT,
+    deadline: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    metrics: Optional[RequestMetrics] = None,
+) -> AsyncGenerator[bytes, None]:
+    timeout = get_timeout(timeout)
+    if idle_timeout is not None:
+        # httpx's read timeout applies to each read, i.e. the gap between chunks
+        timeout = httpx.Timeout(
+            connect=timeout.connect,
+            read=idle_timeout,
+            write=timeout.write,
+            pool=timeout.pool,
+        )
+    timeout = get_timeout(timeout, deadline)
+
+    extensions = None
+    if metrics is not None:
+        metrics.start_attempt(content)
+        extensions = {"trace": metrics.trace_async}
+
+    with raise_on_deadline(deadline):
+        async with http_client.stream(
+            "POST",
+            url,
+            content=content,
+            headers=headers,
+            timeout=timeout,
+            extensions=extensions,
         ) as response:
-            async for response_chunk_text in response.aiter_text():
-                for line in response_chunk_text.splitlines():
-                    line = line.strip()
-                    if line.startswith("data:"):
-                        line = line.removeprefix("data:").strip()
-                    if line:
-                        response_chunk_json: dict = json.loads(line)
-                        yield response_chunk_json
-
-
-def convert_dict_to_type_stream(
-    generator: Generator[dict, None, None], converter_type: Type[T]
-) -> Generator[T, None, None]:
-    for item in generator:
-        yield converter_type(**item)
-
-
-async def convert_dict_to_type_stream_async(
-    generator: AsyncGenerator[dict, None], converter_type: Type[T]
-) -> AsyncGenerator[T, None]:
-    async for item in generator:
-        yield converter_type(**item)
+            if metrics is not None:
+                metrics.record_response_headers()
+                metrics.status_code = response.status_code
+
+            if response.is_error:
+                await response.aread()
+                process_response(response)
+
+            decoder = SSEDecoder()
+            async for response_chunk in response.aiter_bytes():
+                if deadline is not None and time.monotonic() > deadline:
+                    raise DeadlineExceededError()
+                if metrics is not None:
+                    metrics.bytes_received += len(response_chunk)
+                for event in decoder.feed(response_chunk):
+                    if event.data == DONE:
+                        return
+                    yield event.data
+
+            for event in decoder.flush():
+                if event.data == DONE:
+                    return
+                yield event.data
+
+
+def parse_chunk(
+    data: bytes, chunk_format: ChunkFormat = "model"
+) -> ChatCompletionChunk | dict:
+    if chunk_format == "dict":
+        return json_backend.loads(data)
+
+    # Validating straight from the raw bytes skips building an intermediate dict.
+    return ChatCompletionChunk.model_validate_json(data)
+
+
+def parse_chunk_stream(
+    generator: Generator[bytes, None, None], chunk_format: ChunkFormat = "model"
+) -> Generator[ChatCompletionChunk | dict, None, None]:
+    for data in generator:
+        yield parse_chunk(data, chunk_format)
+
+
+async def parse_chunk_stream_async(
+    generator: AsyncGenerator[bytes, None], chunk_format: ChunkFormat = "model"
+) -> AsyncGenerator[ChatCompletionChunk | dict, None]:
+    async for data in generator:
+        yield parse_chunk(data, chunk_format)
@@ -0,0 +1,69 @@
+import json
+from typing import Any, Callable, Literal
+
+JSONBackendName = Literal["orjson", "msgspec", "json"]
+
+# Auto-detection order, fastest first. "json" (stdlib) is always available.
+JSON_BACKENDS: tuple[JSONBackendName, ...] = ("orjson", "msgspec", "json")
+
+# Both functions are rebound by set_backend, so always call them through the
+# module (json_backend.dumps) rather than importing them by name.
+# dumps returns compact UTF-8 bytes; loads accepts bytes or str and raises
+# json.JSONDecodeError on invalid input regardless of backend.
+dumps: Callable[[Any], bytes]
+loads: Callable[[bytes | str], Any]
+backend: JSONBackendName
+
+
+def _load_backend(
+    name: JSONBackendName,
+) -> tuple[Callable[[Any], bytes], Callable[[bytes | str], Any]]:
+    if name == "orjson":
+        import orjson
+
+        return orjson.dumps, orjson.loads
+
+    if name == "msgspec":
+        import msgspec
+
+        encoder = msgspec.json.Encoder()
+        decoder = msgspec.json.Decoder()
+
+        def msgspec_loads(data: bytes | str) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                raise json.JSONDecodeError(str(e), str(data), 0) from None
+
+        return encoder.encode, msgspec_loads
+
+    if name == "json":
+
+        def json_dumps(obj: Any) -> bytes:
+            return json.dumps(obj, separators=(",", ":")).encode()
+
+        return json_dumps, json.loads
+
+    raise ValueError(f"Error: Unknown JSON backend {name}")
+
+
+def set_backend(name: JSONBackendName | None = None) -> JSONBackendName:
+    global dumps, loads, backend
+
+    if name is not None:
+        dumps, loads = _load_backend(name)
+        backend = name
+        return backend
+
+    for candidate in JSON_BACKENDS:
+        try:
+            dumps, loads = _load_backend(candidate)
+        except ImportError:
+            continue
+        backend = candidate
+        return backend
+
+    raise RuntimeError("Error: No JSON backend available")
+
+
+set_backend()
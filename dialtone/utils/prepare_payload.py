@@ -1,5 +1,13 @@
-from typing import Any
-from dialtone.types import ChatMessage, Tool, DialtoneClient
+from typing import Any, Optional
+from dialtone.types import (
+    LLM,
+    BatchRequest,
+    ChatMessage,
+    Provider,
+    Tool,
+    DialtoneClient,
+)
+from dialtone.utils import json_backend
 
 
 def prepare_chat_message(message: ChatMessage | dict[str, Any]) -> dict:
@@ -26,50 +34,169 @@ def prepare_tool(tool: Tool | dict[str, Any]) -> dict:
     return tool.model_dump()
 
 
-def prepare_chat_completion(
-    client: DialtoneClient,
-    messages: list[ChatMessage] | list[dict[str, Any]],
-    stream: bool = False,
-    tools: list[Tool] | list[dict] = [],
-) -> tuple[dict, dict]:
-    headers = {"Authorization": f"Bearer {client.api_key}"}
+def prepare_batch_request(
+    request: BatchRequest | dict[str, Any] | list | bytes | str,
+) -> BatchRequest:
+    if isinstance(request, BatchRequest):
+        return request
+    if isinstance(request, (bytes, str)):
+        request = json_backend.loads(request)
+    if isinstance(request, list):
+        return BatchRequest(messages=request)
+    return BatchRequest(**request)
+
+
+# The part of the payload that only depends on the client config. The result
+# is cached on the client and shared between requests, so it must not be mutated.
+def prepare_static_params(client: DialtoneClient) -> dict:
+    revision = client.revision
+    if client._static_params and client._static_params[0] == revision:
+        return client._static_params[1]
+
     params = {
-        "messages": [prepare_chat_message(message) for message in messages],
         "dials": client.dials.model_dump(),
         "provider_config": client.provider_config.model_dump(),
     }
-    if stream:
-        params["stream"] = True
     if client.router_model_config:
         params["router_model_config"] = client.router_model_config.model_dump()
     if client.fallback_config:
         params["fallback_config"] = client.fallback_config.model_dump()
     if client.tools_config:
         params["tools_config"] = client.tools_config.model_dump()
+
+    client._static_params = (revision, params)
+    return params
+
+
+# Encodes a JSON object without the surrounding braces so that it can be
+# spliced together with other pre-encoded members.
+def encode_members(params: dict) -> bytes:
+    return json_backend.dumps(params)[1:-1]
+
+
+# Pre-encoded counterpart of prepare_static_params, cached the same way and
+# re-encoded when json_backend.set_backend switches encoders.
+def encode_static_params(client: DialtoneClient) -> bytes:
+    key = (client.revision, json_backend.dumps)
+    if client._static_content and client._static_content[0] == key:
+        return client._static_content[1]
+
+    content = encode_members(prepare_static_params(client))
+
+    client._static_content = (key, content)
+    return content
+
+
+# encoded_messages is an already encoded JSON array of messages, e.g. from a
+# Conversation, which is spliced in instead of params["messages"].
+def encode_payload(
+    client: DialtoneClient,
+    params: dict,
+    exclude_models: list[LLM] = [],
+    include_models: list[LLM] = [],
+    encoded_messages: Optional[bytes] = None,
+    model_providers: dict[str, dict[str, list[Provider]]] = {},
+) -> bytes:
+    members = [encode_members(params)] if params else []
+    if encoded_messages is not None:
+        members.insert(0, b'"messages":' + encoded_messages)
+    if exclude_models or include_models or model_providers:
+        members.append(
+            encode_static_params_with_router_models(
+                client, exclude_models, include_models, model_providers
+            )
+        )
+    else:
+        members.append(encode_static_params(client))
+
+    return b"{" + b",".join(members) + b"}"
+
+
+# Slow path for requests that exclude models on top of the client's
+# router_model_config, pin the models to route to or override the provider
+# lists of some models (by RouterModelConfig field), which can't reuse the
+# cached static params.
+def encode_static_params_with_router_models(
+    client: DialtoneClient,
+    exclude_models: list[LLM],
+    include_models: list[LLM] = [],
+    model_providers: dict[str, dict[str, list[Provider]]] = {},
+) -> bytes:
+    static_params = prepare_static_params(client)
+    router_model_config = static_params.get("router_model_config") or {}
+    router_model_config = {
+        **router_model_config,
+        "exclude_models": list(
+            dict.fromkeys(
+                [*router_model_config.get("exclude_models", []), *exclude_models]
+            )
+        ),
+    }
+    if include_models:
+        router_model_config["include_models"] = include_models
+    for field, provider_lists in model_providers.items():
+        router_model_config[field] = {
+            **router_model_config.get(field, {}),
+            **provider_lists,
+        }
+
+    return encode_members({**static_params, "router_model_config": router_model_config})
+
+
+def prepare_chat_completion(
+    client: DialtoneClient,
+    messages: list[ChatMessage] | list[dict[str, Any]],
+    stream: bool = False,
+    tools: list[Tool] | list[dict] = [],
+    exclude_models: list[LLM] = [],
+    include_models: list[LLM] = [],
+    encoded_messages: Optional[bytes] = None,
+    model_providers: dict[str, dict[str, list[Provider]]] = {},
+) -> tuple[dict, bytes]:
+    headers = {
+        "Authorization": f"Bearer {client.api_key}",
+        "Content-Type": "application/json",
+    }
+    params: dict[str, Any] = {}
+    if encoded_messages is None:
+        params["messages"] = [prepare_chat_message(message) for message in messages]
+    if stream:
+        params["stream"] = True
     if tools:
         params["tools"] = [prepare_tool(tool) for tool in tools]
 
-    return headers, params
+    return headers, encode_payload(
+        client,
+        params,
+        exclude_models,
+        include_models,
+        encoded_messages,
+        model_providers,
+    )
 
 
 def prepare_chat_route(
     client: DialtoneClient,
     messages: list[ChatMessage] | list[dict[str, Any]],
-    tools: list[Tool] = [],
-) -> tuple[dict, dict]:
-    headers = {"Authorization": f"Bearer {client.api_key}"}
-    params = {
-        "messages": [prepare_chat_message(message) for message in messages],
-        "dials": client.dials.model_dump(),
-        "provider_config": client.provider_config.model_dump(),
+    tools: list[Tool] | list[dict] = [],
+    exclude_models: list[LLM] = [],
+    encoded_messages: Optional[bytes] = None,
+    model_providers: dict[str, dict[str, list[Provider]]] = {},
+) -> tuple[dict, bytes]:
+    headers = {
+        "Authorization": f"Bearer {client.api_key}",
+        "Content-Type": "application/json",
     }
-    if client.router_model_config:
-        params["router_model_config"] = client.router_model_config.model_dump()
-    if client.fallback_config:
-        params["fallback_config"] = client.fallback_config.model_dump()
-    if client.tools_config:
-        params["tools_config"] = client.tools_config.model_dump()
+    params: dict[str, Any] = {}
+    if encoded_messages is None:
+        params["messages"] = [prepare_chat_message(message) for message in messages]
     if tools:
-        params["tools"] = [tool.model_dump() for tool in tools]
+        params["tools"] = [prepare_tool(tool) for tool in tools]
 
-    return headers, params
+    return headers, encode_payload(
+        client,
+        params,
+        exclude_models,
+        encoded_messages=encoded_messages,
+        model_providers=model_providers,
+    )
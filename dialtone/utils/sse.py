@@ -0,0 +1,111 @@
+from typing import NamedTuple, Optional
+
+DONE = b"[DONE]"
+
+
+class ServerSentEvent(NamedTuple):
+    data: bytes
+    event: Optional[str] = None
+    id: Optional[str] = None
+
+
+class SSEDecoder:
+    # Incremental server-sent events parser operating on raw bytes. Chunks may
+    # split lines (or a CRLF pair) anywhere; partial lines are buffered until
+    # the rest arrives. Shared by the sync and async streaming requests.
+    #
+    # Lines that are not SSE fields but look like bare JSON (newline-delimited
+    # JSON) are dispatched as events on their own for backwards compatibility.
+
+    def __init__(self):
+        self._buffer = b""
+        self._data: list[bytes] = []
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+        self._last_id: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> list[ServerSentEvent]:
+        if self._buffer:
+            chunk = self._buffer + chunk
+            self._buffer = b""
+
+        lines = chunk.splitlines(keepends=True)
+        # A trailing "\r" may be the first half of a "\r\n" pair.
+        if lines and not lines[-1].endswith(b"\n"):
+            self._buffer = lines.pop()
+
+        events: list[ServerSentEvent] = []
+        data = self._data
+        for line in lines:
+            line = line.rstrip(b"\r\n")
+            # Fast path for the common "data: ..." line and event boundary.
+            if line.startswith(b"data: "):
+                data.append(line[6:])
+            elif not line:
+                if len(data) == 1 and self._event is None and self._id is None:
+                    events.append(ServerSentEvent(data[0], None, self._last_id))
+                    data.clear()
+                else:
+                    event = self._dispatch()
+                    if event is not None:
+                        events.append(event)
+                    data = self._data
+            else:
+                event = self._process_line(line)
+                if event is not None:
+                    events.append(event)
+
+        return events
+
+    def flush(self) -> list[ServerSentEvent]:
+        events: list[ServerSentEvent] = []
+        if self._buffer:
+            event = self._process_line(self._buffer.rstrip(b"\r\n"))
+            self._buffer = b""
+            if event is not None:
+                events.append(event)
+
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+
+        return events
+
+    def _process_line(self, line: bytes) -> Optional[ServerSentEvent]:
+        if not line:
+            return self._dispatch()
+
+        if line.startswith(b":"):
+            return None
+
+        if line.startswith((b"{", b"[")):
+            return ServerSentEvent(data=line, id=self._last_id)
+
+        field, _, value = line.partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+
+        if field == b"data":
+            self._data.append(value)
+        elif field == b"event":
+            self._event = value.decode()
+        elif field == b"id" and b"\0" not in value:
+            self._id = value.decode()
+
+        return None
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if self._id is not None:
+            self._last_id = self._id
+            self._id = None
+
+        if not self._data:
+            self._event = None
+            return None
+
+        data = self._data[0] if len(self._data) == 1 else b"\n".join(self._data)
+        event = ServerSentEvent(data=data, event=self._event, id=self._last_id)
+        self._data = []
+        self._event = None
+
+        return event
@@ -1,11 +1,14 @@
 import toml
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
 
 # This script builds the package
 
+
 def convert_version_specifier(version):
     if version.startswith("^") or version.startswith("~"):
-        return version[1:]
+        return ">=" + version[1:]
+    if version[:1].isdigit():
+        return "==" + version
     return version
 
 
@@ -16,14 +19,30 @@ dependencies = pyproject["tool"]["poetry"]["dependencies"]
 dependency_list = [
     f"{pkg}{convert_version_specifier(ver)}"
     for pkg, ver in dependencies.items()
-    if pkg != "python"
+    if pkg != "python" and isinstance(ver, str)
+]
+extras = {
+    extra: [
+        f"{pkg}{convert_version_specifier(dependencies[pkg]['version'])}"
+        for pkg in pkgs
+    ]
+    for extra, pkgs in pyproject["tool"]["poetry"].get("extras", {}).items()
+}
+scripts = [
+    f"{name}={target}"
+    for name, target in pyproject["tool"]["poetry"].get("scripts", {}).items()
 ]
 
 setup(
     name="dialtone",
     version=pyproject["tool"]["poetry"]["version"],
-    packages=find_packages(include=["dialtone.*"]),
+    # dialtone.dialtone and dialtone.utils have no __init__.py
+    packages=find_namespace_packages(
+        include=["dialtone", "dialtone.*"], exclude=["*.__pycache__"]
+    ),
     install_requires=dependency_list,
+    extras_require=extras,
+    entry_points={"console_scripts": scripts},
     author=pyproject["tool"]["poetry"]["authors"][0],
     description=pyproject["tool"]["poetry"]["description"],
 )
@@ -1,3 +1,153 @@
+import json
+import httpx
 import pytest
+from typing import Callable
+from dialtone import Dialtone, AsyncDialtone
+from dialtone.types import Dials, DialtoneClient, ProviderConfig
+from dialtone.utils import json_backend
 
 pytest_plugins = "pytest_asyncio"
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+@pytest.fixture
+def completion_payload() -> dict:
+    return {
+        "choices": [{"message": {"role": "assistant", "content": "Hello!"}}],
+        "model": "gpt-4o-mini-2024-07-18",
+        "provider": "openai",
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    }
+
+
+@pytest.fixture
+def route_payload() -> dict:
+    return {
+        "model": "gpt-4o-mini-2024-07-18",
+        "providers": ["openai"],
+        "quality_predictions": {"gpt-4o-mini-2024-07-18": 0.9},
+        "routing_strategy": "dials",
+    }
+
+
+@pytest.fixture
+def messages() -> list[dict]:
+    return [{"role": "user", "content": "Hello, world!"}]
+
+
+@pytest.fixture
+def provider_config() -> ProviderConfig:
+    return ProviderConfig(openai=ProviderConfig.OpenAI(api_key="test"))
+
+
+@pytest.fixture
+def tokens() -> list[str]:
+    return ["Hello", ",", " world", "!"]
+
+
+@pytest.fixture
+def make_chunk() -> Callable[..., dict]:
+    def make(token: str, usage: dict | None = None) -> dict:
+        return {
+            "model": "gpt-4o-mini-2024-07-18",
+            "provider": "openai",
+            "choices": [{"delta": {"role": "assistant", "content": token}}],
+            "usage": usage,
+        }
+
+    return make
+
+
+@pytest.fixture
+def make_stream_body() -> Callable[[list[dict]], bytes]:
+    def make(chunks: list[dict]) -> bytes:
+        body = b"".join(b"data: " + json_backend.dumps(c) + b"\n\n" for c in chunks)
+        return body + b"data: [DONE]\n\n"
+
+    return make
+
+
+# An SSE body streaming `tokens`, with usage on the last chunk
+@pytest.fixture
+def stream_body(tokens, make_chunk, make_stream_body) -> bytes:
+    chunks = [make_chunk(token) for token in tokens]
+    chunks[-1]["usage"] = {
+        "prompt_tokens": 3,
+        "completion_tokens": 4,
+        "total_tokens": 7,
+    }
+    return make_stream_body(chunks)
+
+
+# Answers /chat/route with route_payload, streamed completions with
+# stream_body and other completions with completion_payload
+@pytest.fixture
+def handler(completion_payload, route_payload, stream_body) -> Handler:
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/chat/route"):
+            return httpx.Response(200, json=route_payload)
+        if json.loads(request.content).get("stream"):
+            return httpx.Response(200, content=stream_body)
+        return httpx.Response(200, json=completion_payload)
+
+    return handle
+
+
+# Answers with completion_payload echoing the first message's content, and
+# rejects "Prompt 3" with a 400
+@pytest.fixture
+def echo_handler(completion_payload) -> Handler:
+    def handle(request: httpx.Request) -> httpx.Response:
+        content = json.loads(request.content)["messages"][0]["content"]
+        if content == "Prompt 3":
+            return httpx.Response(400, json={"detail": {"error_code": "bad_request"}})
+
+        completion = json.loads(json.dumps(completion_payload))
+        completion["choices"][0]["message"]["content"] = content
+        return httpx.Response(200, json=completion)
+
+    return handle
+
+
+# Factories for clients backed by a MockTransport serving `handler` (sync or
+# async). Pass http_client=None for a client that owns a real connection pool.
+@pytest.fixture
+def make_dialtone(handler, provider_config) -> Callable[..., Dialtone]:
+    def make(handler: Handler = handler, **kwargs) -> Dialtone:
+        kwargs.setdefault(
+            "http_client", httpx.Client(transport=httpx.MockTransport(handler))
+        )
+        return Dialtone(
+            api_key="test",
+            provider_config=provider_config,
+            base_url="http://dialtone.test",
+            **kwargs,
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_async_dialtone(handler, provider_config) -> Callable[..., AsyncDialtone]:
+    def make(handler: Handler = handler, **kwargs) -> AsyncDialtone:
+        kwargs.setdefault(
+            "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        return AsyncDialtone(
+            api_key="test",
+            provider_config=provider_config,
+            base_url="http://dialtone.test",
+            **kwargs,
+        )
+
+    return make
+
+
+@pytest.fixture
+def dialtone_client(provider_config) -> DialtoneClient:
+    return DialtoneClient(
+        api_key="test",
+        provider_config=provider_config,
+        dials=Dials(quality=0.5, cost=0.5),
+    )
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+import time
+import httpx
+import pytest
+from dialtone.errors import BadRequestError
+from dialtone.types import BatchRequest, ChatCompletion
+
+
+def make_requests(count: int) -> list:
+    return [[{"role": "user", "content": f"Prompt {i}"}] for i in range(count)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ordered", [False, True])
+async def test_async_batch_reports_results_and_errors(
+    ordered, make_async_dialtone, echo_handler
+):
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # Later prompts finish first to exercise ordering.
+        index = int(json.loads(request.content)["messages"][0]["content"].split()[1])
+        await asyncio.sleep(0.001 * (20 - index))
+        active -= 1
+        return echo_handler(request)
+
+    dialtone = make_async_dialtone(handler)
+
+    # Lists of messages and BatchRequest objects can be mixed.
+    requests = iter(make_requests(19) + [BatchRequest(messages=make_requests(20)[19])])
+    results = [
+        result
+        async for result in dialtone.chat.completions.batch(
+            requests, max_concurrency=4, ordered=ordered
+        )
+    ]
+
+    assert len(results) == 20
+    assert peak <= 4
+    if ordered:
+        assert [result.index for result in results] == list(range(20))
+
+    by_index = {result.index: result for result in results}
+    assert isinstance(by_index[3].error, BadRequestError)
+    assert by_index[3].response is None
+    assert isinstance(by_index[7].response, ChatCompletion)
+    assert by_index[7].response.choices[0].message.content == "Prompt 7"
+
+
+def test_sync_batch_runs_on_thread_pool(make_dialtone, echo_handler):
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return echo_handler(request)
+
+    dialtone = make_dialtone(handler)
+
+    results = list(
+        dialtone.chat.completions.batch(
+            ({"messages": messages} for messages in make_requests(12)),
+            max_concurrency=3,
+            ordered=True,
+        )
+    )
+
+    assert [result.index for result in results] == list(range(12))
+    assert peak <= 3
+    assert isinstance(results[3].error, BadRequestError)
+    assert results[11].response.choices[0].message.content == "Prompt 11"
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_positive_concurrency(
+    make_dialtone, make_async_dialtone, messages
+):
+    with pytest.raises(ValueError):
+        list(make_dialtone().chat.completions.batch([messages], max_concurrency=0))
+
+    with pytest.raises(ValueError):
+        async for _ in make_async_dialtone().chat.completions.batch(
+            [messages], max_concurrency=0
+        ):
+            pass
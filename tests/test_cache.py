@@ -0,0 +1,139 @@
+import time
+import httpx
+import pytest
+from dialtone.cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+)
+from dialtone.types import ChatCompletion, RouteDecision
+
+
+class CountingHandler:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return self.handler(request)
+
+
+@pytest.fixture
+def counting_handler(handler) -> CountingHandler:
+    return CountingHandler(handler)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", b"1")
+    backend.set("b", b"2")
+    backend.get("a")
+    backend.set("c", b"3")
+
+    assert backend.get("a") == b"1"
+    assert backend.get("b") is None
+    assert backend.get("c") == b"3"
+
+
+def test_memory_backend_respects_byte_budget_and_ttl():
+    backend = MemoryCacheBackend(max_entries=None, max_bytes=4, ttl=0.05)
+    backend.set("a", b"12")
+    backend.set("b", b"34")
+    backend.set("c", b"56")
+
+    assert backend.size_bytes == 4
+    assert backend.get("a") is None
+
+    time.sleep(0.06)
+    assert backend.get("c") is None
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    backend.set("a", b"1")
+    backend.close()
+
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), ttl=60)
+    assert backend.get("a") == b"1"
+    assert backend.get("b") is None
+    backend.close()
+
+
+def test_incomplete_backend_fails_on_construction():
+    class GetOnlyBackend(CacheBackend):
+        def get(self, key: str):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyBackend()
+
+
+def test_completion_is_served_from_cache(make_dialtone, counting_handler, messages):
+    cache = ResponseCache()
+    dialtone = make_dialtone(counting_handler, cache=cache)
+
+    first = dialtone.chat.completions.create(messages=messages)
+    second = dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.completions.create(messages=[{"role": "user", "content": "Hi!"}])
+
+    assert isinstance(second, ChatCompletion)
+    assert second == first
+    assert counting_handler.calls == 2
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (1, 2, 2)
+
+
+def test_stream_is_replayed_from_cache(
+    make_dialtone, counting_handler, messages, tokens
+):
+    cache = ResponseCache()
+    dialtone = make_dialtone(counting_handler, cache=cache)
+
+    # Abandoned streams are not cached.
+    stream = dialtone.chat.completions.create(messages=messages, stream=True)
+    next(stream)
+    stream.close()
+    assert cache.stats.stores == 0
+
+    first = list(dialtone.chat.completions.create(messages=messages, stream=True))
+    second = list(dialtone.chat.completions.create(messages=messages, stream=True))
+
+    assert [chunk.choices[0].delta.content for chunk in second] == tokens
+    assert second == first
+    assert counting_handler.calls == 2
+    assert cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_async_completion_and_stream_are_cached(
+    make_async_dialtone, counting_handler, messages, tokens
+):
+    cache = ResponseCache()
+    dialtone = make_async_dialtone(counting_handler, cache=cache)
+
+    for _ in range(2):
+        await dialtone.chat.completions.create(messages=messages)
+        stream = await dialtone.chat.completions.create(messages=messages, stream=True)
+        assert [chunk.choices[0].delta.content async for chunk in stream] == tokens
+
+    assert counting_handler.calls == 2
+    assert cache.stats.hits == 2
+
+
+def test_route_decision_is_served_from_cache(make_dialtone, counting_handler, messages):
+    route_cache = ResponseCache(MemoryCacheBackend(max_bytes=64 * 1024, ttl=60))
+    dialtone = make_dialtone(counting_handler, route_cache=route_cache)
+
+    first = dialtone.chat.route(messages=messages)
+    second = dialtone.chat.route(messages=messages)
+
+    assert isinstance(second, RouteDecision)
+    assert second == first
+    assert counting_handler.calls == 1
+    assert route_cache.stats.hits == 1
+
+    # Changing the dials changes the routing inputs.
+    dialtone.client.dials.quality = 0.5
+    dialtone.chat.route(messages=messages)
+    assert counting_handler.calls == 2
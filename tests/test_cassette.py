@@ -0,0 +1,156 @@
+import time
+import httpx
+import pytest
+from dialtone.cassette import (
+    AsyncRecordingTransport,
+    Cassette,
+    Interaction,
+    RecordingTransport,
+    ReplayTransport,
+)
+from dialtone.errors import CassetteMissError
+
+
+@pytest.fixture
+def replay(make_dialtone):
+    def make(transport: ReplayTransport):
+        return make_dialtone(http_client=httpx.Client(transport=transport))
+
+    return make
+
+
+@pytest.fixture
+def record(make_dialtone, handler, messages):
+    def make(path: str) -> Cassette:
+        cassette = Cassette(path)
+        transport = RecordingTransport(cassette, httpx.MockTransport(handler))
+        dialtone = make_dialtone(http_client=httpx.Client(transport=transport))
+        dialtone.chat.completions.create(messages=messages)
+        list(dialtone.chat.completions.create(messages=messages, stream=True))
+        dialtone.chat.route(messages=messages)
+        return cassette
+
+    return make
+
+
+@pytest.fixture
+def make_cassette(route_payload):
+    def make(headers_at: float, chunk_at: float) -> Cassette:
+        cassette = Cassette()
+        cassette.add(
+            Interaction(
+                method="POST",
+                path="/v0/chat/route",
+                request_hash="unused",
+                status=200,
+                headers=[("content-type", "application/json")],
+                headers_at=headers_at,
+                chunks=[
+                    (chunk_at, httpx.Response(200, json=route_payload).content.decode())
+                ],
+            )
+        )
+        return cassette
+
+    return make
+
+
+def test_records_interactions_to_file(tmp_path, record):
+    path = str(tmp_path / "cassette.jsonl")
+    cassette = record(path)
+
+    assert len(cassette) == 3
+    assert [i.path for i in cassette.interactions] == [
+        "/v0/chat/completions",
+        "/v0/chat/completions",
+        "/v0/chat/route",
+    ]
+    with open(path) as f:
+        assert len(f.readlines()) == 3
+    # Request headers carry the API key and are never written
+    with open(path) as f:
+        assert "Bearer" not in f.read()
+    assert len(Cassette(path)) == 3
+
+
+def test_replays_recorded_responses(
+    tmp_path, record, replay, messages, tokens, route_payload
+):
+    path = str(tmp_path / "cassette.jsonl")
+    record(path)
+    dialtone = replay(ReplayTransport(Cassette(path), speed=0))
+
+    completion = dialtone.chat.completions.create(messages=messages)
+    chunks = list(dialtone.chat.completions.create(messages=messages, stream=True))
+    route = dialtone.chat.route(messages=messages)
+
+    assert completion.choices[0].message.content == "Hello!"
+    assert [chunk.choices[0].delta.content for chunk in chunks] == tokens
+    assert route.model == route_payload["model"]
+
+
+@pytest.mark.asyncio
+async def test_async_record_and_replay(
+    tmp_path, make_async_dialtone, handler, messages, tokens
+):
+    path = str(tmp_path / "cassette.jsonl")
+    transport = AsyncRecordingTransport(Cassette(path), httpx.MockTransport(handler))
+    dialtone = make_async_dialtone(http_client=httpx.AsyncClient(transport=transport))
+    await dialtone.chat.completions.create(messages=messages)
+    async for _ in await dialtone.chat.completions.create(
+        messages=messages, stream=True
+    ):
+        pass
+
+    transport = ReplayTransport(Cassette(path), speed=0)
+    dialtone = make_async_dialtone(http_client=httpx.AsyncClient(transport=transport))
+    completion = await dialtone.chat.completions.create(messages=messages)
+    chunks = [
+        chunk
+        async for chunk in await dialtone.chat.completions.create(
+            messages=messages, stream=True
+        )
+    ]
+
+    assert completion.choices[0].message.content == "Hello!"
+    assert [chunk.choices[0].delta.content for chunk in chunks] == tokens
+
+
+def test_replay_reproduces_timing(make_cassette, replay, messages):
+    transport = ReplayTransport(make_cassette(0.05, 0.1), match="path")
+    start = time.monotonic()
+    replay(transport).chat.route(messages=messages)
+    assert time.monotonic() - start >= 0.1
+
+    transport = ReplayTransport(make_cassette(0.05, 0.1), speed=10, match="path")
+    start = time.monotonic()
+    replay(transport).chat.route(messages=messages)
+    assert time.monotonic() - start < 0.05
+
+
+def test_path_match_ignores_request_body(make_cassette, replay, route_payload):
+    dialtone = replay(ReplayTransport(make_cassette(0, 0), match="path"))
+    for content in ["one", "two"]:
+        route = dialtone.chat.route(messages=[{"role": "user", "content": content}])
+        assert route.model == route_payload["model"]
+
+
+def test_unrecorded_request_raises(make_cassette, replay, messages):
+    dialtone = replay(ReplayTransport(make_cassette(0, 0)))
+    with pytest.raises(CassetteMissError):
+        dialtone.chat.route(messages=messages)
+
+
+def test_path_match_keeps_streamed_and_plain_responses_apart(
+    tmp_path, record, replay, tokens
+):
+    path = str(tmp_path / "cassette.jsonl")
+    record(path)
+    dialtone = replay(ReplayTransport(Cassette(path), speed=0, match="path"))
+    messages = [{"role": "user", "content": "Something else"}]
+
+    for _ in range(2):
+        chunks = list(dialtone.chat.completions.create(messages=messages, stream=True))
+        completion = dialtone.chat.completions.create(messages=messages)
+        assert [chunk.choices[0].delta.content for chunk in chunks] == tokens
+        assert completion.choices[0].message.content == "Hello!"
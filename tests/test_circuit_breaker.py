@@ -0,0 +1,186 @@
+import json
+import time
+import httpx
+import pytest
+from dialtone.circuit_breaker import CircuitBreaker
+from dialtone.errors import (
+    BadRequestError,
+    CircuitOpenError,
+    InternalServerError,
+    ServiceUnavailableError,
+)
+from dialtone.types import LLM, Provider, RouterModelConfig
+
+PROVIDER_FAILURE = {
+    "detail": {
+        "error_code": "internal_server_error",
+        "message": "Provider failed",
+        "router_details": {"model": "gpt-4o-2024-05-13", "provider": "openai"},
+    }
+}
+
+
+def get_exclude_models(request: httpx.Request) -> list[str]:
+    return json.loads(request.content)["router_model_config"]["exclude_models"]
+
+
+def test_open_endpoint_circuit_fails_fast_until_probe_succeeds(
+    make_dialtone, messages, completion_payload
+):
+    calls = []
+    responses = [httpx.Response(503, text="unavailable")] * 2
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if responses:
+            return responses.pop(0)
+        return httpx.Response(200, json=completion_payload)
+
+    circuit_breaker = CircuitBreaker(min_requests=2, recovery_timeout=0.05)
+    dialtone = make_dialtone(handler, circuit_breaker=circuit_breaker)
+
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailableError):
+            dialtone.chat.completions.create(messages=messages)
+    assert circuit_breaker.get_state("chat/completions") == "open"
+
+    with pytest.raises(CircuitOpenError):
+        dialtone.chat.completions.create(messages=messages)
+    assert len(calls) == 2
+    assert circuit_breaker.stats.rejected == 1
+
+    time.sleep(0.06)
+    dialtone.chat.completions.create(messages=messages)
+    assert circuit_breaker.get_state("chat/completions") == "closed"
+    assert circuit_breaker.stats.closed == 1
+
+    # Other endpoints have their own circuit.
+    assert circuit_breaker.get_state("chat/route") == "closed"
+
+
+def test_client_errors_do_not_open_circuit(make_dialtone, messages):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, text="bad request")
+
+    circuit_breaker = CircuitBreaker(min_requests=2)
+    dialtone = make_dialtone(handler, circuit_breaker=circuit_breaker)
+
+    for _ in range(3):
+        with pytest.raises(BadRequestError):
+            dialtone.chat.completions.create(messages=messages)
+    assert circuit_breaker.get_state("chat/completions") == "closed"
+
+
+def test_failing_model_is_excluded_until_probe_succeeds(
+    make_dialtone, messages, completion_payload
+):
+    requests = []
+    responses = [httpx.Response(500, json=PROVIDER_FAILURE)] * 2
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if responses:
+            return responses.pop(0)
+        return httpx.Response(200, json={**completion_payload, "model": LLM.gpt_4o})
+
+    circuit_breaker = CircuitBreaker(min_requests=2, recovery_timeout=0.05)
+    dialtone = make_dialtone(
+        handler,
+        router_model_config=RouterModelConfig(exclude_models=[LLM.claude_3_haiku]),
+        circuit_breaker=circuit_breaker,
+    )
+
+    for _ in range(2):
+        with pytest.raises(InternalServerError):
+            dialtone.chat.completions.create(messages=messages)
+    assert circuit_breaker.get_model_state(LLM.gpt_4o, Provider.OpenAI) == "open"
+    # Dialtone itself responded, so the endpoint stays closed.
+    assert circuit_breaker.get_state("chat/completions") == "closed"
+
+    dialtone.chat.completions.create(messages=messages)
+    assert get_exclude_models(requests[-1]) == [LLM.claude_3_haiku, LLM.gpt_4o]
+    assert circuit_breaker.stats.excluded == 1
+
+    # Once half-open, one request goes out without the exclusion as a probe.
+    time.sleep(0.06)
+    dialtone.chat.completions.create(messages=messages)
+    assert get_exclude_models(requests[-1]) == [LLM.claude_3_haiku]
+    assert circuit_breaker.get_model_state(LLM.gpt_4o, Provider.OpenAI) == "closed"
+
+
+@pytest.mark.asyncio
+async def test_async_route_excludes_open_models(make_async_dialtone, messages):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500, json=PROVIDER_FAILURE)
+
+    circuit_breaker = CircuitBreaker(min_requests=1)
+    dialtone = make_async_dialtone(handler, circuit_breaker=circuit_breaker)
+
+    with pytest.raises(InternalServerError):
+        await dialtone.chat.route(messages=messages)
+    with pytest.raises(InternalServerError):
+        await dialtone.chat.route(messages=messages)
+    assert get_exclude_models(requests[0]) == []
+    assert get_exclude_models(requests[1]) == [LLM.gpt_4o]
+
+
+def test_model_is_excluded_only_once_all_its_providers_are_open(
+    make_dialtone, messages, completion_payload
+):
+    requests = []
+    failing = [Provider.Groq]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if failing:
+            provider = failing.pop(0)
+            return httpx.Response(
+                500,
+                json={
+                    "detail": {
+                        "error_code": "internal_server_error",
+                        "message": "Provider failed",
+                        "router_details": {
+                            "model": LLM.llama_3_70b,
+                            "provider": provider,
+                        },
+                    }
+                },
+            )
+        return httpx.Response(200, json=completion_payload)
+
+    circuit_breaker = CircuitBreaker(min_requests=1)
+    dialtone = make_dialtone(
+        handler,
+        router_model_config=RouterModelConfig(
+            llama_3_70b={
+                "tools_providers": [Provider.Groq],
+                "no_tools_providers": [Provider.Groq, Provider.Together],
+            }
+        ),
+        circuit_breaker=circuit_breaker,
+    )
+
+    with pytest.raises(InternalServerError):
+        dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.completions.create(messages=messages)
+    router_model_config = json.loads(requests[-1].content)["router_model_config"]
+    assert router_model_config["exclude_models"] == []
+    assert router_model_config["llama_3_70b"] == {
+        "tools_providers": [],
+        "no_tools_providers": [Provider.Together],
+    }
+
+    # Groq was the only provider left for requests with tools.
+    tools = [{"type": "function", "function": {"name": "get_weather"}}]
+    dialtone.chat.completions.create(messages=messages, tools=tools)
+    assert get_exclude_models(requests[-1]) == [LLM.llama_3_70b]
+
+    failing.append(Provider.Together)
+    with pytest.raises(InternalServerError):
+        dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.completions.create(messages=messages)
+    assert get_exclude_models(requests[-1]) == [LLM.llama_3_70b]
@@ -0,0 +1,173 @@
+import json
+import time
+import httpx
+import pytest
+from dialtone import Dialtone, cli
+
+
+# Keyword arguments of every Dialtone the CLI creates
+@pytest.fixture
+def dialtone_kwargs() -> list[dict]:
+    return []
+
+
+@pytest.fixture
+def mock_dialtone(monkeypatch, echo_handler, dialtone_kwargs):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content)["messages"][0]["content"])
+        return echo_handler(request)
+
+    http_client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def make(**kwargs) -> Dialtone:
+        dialtone_kwargs.append(kwargs)
+        return Dialtone(http_client=http_client, **kwargs)
+
+    monkeypatch.setattr(cli, "Dialtone", make)
+    return calls
+
+
+def write_input(path, count: int):
+    with open(path, "w") as f:
+        for i in range(count):
+            messages = [{"role": "user", "content": f"Prompt {i}"}]
+            line = messages if i % 2 else {"messages": messages}
+            f.write(json.dumps(line) + "\n")
+        f.write("\n")
+
+
+def run(tmp_path, *extra: str, **config) -> int:
+    path = tmp_path / "config.json"
+    path.write_text(
+        json.dumps({"provider_config": {"openai": {"api_key": "x"}}, **config})
+    )
+    return cli.main(
+        [
+            "batch",
+            str(tmp_path / "input.jsonl"),
+            str(tmp_path / "output.jsonl"),
+            "--config",
+            str(path),
+            "--api-key",
+            "test",
+            "--concurrency",
+            "4",
+            *extra,
+        ]
+    )
+
+
+def read_output(tmp_path) -> list[dict]:
+    with open(tmp_path / "output.jsonl") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_writes_results_in_order(tmp_path, mock_dialtone):
+    write_input(tmp_path / "input.jsonl", 10)
+
+    # "Prompt 3" is rejected by the mock server.
+    assert run(tmp_path) == 1
+
+    output = read_output(tmp_path)
+    assert [line["index"] for line in output] == list(range(10))
+    assert output[3]["error"]["type"] == "BadRequestError"
+    assert output[9]["response"]["choices"][0]["message"]["content"] == "Prompt 9"
+
+
+def test_batch_resumes_after_crash(tmp_path, mock_dialtone):
+    write_input(tmp_path / "input.jsonl", 10)
+    run(tmp_path)
+    mock_dialtone.clear()
+
+    # Simulate a crash: keep 6 complete lines and a torn 7th one.
+    lines = (tmp_path / "output.jsonl").read_bytes().splitlines(keepends=True)
+    (tmp_path / "output.jsonl").write_bytes(b"".join(lines[:6]) + lines[6][:10])
+
+    run(tmp_path)
+
+    assert mock_dialtone == [f"Prompt {i}" for i in range(6, 10)]
+    assert [line["index"] for line in read_output(tmp_path)] == list(range(10))
+
+
+def test_batch_applies_rate_limit(tmp_path, mock_dialtone):
+    write_input(tmp_path / "input.jsonl", 6)
+
+    start = time.monotonic()
+    run(tmp_path, "--requests-per-second", "50")
+
+    # The first request goes immediately, the rest are paced 20ms apart.
+    assert time.monotonic() - start >= 0.09
+    assert len(mock_dialtone) == 6
+
+
+def test_batch_reports_malformed_lines_and_resumes(tmp_path, mock_dialtone):
+    write_input(tmp_path / "input.jsonl", 10)
+    lines = (tmp_path / "input.jsonl").read_bytes().splitlines(keepends=True)
+    lines[5] = b'{"messages": [\n'
+    (tmp_path / "input.jsonl").write_bytes(b"".join(lines))
+
+    assert run(tmp_path) == 1
+    output = read_output(tmp_path)
+    assert [line["index"] for line in output] == list(range(10))
+    assert "error" in output[5]
+    assert "Prompt 5" not in mock_dialtone
+    mock_dialtone.clear()
+
+    # A rerun that reaches the malformed line records the error again.
+    output_lines = (tmp_path / "output.jsonl").read_bytes().splitlines(keepends=True)
+    (tmp_path / "output.jsonl").write_bytes(b"".join(output_lines[:4]))
+
+    assert run(tmp_path) == 1
+    output = read_output(tmp_path)
+    assert [line["index"] for line in output] == list(range(10))
+    assert "error" in output[5]
+    assert sorted(mock_dialtone) == [f"Prompt {i}" for i in (4, 6, 7, 8, 9)]
+
+
+def test_batch_requires_provider_config(tmp_path, mock_dialtone, capsys):
+    write_input(tmp_path / "input.jsonl", 2)
+
+    code = cli.main(
+        [
+            "batch",
+            str(tmp_path / "input.jsonl"),
+            str(tmp_path / "output.jsonl"),
+            "--api-key",
+            "test",
+        ]
+    )
+
+    assert code == 2
+    assert "provider_config" in capsys.readouterr().err
+    assert mock_dialtone == []
+
+
+def test_batch_flags_override_config(tmp_path, mock_dialtone, dialtone_kwargs):
+    write_input(tmp_path / "input.jsonl", 2)
+
+    assert run(tmp_path, base_url="http://config.test") == 0
+    assert dialtone_kwargs[-1]["base_url"] == "http://config.test"
+
+    run(
+        tmp_path,
+        "--base-url",
+        "http://flag.test",
+        "--requests-per-second",
+        "100",
+        "--overwrite",
+        base_url="http://config.test",
+        rate_limiter=None,
+    )
+    assert dialtone_kwargs[-1]["base_url"] == "http://flag.test"
+    assert dialtone_kwargs[-1]["rate_limiter"].requests_per_second == 100
+
+
+def test_batch_rejects_non_positive_concurrency(tmp_path, mock_dialtone):
+    write_input(tmp_path / "input.jsonl", 2)
+
+    with pytest.raises(SystemExit) as exit_info:
+        run(tmp_path, "--concurrency", "0")
+    assert exit_info.value.code == 2
+    assert mock_dialtone == []
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from dialtone.coalesce import RequestCoalescer
+from dialtone.errors import DeadlineExceededError, InternalServerError
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(
+    make_async_dialtone, messages, completion_payload, route_payload
+):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        if request.url.path.endswith("/chat/route"):
+            return httpx.Response(200, json=route_payload)
+        return httpx.Response(200, json=completion_payload)
+
+    coalescer = RequestCoalescer()
+    dialtone = make_async_dialtone(handler, coalescer=coalescer)
+
+    completions = await asyncio.gather(
+        *(dialtone.chat.completions.create(messages=messages) for _ in range(10))
+    )
+    routes = await asyncio.gather(
+        *(dialtone.chat.route(messages=messages) for _ in range(5))
+    )
+
+    assert all(completion is completions[0] for completion in completions)
+    assert all(route is routes[0] for route in routes)
+    assert sorted(calls) == ["/v0/chat/completions", "/v0/chat/route"]
+    assert (coalescer.stats.calls, coalescer.stats.coalesced) == (2, 13)
+
+    # Once the call has finished, a new request goes upstream again.
+    await dialtone.chat.completions.create(messages=messages)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_leader_cancellation_is_isolated(
+    make_async_dialtone, messages
+):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(500, text="boom")
+
+    dialtone = make_async_dialtone(handler, coalescer=RequestCoalescer())
+
+    leader = asyncio.ensure_future(dialtone.chat.completions.create(messages=messages))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(
+        dialtone.chat.completions.create(messages=messages)
+    )
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(InternalServerError):
+        await follower
+
+
+def test_sync_concurrent_identical_requests_share_one_call(
+    make_dialtone, messages, completion_payload
+):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        time.sleep(0.1)
+        return httpx.Response(200, json=completion_payload)
+
+    coalescer = RequestCoalescer()
+    dialtone = make_dialtone(handler, coalescer=coalescer)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                dialtone.chat.completions.create(messages=messages)
+            )
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert coalescer.stats.coalesced == 4
+
+
+def test_follower_stops_waiting_at_its_deadline():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    leader = threading.Thread(
+        target=coalescer.run, args=("key", lambda: release.wait(2))
+    )
+    leader.start()
+    while not coalescer.stats.calls:
+        time.sleep(0.001)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        coalescer.run("key", lambda: None, deadline=time.monotonic() + 0.05)
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    leader.join()
+
+
+@pytest.mark.asyncio
+async def test_async_follower_stops_waiting_at_its_deadline():
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def fn():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.ensure_future(coalescer.run_async("key", fn))
+    await asyncio.sleep(0)
+
+    with pytest.raises(DeadlineExceededError):
+        await coalescer.run_async("key", fn, deadline=time.monotonic() + 0.05)
+
+    # The upstream call is not cancelled for the others.
+    release.set()
+    assert await leader == "done"
@@ -0,0 +1,129 @@
+import json
+import httpx
+import pytest
+import dialtone.conversation
+from dialtone.conversation import Conversation
+from dialtone.types import ChatMessage
+from dialtone.utils.prepare_payload import prepare_chat_completion, prepare_chat_route
+
+HISTORY = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Hello, world!"},
+]
+
+
+@pytest.fixture
+def requests() -> list[dict]:
+    return []
+
+
+@pytest.fixture
+def recording_handler(handler, requests):
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return handler(request)
+
+    return handle
+
+
+def test_payload_matches_message_list(dialtone_client):
+    messages = [ChatMessage(**message) for message in HISTORY]
+    conversation = Conversation(HISTORY)
+
+    for prepare in (prepare_chat_completion, prepare_chat_route):
+        _, expected = prepare(client=dialtone_client, messages=messages)
+        _, content = prepare(
+            client=dialtone_client,
+            messages=[],
+            encoded_messages=conversation.encode(),
+        )
+        assert content == expected
+
+
+def test_messages_are_encoded_once(
+    monkeypatch, requests, recording_handler, make_dialtone
+):
+    calls = []
+    prepare_chat_message = dialtone.conversation.prepare_chat_message
+    monkeypatch.setattr(
+        dialtone.conversation,
+        "prepare_chat_message",
+        lambda message: calls.append(message) or prepare_chat_message(message),
+    )
+    client = make_dialtone(recording_handler)
+    conversation = client.chat.conversation(HISTORY)
+
+    conversation.create()
+    conversation.append({"role": "user", "content": "And again"})
+    conversation.create()
+
+    # Two initial messages, two responses and one follow-up
+    assert len(calls) == 5
+    assert [m["role"] for m in requests[1]["messages"]] == [
+        "system",
+        "user",
+        "assistant",
+        "user",
+    ]
+    assert len(conversation) == 5
+    assert conversation[-1].content == "Hello!"
+
+
+def test_stream_appends_accumulated_response(recording_handler, make_dialtone):
+    client = make_dialtone(recording_handler)
+    conversation = client.chat.conversation(HISTORY)
+
+    chunks = list(conversation.create(stream=True))
+
+    assert len(chunks) == 4
+    assert conversation[-1].role == "assistant"
+    assert conversation[-1].content == "Hello, world!"
+
+
+def test_route_accepts_conversation(
+    requests, recording_handler, make_dialtone, route_payload
+):
+    client = make_dialtone(recording_handler)
+    conversation = Conversation(HISTORY)
+
+    route = client.chat.route(messages=conversation)
+    client.chat.completions.create(messages=conversation)
+
+    assert route.model == route_payload["model"]
+    for params in requests:
+        assert [(m["role"], m["content"]) for m in params["messages"]] == [
+            (m["role"], m["content"]) for m in HISTORY
+        ]
+
+
+def test_unbound_conversation_cannot_create():
+    with pytest.raises(ValueError):
+        Conversation(HISTORY).create()
+
+
+def test_copy_is_independent():
+    conversation = Conversation(HISTORY)
+    snapshot = conversation.copy()
+    conversation.append({"role": "user", "content": "More"})
+
+    assert len(snapshot) == 2
+    assert len(json.loads(snapshot.encode())) == 2
+    assert len(json.loads(conversation.encode())) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_conversation_appends_responses(
+    requests, recording_handler, make_async_dialtone
+):
+    client = make_async_dialtone(recording_handler)
+    conversation = client.chat.conversation(HISTORY)
+
+    await conversation.create()
+    async for _ in await conversation.create(stream=True):
+        pass
+
+    assert [message.content for message in conversation][2:] == [
+        "Hello!",
+        "Hello, world!",
+    ]
+    assert len(requests[1]["messages"]) == 3
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from dialtone.hedge import HedgePolicy
+from dialtone.metrics import MetricsHook, RequestMetrics
+
+
+@pytest.mark.asyncio
+async def test_async_hedge_wins_and_cancels_slow_request(
+    make_async_dialtone, messages, completion_payload
+):
+    calls = []
+    cancelled = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(request)
+                raise
+        return httpx.Response(200, json=completion_payload)
+
+    hedge_policy = HedgePolicy(delay=0.02, max_extra_load=1)
+    dialtone = make_async_dialtone(handler, hedge_policy=hedge_policy)
+
+    start = time.monotonic()
+    response = await dialtone.chat.completions.create(messages=messages)
+    assert time.monotonic() - start < 1
+    assert response.choices[0].message.content == "Hello!"
+    assert len(calls) == 2
+    await asyncio.sleep(0)
+    assert len(cancelled) == 1
+    assert hedge_policy.stats.hedged == 1
+    assert hedge_policy.stats.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_async_fast_requests_are_not_hedged(
+    make_async_dialtone, messages, completion_payload
+):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=completion_payload)
+
+    hedge_policy = HedgePolicy(delay=1, max_extra_load=1)
+    dialtone = make_async_dialtone(handler, hedge_policy=hedge_policy)
+
+    for _ in range(3):
+        await dialtone.chat.completions.create(messages=messages)
+    assert len(calls) == 3
+    assert hedge_policy.stats.requests == 3
+    assert hedge_policy.stats.hedged == 0
+
+
+@pytest.mark.asyncio
+async def test_async_hedges_are_capped_by_extra_load(
+    make_async_dialtone, messages, completion_payload
+):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.03)
+        return httpx.Response(200, json=completion_payload)
+
+    hedge_policy = HedgePolicy(delay=0.001, max_extra_load=0.25)
+    dialtone = make_async_dialtone(handler, hedge_policy=hedge_policy)
+
+    for _ in range(8):
+        await dialtone.chat.completions.create(messages=messages)
+    assert hedge_policy.stats.hedged == 2
+    assert hedge_policy.stats.budget_exhausted == 6
+
+
+def test_sync_hedge_wins(make_dialtone, messages, completion_payload):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(0.5)
+        return httpx.Response(200, json=completion_payload)
+
+    hedge_policy = HedgePolicy(delay=0.02, max_extra_load=1)
+    dialtone = make_dialtone(handler, hedge_policy=hedge_policy)
+
+    start = time.monotonic()
+    dialtone.chat.completions.create(messages=messages)
+    assert time.monotonic() - start < 0.4
+    assert hedge_policy.stats.hedge_wins == 1
+
+
+def test_sync_hedge_records_each_attempt(make_dialtone, messages, completion_payload):
+    calls = []
+    finished: list[RequestMetrics] = []
+
+    class Hook(MetricsHook):
+        def on_request(self, metrics: RequestMetrics):
+            finished.append(metrics)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(0.3)
+            return httpx.Response(500, json={"detail": "slow"})
+        return httpx.Response(200, json=completion_payload)
+
+    hedge_policy = HedgePolicy(delay=0.02, max_extra_load=1)
+    dialtone = make_dialtone(handler, hedge_policy=hedge_policy, hooks=[Hook()])
+    dialtone.chat.completions.create(messages=messages)
+
+    (metrics,) = finished
+    assert metrics.attempts == 2
+    assert metrics.status_code == 200
+    assert metrics.bytes_sent == 2 * len(calls[0].content)
+
+
+def test_sync_hedging_does_not_cap_concurrency(
+    make_dialtone, messages, completion_payload
+):
+    # More concurrent calls than any fixed pool size, all of which must be in
+    # flight at once to pass the barrier.
+    barrier = threading.Barrier(40, timeout=2)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        barrier.wait()
+        return httpx.Response(200, json=completion_payload)
+
+    hedge_policy = HedgePolicy(delay=5, max_extra_load=1)
+    dialtone = make_dialtone(handler, hedge_policy=hedge_policy)
+
+    with ThreadPoolExecutor(max_workers=40) as executor:
+        futures = [
+            executor.submit(dialtone.chat.completions.create, messages=messages)
+            for _ in range(40)
+        ]
+        for future in futures:
+            future.result()
+    assert hedge_policy.stats.hedged == 0
+
+
+def test_delay_follows_observed_percentile():
+    hedge_policy = HedgePolicy(min_samples=10)
+    for latency in range(1, 21):
+        hedge_policy._record_latency(latency / 100)
+
+    assert hedge_policy._start_request() == 0.19
+    assert hedge_policy.stats.current_delay == 0.19
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from dialtone.types import ChatCompletion, HTTPConfig, RouteDecision
+from dialtone.utils.api import create_async_http_client, create_http_client
+
+
+def test_calls_share_http_client(make_dialtone, handler, messages):
+    http_client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    with make_dialtone(http_client=http_client) as dialtone:
+        assert dialtone.chat.http_client is http_client
+        assert dialtone.chat.completions.http_client is http_client
+
+        assert isinstance(
+            dialtone.chat.completions.create(messages=messages), ChatCompletion
+        )
+        assert isinstance(dialtone.chat.route(messages=messages), RouteDecision)
+
+    # Borrowed clients are left open for the caller to manage.
+    assert not http_client.is_closed
+    http_client.close()
+
+
+def test_owned_http_client_is_closed(make_dialtone):
+    dialtone = make_dialtone(http_client=None, http_config={"max_connections": 4})
+    dialtone.close()
+
+    assert dialtone.http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_async_calls_share_http_client(make_async_dialtone, handler, messages):
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async with make_async_dialtone(http_client=http_client) as dialtone:
+        assert isinstance(
+            await dialtone.chat.completions.create(messages=messages), ChatCompletion
+        )
+        assert isinstance(await dialtone.chat.route(messages=messages), RouteDecision)
+
+    assert not http_client.is_closed
+    await http_client.aclose()
+
+    dialtone = make_async_dialtone(http_client=None)
+    await dialtone.aclose()
+    assert dialtone.http_client.is_closed
+
+
+def test_http2_config():
+    # httpx keeps the protocol settings on the underlying httpcore pool
+    pool = create_http_client(HTTPConfig(http2=True))._transport._pool
+    assert (pool._http1, pool._http2) == (True, True)
+
+    pool = create_async_http_client(
+        HTTPConfig(http2=True, http1=False)
+    )._transport._pool
+    assert (pool._http1, pool._http2) == (False, True)
+
+    pool = create_http_client(HTTPConfig())._transport._pool
+    assert (pool._http1, pool._http2) == (True, False)
@@ -0,0 +1,75 @@
+import importlib.util
+import json
+import pytest
+from dialtone.types import DialtoneClient, LLM, ProviderConfig, RouterModelConfig
+from dialtone.utils import json_backend
+from dialtone.utils.prepare_payload import prepare_chat_completion
+
+AVAILABLE_BACKENDS = [
+    name
+    for name in json_backend.JSON_BACKENDS
+    if name == "json" or importlib.util.find_spec(name)
+]
+
+
+@pytest.fixture(params=AVAILABLE_BACKENDS)
+def backend(request):
+    previous = json_backend.backend
+    json_backend.set_backend(request.param)
+    yield request.param
+    json_backend.set_backend(previous)
+
+
+def test_backend_round_trip(backend):
+    payload = {"model": LLM.gpt_4o, "choices": [{"content": "héllo"}], "n": 1}
+
+    encoded = json_backend.dumps(payload)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == {
+        "model": "gpt-4o-2024-05-13",
+        "choices": [{"content": "héllo"}],
+        "n": 1,
+    }
+    assert json_backend.loads(encoded) == json_backend.loads(encoded.decode())
+
+
+def test_backend_raises_json_decode_error(backend):
+    with pytest.raises(json.JSONDecodeError):
+        json_backend.loads(b"not json")
+
+
+def test_backend_encodes_request_payload(backend, provider_config):
+    client = DialtoneClient(
+        api_key="test",
+        provider_config=provider_config,
+        router_model_config=RouterModelConfig(exclude_models=[LLM.gpt_4o]),
+    )
+
+    _, content = prepare_chat_completion(
+        client=client, messages=[{"role": "user", "content": "Hello, world!"}]
+    )
+    params = json.loads(content)
+    assert params["router_model_config"]["exclude_models"] == ["gpt-4o-2024-05-13"]
+    assert params["messages"] == [{"role": "user", "content": "Hello, world!"}]
+
+
+def test_set_backend_invalidates_cached_content():
+    pytest.importorskip("orjson")
+    client = DialtoneClient(
+        api_key="test",
+        provider_config=ProviderConfig(openai=ProviderConfig.OpenAI(api_key="clé")),
+    )
+    messages = [{"role": "user", "content": "Hello, world!"}]
+
+    previous = json_backend.backend
+    try:
+        # orjson writes UTF-8 as is, the stdlib escapes non-ASCII characters
+        json_backend.set_backend("orjson")
+        _, content = prepare_chat_completion(client=client, messages=messages)
+        assert "clé".encode() in content
+
+        json_backend.set_backend("json")
+        _, content = prepare_chat_completion(client=client, messages=messages)
+        assert b"cl\\u00e9" in content
+    finally:
+        json_backend.set_backend(previous)
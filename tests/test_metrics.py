@@ -0,0 +1,190 @@
+import httpx
+import pytest
+from dialtone.cache import MemoryCacheBackend, ResponseCache
+from dialtone.metrics import (
+    Histogram,
+    InMemoryMetrics,
+    MetricsHook,
+    RequestMetrics,
+)
+
+
+class RecordingHook(MetricsHook):
+    def __init__(self):
+        self.metrics: list[RequestMetrics] = []
+
+    def on_request(self, metrics: RequestMetrics):
+        self.metrics.append(metrics)
+
+
+def test_completion_metrics(make_dialtone, messages):
+    hook = RecordingHook()
+    in_memory = InMemoryMetrics()
+    dialtone = make_dialtone(hooks=[hook, in_memory])
+
+    dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.route(messages=messages)
+
+    completion, route = hook.metrics
+    assert completion.endpoint == "chat/completions"
+    assert completion.model == "gpt-4o-mini-2024-07-18"
+    assert completion.provider == "openai"
+    assert completion.usage.total_tokens == 5
+    assert completion.status_code == 200
+    assert completion.attempts == 1
+    assert completion.bytes_sent > 0
+    assert completion.bytes_received > 0
+    assert 0 <= completion.payload_seconds <= completion.total_seconds
+    assert route.endpoint == "chat/route"
+    assert route.model == "gpt-4o-mini-2024-07-18"
+
+    snapshot = in_memory.snapshot()
+    assert snapshot["chat/completions"].requests == 1
+    assert snapshot["chat/completions"].models == {"gpt-4o-mini-2024-07-18/openai": 1}
+    assert snapshot["chat/completions"].prompt_tokens == 3
+    assert snapshot["chat/completions"].histograms["total_seconds"].count == 1
+    assert snapshot["chat/route"].requests == 1
+
+
+def test_stream_metrics(make_dialtone, messages, tokens, stream_body):
+    hook = RecordingHook()
+    dialtone = make_dialtone(
+        lambda request: httpx.Response(200, content=stream_body), hooks=[hook]
+    )
+
+    chunks = dialtone.chat.completions.create(messages=messages, stream=True)
+    assert hook.metrics == []
+    list(chunks)
+
+    (metrics,) = hook.metrics
+    assert metrics.stream
+    assert metrics.chunks == len(tokens)
+    assert metrics.chunks_per_second > 0
+    assert metrics.usage.total_tokens == 7
+    assert metrics.bytes_received == len(stream_body)
+    assert metrics.ttfb_seconds <= metrics.first_chunk_seconds
+    assert metrics.first_chunk_seconds <= metrics.total_seconds
+
+
+def test_error_metrics(make_dialtone, messages):
+    in_memory = InMemoryMetrics()
+    dialtone = make_dialtone(
+        lambda request: httpx.Response(400, text="bad request"), hooks=[in_memory]
+    )
+
+    with pytest.raises(Exception):
+        dialtone.chat.completions.create(messages=messages)
+
+    assert in_memory.snapshot()["chat/completions"].errors == {"BadRequestError": 1}
+
+
+def test_cached_metrics(make_dialtone, messages):
+    hook = RecordingHook()
+    dialtone = make_dialtone(
+        cache=ResponseCache(MemoryCacheBackend()),
+        hooks=[hook],
+    )
+
+    dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.completions.create(messages=messages)
+
+    assert [metrics.cached for metrics in hook.metrics] == [False, True]
+    assert hook.metrics[1].attempts == 0
+    assert hook.metrics[1].model == "gpt-4o-mini-2024-07-18"
+
+
+@pytest.mark.asyncio
+async def test_async_route_metrics(make_async_dialtone, messages, route_payload):
+    in_memory = InMemoryMetrics()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=route_payload)
+
+    dialtone = make_async_dialtone(handler, hooks=[in_memory])
+
+    await dialtone.chat.route(messages=messages)
+    await dialtone.chat.route(messages=messages)
+
+    histogram = in_memory.get_histogram("chat/route", "total_seconds")
+    assert histogram.count == 2
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(1.0, 2.0, 3.0, 4.0))
+    for value in [0.5, 1.5, 1.5, 2.5, 3.5, 10.0]:
+        histogram.observe(value)
+
+    assert histogram.quantile(0) == 0.5
+    assert histogram.quantile(0.5) == 2.0
+    assert histogram.quantile(1) == 10.0
+    snapshot = histogram.snapshot()
+    assert snapshot.count == 6
+    assert snapshot.sum == 19.5
+    assert Histogram().quantile(0.5) is None
+
+
+def test_prometheus_metrics(make_dialtone, messages):
+    prometheus_client = pytest.importorskip("prometheus_client")
+    from dialtone.metrics import PrometheusMetrics
+
+    registry = prometheus_client.CollectorRegistry()
+    dialtone = make_dialtone(hooks=[PrometheusMetrics(registry=registry)])
+
+    dialtone.chat.completions.create(messages=messages)
+
+    labels = {
+        "endpoint": "chat/completions",
+        "model": "gpt-4o-mini-2024-07-18",
+        "provider": "openai",
+        "stream": "false",
+        "status": "ok",
+    }
+    assert (
+        registry.get_sample_value(
+            "dialtone_requests_total", {**labels, "cached": "false"}
+        )
+        == 1
+    )
+    assert (
+        registry.get_sample_value("dialtone_tokens_total", {**labels, "type": "prompt"})
+        == 3
+    )
+    assert registry.get_sample_value("dialtone_total_seconds_count", labels) == 1
+
+
+def test_opentelemetry_metrics(make_dialtone, messages):
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+    from dialtone.metrics import OpenTelemetryMetrics
+
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter("test")
+    dialtone = make_dialtone(hooks=[OpenTelemetryMetrics(meter=meter)])
+
+    dialtone.chat.completions.create(messages=messages)
+
+    (resource_metrics,) = reader.get_metrics_data().resource_metrics
+    metrics = {
+        metric.name: metric
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+    }
+    assert metrics["dialtone.requests"].data.data_points[0].value == 1
+    assert metrics["dialtone.total_seconds"].data.data_points[0].count == 1
+
+
+def test_hook_may_only_implement_request_start(make_dialtone, handler, messages):
+    class HeaderHook(MetricsHook):
+        def on_request_start(self, metrics: RequestMetrics, headers: dict[str, str]):
+            headers["x-request-tag"] = "batch"
+
+    requests = []
+
+    def recording_handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return handler(request)
+
+    dialtone = make_dialtone(recording_handler, hooks=[HeaderHook()])
+    dialtone.chat.completions.create(messages=messages)
+    assert requests[0].headers["x-request-tag"] == "batch"
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import httpx
+import pytest
+from concurrent.futures import Future
+from dialtone.errors import DeadlineExceededError
+from dialtone.types import RouteDecision
+
+
+@pytest.fixture
+def requests() -> list[httpx.Request]:
+    return []
+
+
+@pytest.fixture
+def make_handler(handler, requests):
+    def make(route_status: int = 200):
+        def handle(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            response = handler(request)
+            if request.url.path.endswith("/chat/route"):
+                response.status_code = route_status
+            return response
+
+        return handle
+
+    return make
+
+
+def get_router_model_config(request: httpx.Request) -> dict:
+    return json.loads(request.content)["router_model_config"]
+
+
+def test_prefetched_route_pins_completion_model(
+    make_handler, requests, make_dialtone, messages, route_payload
+):
+    dialtone = make_dialtone(make_handler())
+
+    route = dialtone.chat.prefetch_route(messages=messages)
+    completion = dialtone.chat.completions.create(messages=messages, route=route)
+
+    assert isinstance(route, Future)
+    assert route.result().model == route_payload["model"]
+    assert completion.choices[0].message.content == "Hello!"
+    assert [request.url.path for request in requests] == [
+        "/v0/chat/route",
+        "/v0/chat/completions",
+    ]
+    assert get_router_model_config(requests[1])["include_models"] == [
+        route_payload["model"]
+    ]
+    dialtone.close()
+
+
+def test_route_decision_pins_completion_model(
+    make_handler, requests, make_dialtone, messages, route_payload
+):
+    dialtone = make_dialtone(make_handler())
+
+    dialtone.chat.completions.create(
+        messages=messages, route=RouteDecision(**route_payload)
+    )
+    dialtone.chat.completions.create(messages=messages)
+
+    assert get_router_model_config(requests[0])["include_models"] == [
+        route_payload["model"]
+    ]
+    assert get_router_model_config(requests[1])["include_models"] == []
+
+
+def test_failed_prefetch_falls_back_to_routing_in_completion(
+    make_handler, requests, make_dialtone, messages
+):
+    dialtone = make_dialtone(make_handler(route_status=500))
+
+    route = dialtone.chat.prefetch_route(messages=messages)
+    completion = dialtone.chat.completions.create(messages=messages, route=route)
+
+    assert completion.choices[0].message.content == "Hello!"
+    assert get_router_model_config(requests[-1])["include_models"] == []
+
+
+@pytest.mark.asyncio
+async def test_async_prefetched_route_pins_completion_model(
+    make_handler, requests, make_async_dialtone, messages, route_payload
+):
+    dialtone = make_async_dialtone(make_handler())
+
+    route = dialtone.chat.prefetch_route(messages=messages)
+    completion = await dialtone.chat.completions.create(messages=messages, route=route)
+
+    assert isinstance(route, asyncio.Task)
+    assert completion.choices[0].message.content == "Hello!"
+    assert get_router_model_config(requests[-1])["include_models"] == [
+        route_payload["model"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_late_prefetch_exceeds_deadline(
+    make_handler, requests, make_async_dialtone, messages
+):
+    handler = make_handler()
+
+    async def slow_route_handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/chat/route"):
+            await asyncio.sleep(1)
+        return handler(request)
+
+    dialtone = make_async_dialtone(slow_route_handler)
+
+    route = dialtone.chat.prefetch_route(messages=messages)
+    with pytest.raises(DeadlineExceededError):
+        await dialtone.chat.completions.create(
+            messages=messages, route=route, deadline=0.05
+        )
+
+    # The prefetch may be shared with other requests and is left running
+    assert not route.done()
+    route.cancel()
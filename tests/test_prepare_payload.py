@@ -0,0 +1,110 @@
+import json
+import pickle
+from dialtone.types import (
+    ChatMessage,
+    Dials,
+    DialtoneClient,
+    RouterModelConfig,
+    LLM,
+)
+from dialtone.utils.prepare_payload import (
+    prepare_chat_completion,
+    prepare_chat_route,
+    prepare_static_params,
+)
+
+
+def test_static_params_are_cached(dialtone_client):
+    first = prepare_static_params(dialtone_client)
+    assert prepare_static_params(dialtone_client) is first
+    assert first["dials"] == {"quality": 0.5, "cost": 0.5}
+    assert first["provider_config"]["openai"] == {"api_key": "test"}
+
+
+def test_static_params_invalidated_on_mutation(dialtone_client):
+    first = prepare_static_params(dialtone_client)
+
+    dialtone_client.dials.quality = 0.25
+    second = prepare_static_params(dialtone_client)
+    assert second is not first
+    assert second["dials"]["quality"] == 0.25
+
+    dialtone_client.router_model_config = RouterModelConfig(exclude_models=[LLM.gpt_4o])
+    third = prepare_static_params(dialtone_client)
+    assert third["router_model_config"]["exclude_models"] == [LLM.gpt_4o]
+
+    # Assignments deep inside the config invalidate it too.
+    dialtone_client.router_model_config.gpt_4o.providers = []
+    fourth = prepare_static_params(dialtone_client)
+    assert fourth["router_model_config"]["gpt_4o"]["providers"] == []
+
+
+def test_chat_payloads_include_static_params(dialtone_client):
+    messages = [ChatMessage(role="user", content="Hello, world!")]
+
+    headers, content = prepare_chat_completion(
+        client=dialtone_client, messages=messages, stream=True
+    )
+    params = json.loads(content)
+    assert headers["Authorization"] == "Bearer test"
+    assert params["messages"][0]["content"] == "Hello, world!"
+    assert params["stream"] is True
+    assert params["dials"] == {"quality": 0.5, "cost": 0.5}
+    assert set(prepare_static_params(dialtone_client)) <= set(params)
+
+    _, route_content = prepare_chat_route(client=dialtone_client, messages=messages)
+    route_params = json.loads(route_content)
+    assert "stream" not in route_params
+    assert route_params["dials"] == params["dials"]
+
+
+def test_static_content_invalidated_on_mutation(dialtone_client):
+    messages = [ChatMessage(role="user", content="Hello, world!")]
+
+    _, content = prepare_chat_completion(client=dialtone_client, messages=messages)
+    assert json.loads(content)["dials"]["cost"] == 0.5
+
+    dialtone_client.dials = Dials(quality=1, cost=0)
+    _, content = prepare_chat_completion(client=dialtone_client, messages=messages)
+    assert json.loads(content)["dials"]["cost"] == 0
+
+
+def test_client_copies_its_config(provider_config):
+    dials = Dials(quality=0.5, cost=0.5)
+    client = DialtoneClient(
+        api_key="test", provider_config=provider_config, dials=dials
+    )
+    first = prepare_static_params(client)
+
+    dials.quality = 0.25
+    provider_config.openai.api_key = "changed"
+    assert client.dials.quality == 0.5
+    assert prepare_static_params(client) is first
+
+
+def test_revision_is_per_client(dialtone_client, provider_config):
+    other = DialtoneClient(api_key="test", provider_config=provider_config)
+    first = prepare_static_params(dialtone_client)
+
+    other.dials.quality = 0.25
+    other.provider_config.openai.api_key = "changed"
+    assert prepare_static_params(dialtone_client) is first
+
+
+def test_copied_client_tracks_its_own_config(dialtone_client):
+    prepare_static_params(dialtone_client)
+
+    for copied in (
+        dialtone_client.model_copy(deep=True),
+        pickle.loads(pickle.dumps(dialtone_client)),
+    ):
+        assert copied == dialtone_client
+        copied.dials.quality = 0.75
+        assert prepare_static_params(copied)["dials"]["quality"] == 0.75
+        assert prepare_static_params(dialtone_client)["dials"]["quality"] == 0.5
+
+    # A shallow copy shares the nested config with the original.
+    copied = dialtone_client.model_copy()
+    prepare_static_params(copied)
+    dialtone_client.dials.quality = 0.75
+    assert prepare_static_params(copied)["dials"]["quality"] == 0.75
@@ -0,0 +1,88 @@
+import time
+import httpx
+import pytest
+from dialtone.errors import DeadlineExceededError, RateLimitError
+from dialtone.rate_limit import RateLimiter
+from dialtone.types import TokenUsage
+
+
+def test_requests_are_paced_after_burst():
+    rate_limiter = RateLimiter(requests_per_second=100, burst=3)
+
+    start = time.monotonic()
+    for _ in range(6):
+        rate_limiter.acquire()
+    elapsed = time.monotonic() - start
+
+    # 3 immediately, then one every 10ms.
+    assert 0.025 <= elapsed < 0.2
+    assert rate_limiter.stats.acquired == 6
+
+
+def test_token_budget_blocks_while_in_debt():
+    rate_limiter = RateLimiter(tokens_per_minute=6000)
+    rate_limiter.acquire()
+    rate_limiter.record_usage(TokenUsage(total_tokens=6000 + 10))
+
+    # 10 tokens of debt at 100 tokens/sec is a 100ms wait.
+    start = time.monotonic()
+    rate_limiter.acquire()
+    assert time.monotonic() - start >= 0.08
+
+
+def test_rate_adapts_to_rate_limit_errors(make_dialtone, messages, completion_payload):
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0.05"}, text="slow down"),
+        httpx.Response(200, json=completion_payload),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    rate_limiter = RateLimiter(requests_per_second=1000)
+    dialtone = make_dialtone(handler, rate_limiter=rate_limiter)
+
+    with pytest.raises(RateLimitError):
+        dialtone.chat.completions.create(messages=messages)
+    assert rate_limiter.stats.rate_limited == 1
+    assert rate_limiter.stats.current_requests_per_second == 500
+
+    # The next call honours Retry-After, then the rate recovers additively.
+    start = time.monotonic()
+    dialtone.chat.completions.create(messages=messages)
+    assert time.monotonic() - start >= 0.04
+    assert rate_limiter.stats.current_requests_per_second == 520
+
+
+@pytest.mark.asyncio
+async def test_async_stream_records_rate_limit_errors(make_async_dialtone, messages):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, text="slow down")
+
+    rate_limiter = RateLimiter(requests_per_second=10)
+    dialtone = make_async_dialtone(handler, rate_limiter=rate_limiter)
+
+    stream = await dialtone.chat.completions.create(messages=messages, stream=True)
+    with pytest.raises(RateLimitError):
+        async for _ in stream:
+            pass
+
+    assert rate_limiter.stats.rate_limited == 1
+    assert rate_limiter.stats.current_requests_per_second == 5
+
+
+def test_slot_past_deadline_fails_fast(make_dialtone, messages):
+    rate_limiter = RateLimiter(requests_per_second=0.5, burst=1)
+    dialtone = make_dialtone(rate_limiter=rate_limiter)
+    dialtone.chat.completions.create(messages=messages)
+
+    # The next slot is 2s away.
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        dialtone.chat.completions.create(messages=messages, deadline=0.1)
+    assert time.monotonic() - start < 0.1
+
+    # The slot was not taken.
+    with pytest.raises(DeadlineExceededError):
+        rate_limiter.acquire(deadline=time.monotonic() + 1.5)
+    assert rate_limiter.stats.acquired == 1
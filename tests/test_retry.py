@@ -0,0 +1,167 @@
+import time
+import httpx
+import pytest
+from dialtone.errors import BadRequestError, ServiceUnavailableError
+from dialtone.rate_limit import RateLimiter
+from dialtone.retry import RetryPolicy
+
+
+def test_retries_transient_errors(make_dialtone, messages, completion_payload):
+    responses = [
+        httpx.Response(503, text="unavailable"),
+        httpx.Response(502, text="bad gateway"),
+        httpx.Response(200, json=completion_payload),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    retry_policy = RetryPolicy(initial_backoff=0.001)
+    dialtone = make_dialtone(handler, retry_policy=retry_policy)
+
+    response = dialtone.chat.completions.create(messages=messages)
+    assert response.choices[0].message.content == "Hello!"
+    assert retry_policy.stats.model_dump() == {
+        "attempts": 3,
+        "retries": 2,
+        "recovered": 1,
+        "exhausted": 0,
+    }
+
+
+def test_does_not_retry_client_errors(make_dialtone, messages):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400, text="bad request")
+
+    dialtone = make_dialtone(handler, retry_policy=RetryPolicy(initial_backoff=0))
+
+    with pytest.raises(BadRequestError):
+        dialtone.chat.completions.create(messages=messages)
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_attempts(make_dialtone, messages):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(503, text="unavailable")
+
+    retry_policy = RetryPolicy(max_attempts=4, initial_backoff=0)
+    dialtone = make_dialtone(handler, retry_policy=retry_policy)
+
+    with pytest.raises(ServiceUnavailableError):
+        dialtone.chat.completions.create(messages=messages)
+    assert len(calls) == 4
+    assert retry_policy.stats.exhausted == 1
+
+
+def test_retry_after_counts_against_deadline(make_dialtone, messages):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(429, headers={"retry-after": "30"}, text="slow down")
+
+    retry_policy = RetryPolicy(initial_backoff=0, deadline=5)
+    rate_limiter = RateLimiter(requests_per_second=100)
+    dialtone = make_dialtone(
+        handler, retry_policy=retry_policy, rate_limiter=rate_limiter
+    )
+
+    start = time.monotonic()
+    with pytest.raises(Exception):
+        dialtone.chat.completions.create(messages=messages)
+    assert time.monotonic() - start < 1
+    assert len(calls) == 1
+    assert retry_policy.stats.exhausted == 1
+    assert rate_limiter.stats.rate_limited == 1
+
+
+def test_retry_after_is_honoured(make_dialtone, messages, completion_payload):
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0.05"}, text="slow down"),
+        httpx.Response(200, json=completion_payload),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    dialtone = make_dialtone(
+        handler, retry_policy=RetryPolicy(initial_backoff=0, jitter="none")
+    )
+
+    start = time.monotonic()
+    dialtone.chat.completions.create(messages=messages)
+    assert time.monotonic() - start >= 0.04
+
+
+def test_retries_stream_before_first_chunk(
+    make_dialtone, messages, tokens, stream_body
+):
+    responses = [
+        httpx.Response(503, text="unavailable"),
+        httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=stream_body,
+        ),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    retry_policy = RetryPolicy(initial_backoff=0)
+    dialtone = make_dialtone(handler, retry_policy=retry_policy)
+
+    chunks = list(dialtone.chat.completions.create(messages=messages, stream=True))
+    assert "".join(chunk.choices[0].delta.content or "" for chunk in chunks) == (
+        "".join(tokens)
+    )
+    assert retry_policy.stats.recovered == 1
+
+
+def test_does_not_retry_stream_after_first_chunk(make_dialtone, messages, stream_body):
+    calls = []
+
+    def body():
+        yield stream_body[:-20]
+        raise httpx.ReadError("connection reset")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=body()
+        )
+
+    dialtone = make_dialtone(handler, retry_policy=RetryPolicy(initial_backoff=0))
+
+    stream = dialtone.chat.completions.create(messages=messages, stream=True)
+    with pytest.raises(httpx.ReadError):
+        for _ in stream:
+            pass
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_retries_transport_errors(
+    make_async_dialtone, messages, completion_payload
+):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, json=completion_payload)
+
+    retry_policy = RetryPolicy(initial_backoff=0)
+    dialtone = make_async_dialtone(handler, retry_policy=retry_policy)
+
+    response = await dialtone.chat.completions.create(messages=messages)
+    assert response.choices[0].message.content == "Hello!"
+    assert len(calls) == 2
+    assert retry_policy.stats.retries == 1
@@ -0,0 +1,106 @@
+import json
+import httpx
+import pytest
+from dialtone.utils.api import (
+    dialtone_streaming_post_request,
+    dialtone_streaming_post_request_async,
+)
+from dialtone.utils.sse import SSEDecoder, ServerSentEvent
+
+
+def decode_all(chunks: list[bytes]) -> list[ServerSentEvent]:
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    events.extend(decoder.flush())
+    return events
+
+
+def split_every(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+STREAM = (
+    b": keep-alive\r\n"
+    b'data: {"n": 1}\r\n\r\n'
+    b"event: message\n"
+    b"id: 42\n"
+    b'data: {"n":\n'
+    b"data:  2}\n\n"
+    b'data: {"n": 3}\r\r'
+    b"data: [DONE]\n\n"
+)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(STREAM)])
+def test_decoder_handles_arbitrary_chunk_boundaries(size):
+    events = decode_all(split_every(STREAM, size))
+
+    assert [event.data for event in events] == [
+        b'{"n": 1}',
+        b'{"n":\n 2}',
+        b'{"n": 3}',
+        b"[DONE]",
+    ]
+    assert events[1].event == "message"
+    assert events[1].id == "42"
+    assert events[2].event is None
+    assert events[2].id == "42"
+
+
+def test_decoder_handles_newline_delimited_json():
+    events = decode_all([b'{"n": 1}\n{"n"', b': 2}\n{"n": 3}'])
+
+    assert [event.data for event in events] == [b'{"n": 1}', b'{"n": 2}', b'{"n": 3}']
+
+
+STREAM_BODY = (
+    b"".join(
+        b'data: {"index": %d, "text": "%s"}\n\n' % (i, b"x" * i) for i in range(50)
+    )
+    + b"data: [DONE]\n\n"
+)
+
+
+def stream_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=iter(split_every(STREAM_BODY, 5)))
+
+
+def test_streaming_request_reassembles_split_lines():
+    http_client = httpx.Client(transport=httpx.MockTransport(stream_handler))
+
+    chunks = list(
+        dialtone_streaming_post_request(
+            http_client=http_client,
+            url="http://dialtone.test/v0/chat/completions",
+            content=b"{}",
+            headers={},
+        )
+    )
+
+    assert [json.loads(chunk)["index"] for chunk in chunks] == list(range(50))
+
+
+@pytest.mark.asyncio
+async def test_async_streaming_request_reassembles_split_lines():
+    async def body():
+        for chunk in split_every(STREAM_BODY, 5):
+            yield chunk
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body())
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    chunks = [
+        chunk
+        async for chunk in dialtone_streaming_post_request_async(
+            http_client=http_client,
+            url="http://dialtone.test/v0/chat/completions",
+            content=b"{}",
+            headers={},
+        )
+    ]
+
+    assert [json.loads(chunk)["index"] for chunk in chunks] == list(range(50))
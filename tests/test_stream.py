@@ -0,0 +1,195 @@
+import json
+import httpx
+import pytest
+from dialtone.stream import (
+    AsyncChatCompletionStream,
+    ChatCompletionAccumulator,
+    ChatCompletionStream,
+)
+from dialtone.types import (
+    ChatCompletionChunk,
+    ChunkEvent,
+    LLM,
+    Provider,
+    TokenUsage,
+    ToolCallEvent,
+)
+
+
+def tool_call_chunks() -> list[dict]:
+    fragments = [
+        {"index": 0, "id": "call_1", "type": "function", "function": {"name": "get"}},
+        {"index": 0, "function": {"name": "_weather", "arguments": '{"city": '}},
+        {"index": 1, "id": "call_2", "type": "function", "function": {"name": "now"}},
+        {"index": 0, "function": {"arguments": '"Paris"}'}},
+        {"index": 1, "function": {"arguments": "{}"}},
+    ]
+    chunks = [
+        {
+            "model": "gpt-4o-mini-2024-07-18",
+            "provider": "openai",
+            "choices": [{"delta": {"role": "assistant", "tool_calls": [fragment]}}],
+            "usage": None,
+        }
+        for fragment in fragments
+    ]
+    chunks[-1]["choices"][0]["finish_reason"] = "tool_calls"
+    chunks[-1]["usage"] = {
+        "prompt_tokens": 5,
+        "completion_tokens": 9,
+        "total_tokens": 14,
+    }
+    return chunks
+
+
+@pytest.mark.parametrize("chunk_format", ["model", "dict"])
+def test_accumulates_content_and_usage(chunk_format, tokens, make_chunk):
+    chunks = [make_chunk(token) for token in tokens]
+    chunks[-1]["usage"] = {
+        "prompt_tokens": 3,
+        "completion_tokens": 4,
+        "total_tokens": 7,
+    }
+    accumulator = ChatCompletionAccumulator()
+    for chunk in chunks:
+        accumulator.add(
+            ChatCompletionChunk(**chunk) if chunk_format == "model" else chunk
+        )
+
+    completion = accumulator.get_completion()
+    assert completion.choices[0].message.role == "assistant"
+    assert completion.choices[0].message.content == "Hello, world!"
+    assert completion.model == LLM("gpt-4o-mini-2024-07-18")
+    assert completion.provider == Provider.OpenAI
+    assert completion.usage == TokenUsage(
+        prompt_tokens=3, completion_tokens=4, total_tokens=7
+    )
+
+
+@pytest.mark.parametrize("chunk_format", ["model", "dict"])
+def test_merges_tool_call_fragments_by_index(chunk_format):
+    accumulator = ChatCompletionAccumulator()
+    for chunk in tool_call_chunks():
+        accumulator.add(
+            ChatCompletionChunk(**chunk) if chunk_format == "model" else chunk
+        )
+
+    tool_calls = accumulator.get_completion().choices[0].message.tool_calls
+    assert [(t.id, t.function.name, t.function.arguments) for t in tool_calls] == [
+        ("call_1", "get_weather", '{"city": "Paris"}'),
+        ("call_2", "now", "{}"),
+    ]
+    assert accumulator.choices[0].finish_reason == "tool_calls"
+
+
+def test_empty_stream_has_no_completion():
+    with pytest.raises(ValueError):
+        ChatCompletionAccumulator().get_completion()
+
+
+def test_stream_yields_chunks_and_completion(make_dialtone, messages, tokens):
+    stream = ChatCompletionStream(
+        make_dialtone().chat.completions.create(messages=messages, stream=True)
+    )
+    with pytest.raises(RuntimeError):
+        stream.completion
+
+    assert [chunk.choices[0].delta.content for chunk in stream] == tokens
+    assert stream.completion.choices[0].message.content == "Hello, world!"
+    assert stream.completion.usage.total_tokens == 7
+
+
+@pytest.mark.asyncio
+async def test_async_stream_until_done(make_async_dialtone, messages):
+    chunks = await make_async_dialtone().chat.completions.create(
+        messages=messages, stream=True
+    )
+    completion = await AsyncChatCompletionStream(chunks).until_done()
+
+    assert completion.choices[0].message.content == "Hello, world!"
+    assert completion.usage.total_tokens == 7
+
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {"name": "get_weather", "parameters": {"type": "object"}},
+    }
+]
+
+
+@pytest.fixture
+def requests() -> list[dict]:
+    return []
+
+
+@pytest.fixture
+def tool_call_handler(make_stream_body, requests):
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, content=make_stream_body(tool_call_chunks()))
+
+    return handle
+
+
+def test_streams_with_tools(tool_call_handler, requests, make_dialtone, messages):
+    dialtone = make_dialtone(tool_call_handler)
+
+    chunks = list(
+        dialtone.chat.completions.create(messages=messages, tools=TOOLS, stream=True)
+    )
+
+    assert len(chunks) == 5
+    assert requests[0]["stream"] is True
+    assert requests[0]["tools"][0]["function"]["name"] == "get_weather"
+
+
+def test_events_emit_tool_calls_as_soon_as_complete(
+    tool_call_handler, make_dialtone, messages
+):
+    dialtone = make_dialtone(tool_call_handler)
+    stream = ChatCompletionStream(
+        dialtone.chat.completions.create(messages=messages, tools=TOOLS, stream=True)
+    )
+
+    events = [
+        "chunk" if isinstance(event, ChunkEvent) else event.tool_call.id
+        for event in stream.events()
+    ]
+
+    # call_1's arguments close on the fourth chunk, before call_2's arrive
+    assert events == ["chunk"] * 4 + ["call_1", "chunk", "call_2"]
+    assert len(stream.completion.choices[0].message.tool_calls) == 2
+
+
+def test_truncated_tool_call_is_emitted_at_end_of_stream():
+    chunks = tool_call_chunks()[:2]
+    stream = ChatCompletionStream(ChatCompletionChunk(**chunk) for chunk in chunks)
+
+    tool_calls = [
+        event.tool_call for event in stream.events() if isinstance(event, ToolCallEvent)
+    ]
+
+    assert [(t.id, t.function.arguments) for t in tool_calls] == [
+        ("call_1", '{"city": ')
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_events_emit_tool_calls(
+    tool_call_handler, make_async_dialtone, messages
+):
+    dialtone = make_async_dialtone(tool_call_handler)
+    stream = AsyncChatCompletionStream(
+        await dialtone.chat.completions.create(
+            messages=messages, tools=TOOLS, stream=True
+        )
+    )
+
+    tool_calls = [
+        event.tool_call
+        async for event in stream.events()
+        if isinstance(event, ToolCallEvent)
+    ]
+
+    assert [t.function.name for t in tool_calls] == ["get_weather", "now"]
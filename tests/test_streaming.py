@@ -0,0 +1,33 @@
+import pytest
+from dialtone.types import ChatCompletionChunk, LLM
+
+
+def test_stream_yields_validated_chunks(make_dialtone, messages, tokens):
+    dialtone = make_dialtone()
+
+    chunks = list(dialtone.chat.completions.create(messages=messages, stream=True))
+
+    assert all(isinstance(chunk, ChatCompletionChunk) for chunk in chunks)
+    assert [chunk.choices[0].delta.content for chunk in chunks] == tokens
+    assert chunks[0].model == LLM.gpt_4o_mini
+    assert chunks[-1].usage.total_tokens == 7
+
+
+def test_stream_yields_dicts(make_dialtone, messages, tokens):
+    dialtone = make_dialtone(stream_config={"chunk_format": "dict"})
+
+    chunks = list(dialtone.chat.completions.create(messages=messages, stream=True))
+
+    assert [chunk["choices"][0]["delta"]["content"] for chunk in chunks] == tokens
+
+
+@pytest.mark.asyncio
+async def test_async_stream_yields_validated_chunks(
+    make_async_dialtone, messages, tokens
+):
+    dialtone = make_async_dialtone()
+
+    stream = await dialtone.chat.completions.create(messages=messages, stream=True)
+    chunks = [chunk async for chunk in stream]
+
+    assert [chunk.choices[0].delta.content for chunk in chunks] == tokens
@@ -0,0 +1,148 @@
+import time
+import httpx
+import pytest
+from dialtone import Dialtone
+from dialtone.errors import DeadlineExceededError, ServiceUnavailableError
+from dialtone.retry import RetryPolicy
+from dialtone.types import HTTPConfig, StreamConfig
+
+
+@pytest.fixture
+def create_dialtone(make_dialtone):
+    def create(handler, **kwargs) -> tuple[Dialtone, list[httpx.Request]]:
+        requests = []
+
+        def recording_handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return handler(request)
+
+        return make_dialtone(recording_handler, **kwargs), requests
+
+    return create
+
+
+def test_default_timeouts(create_dialtone, handler, messages):
+    dialtone, requests = create_dialtone(handler)
+
+    dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.route(messages=messages)
+
+    assert requests[0].extensions["timeout"] == dict.fromkeys(
+        ["connect", "read", "write", "pool"], 120
+    )
+    assert requests[1].extensions["timeout"] == dict.fromkeys(
+        ["connect", "read", "write", "pool"], 15
+    )
+
+
+def test_timeouts_from_config_and_per_call(create_dialtone, handler, messages):
+    dialtone, requests = create_dialtone(
+        handler, http_config=HTTPConfig(timeout=60, route_timeout=5, connect_timeout=2)
+    )
+
+    dialtone.chat.completions.create(messages=messages)
+    dialtone.chat.route(messages=messages, timeout=1)
+    dialtone.chat.completions.create(
+        messages=messages, timeout=httpx.Timeout(30, connect=0.5)
+    )
+
+    assert requests[0].extensions["timeout"] == {
+        "connect": 2,
+        "read": 60,
+        "write": 60,
+        "pool": 60,
+    }
+    assert requests[1].extensions["timeout"]["read"] == 1
+    assert requests[1].extensions["timeout"]["connect"] == 2
+    assert requests[2].extensions["timeout"] == {
+        "connect": 0.5,
+        "read": 30,
+        "write": 30,
+        "pool": 30,
+    }
+
+
+def test_deadline_caps_timeout(create_dialtone, handler, messages):
+    dialtone, requests = create_dialtone(handler)
+
+    dialtone.chat.completions.create(messages=messages, deadline=2)
+
+    timeout = requests[0].extensions["timeout"]
+    assert all(0 < phase <= 2 for phase in timeout.values())
+
+
+def test_expired_deadline_is_not_sent(create_dialtone, handler, messages):
+    dialtone, requests = create_dialtone(handler)
+
+    with pytest.raises(DeadlineExceededError):
+        dialtone.chat.route(messages=messages, deadline=0)
+    assert requests == []
+
+
+def test_retries_stop_at_deadline(create_dialtone, messages):
+    dialtone, requests = create_dialtone(
+        lambda request: httpx.Response(503, text="unavailable"),
+        retry_policy=RetryPolicy(initial_backoff=0.5, jitter="none"),
+    )
+
+    with pytest.raises(ServiceUnavailableError):
+        dialtone.chat.completions.create(messages=messages, deadline=0.2)
+    assert len(requests) == 1
+    assert dialtone.retry_policy.stats.exhausted == 1
+
+
+def test_stream_idle_timeout(create_dialtone, messages, stream_body):
+    dialtone, requests = create_dialtone(
+        lambda request: httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=stream_body
+        ),
+        stream_config=StreamConfig(idle_timeout=3),
+    )
+
+    list(dialtone.chat.completions.create(messages=messages, stream=True))
+    assert requests[0].extensions["timeout"]["read"] == 3
+    assert requests[0].extensions["timeout"]["connect"] == 120
+
+
+@pytest.mark.asyncio
+async def test_async_route_timeout(make_async_dialtone, messages, route_payload):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=route_payload)
+
+    dialtone = make_async_dialtone(handler)
+
+    await dialtone.chat.route(messages=messages, timeout=3)
+    assert requests[0].extensions["timeout"]["read"] == 3
+
+
+class StalledStream(httpx.SyncByteStream):
+    # Sends one chunk, then stalls until the transport's read timeout fires.
+    def __init__(self, first: bytes, stall: float):
+        self.first = first
+        self.stall = stall
+
+    def __iter__(self):
+        yield self.first
+        time.sleep(self.stall)
+        raise httpx.ReadTimeout("timed out")
+
+
+@pytest.mark.parametrize(
+    "deadline, error", [(0.05, DeadlineExceededError), (None, httpx.ReadTimeout)]
+)
+def test_stalled_stream_reports_deadline(
+    create_dialtone, messages, stream_body, deadline, error
+):
+    first = stream_body.split(b"\n\n")[0] + b"\n\n"
+    dialtone, _ = create_dialtone(
+        lambda request: httpx.Response(200, stream=StalledStream(first, 0.1))
+    )
+
+    stream = dialtone.chat.completions.create(
+        messages=messages, stream=True, deadline=deadline
+    )
+    with pytest.raises(error):
+        list(stream)
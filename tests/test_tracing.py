@@ -0,0 +1,151 @@
+import httpx
+import pytest
+from dialtone import Dialtone
+from dialtone.retry import RetryPolicy
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry import trace
+from opentelemetry.trace import StatusCode
+from dialtone.tracing import OpenTelemetryTracing
+
+
+@pytest.fixture
+def exporter() -> InMemorySpanExporter:
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracing(exporter: InMemorySpanExporter) -> OpenTelemetryTracing:
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return OpenTelemetryTracing(tracer=provider.get_tracer("test"))
+
+
+@pytest.fixture
+def create_dialtone(make_dialtone):
+    def create(handler, **kwargs) -> tuple[Dialtone, list[httpx.Request]]:
+        requests = []
+
+        def recording_handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return handler(request)
+
+        return make_dialtone(recording_handler, **kwargs), requests
+
+    return create
+
+
+def test_completion_span(tracing, exporter, create_dialtone, handler, messages):
+    dialtone, requests = create_dialtone(handler, hooks=[tracing])
+
+    dialtone.chat.completions.create(messages=messages)
+
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "dialtone.chat.completions.create"
+    assert span.attributes["gen_ai.response.model"] == "gpt-4o-mini-2024-07-18"
+    assert span.attributes["dialtone.provider"] == "openai"
+    assert span.attributes["gen_ai.usage.input_tokens"] == 3
+    assert span.attributes["gen_ai.usage.output_tokens"] == 2
+    assert span.attributes["dialtone.attempts"] == 1
+
+    trace_id = format(span.context.trace_id, "032x")
+    span_id = format(span.context.span_id, "016x")
+    assert requests[0].headers["traceparent"].startswith(f"00-{trace_id}-{span_id}-")
+
+
+def test_error_span_counts_retries(tracing, exporter, create_dialtone, messages):
+    dialtone, _ = create_dialtone(
+        lambda request: httpx.Response(503, text="unavailable"),
+        retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0),
+        hooks=[tracing],
+    )
+
+    with pytest.raises(Exception):
+        dialtone.chat.completions.create(messages=messages)
+
+    (span,) = exporter.get_finished_spans()
+    assert span.status.status_code == StatusCode.ERROR
+    assert span.attributes["error.type"] == "ServiceUnavailableError"
+    assert span.attributes["http.response.status_code"] == 503
+    assert span.attributes["dialtone.attempts"] == 2
+
+
+def test_stream_spans(tracing, exporter, create_dialtone, messages, stream_body):
+    dialtone, _ = create_dialtone(
+        lambda request: httpx.Response(200, content=stream_body), hooks=[tracing]
+    )
+
+    list(dialtone.chat.completions.create(messages=messages, stream=True))
+
+    stream_span, span = exporter.get_finished_spans()
+    assert span.name == "dialtone.chat.completions.create"
+    assert span.attributes["gen_ai.usage.output_tokens"] == 4
+    assert stream_span.name == "dialtone.chat.completions.stream"
+    assert stream_span.parent.span_id == span.context.span_id
+    assert stream_span.attributes["dialtone.chunks"] == 4
+    assert span.start_time <= stream_span.start_time <= stream_span.end_time
+
+
+def test_stream_span_covers_iteration(
+    tracing, exporter, create_dialtone, messages, stream_body
+):
+    dialtone, _ = create_dialtone(
+        lambda request: httpx.Response(200, content=stream_body), hooks=[tracing]
+    )
+
+    chunks = dialtone.chat.completions.create(messages=messages, stream=True)
+    next(chunks)
+    assert exporter.get_finished_spans() == ()
+
+    chunks.close()
+    stream_span, span = exporter.get_finished_spans()
+    assert stream_span.attributes["dialtone.chunks"] == 1
+    assert stream_span.parent.span_id == span.context.span_id
+
+
+def test_request_runs_in_span(tracing, exporter, create_dialtone, handler, messages):
+    current_spans = []
+
+    def tracing_handler(request: httpx.Request) -> httpx.Response:
+        current_spans.append(trace.get_current_span())
+        return handler(request)
+
+    dialtone, _ = create_dialtone(tracing_handler, hooks=[tracing])
+
+    dialtone.chat.completions.create(messages=messages)
+
+    (span,) = exporter.get_finished_spans()
+    assert current_spans[0].get_span_context().span_id == span.context.span_id
+    assert not trace.get_current_span().get_span_context().is_valid
+
+
+@pytest.mark.asyncio
+async def test_async_route_span(
+    tracing, exporter, make_async_dialtone, messages, route_payload
+):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=route_payload)
+
+    dialtone = make_async_dialtone(handler, hooks=[tracing])
+
+    await dialtone.chat.route(messages=messages)
+
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "dialtone.chat.route"
+    assert "traceparent" in requests[0].headers
+
+
+def test_no_headers_without_tracing(create_dialtone, handler, messages):
+    dialtone, requests = create_dialtone(handler)
+
+    dialtone.chat.completions.create(messages=messages)
+    assert "traceparent" not in requests[0].headers